@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+"""
+各任务共用的模块
+
+task2、task3和task4中同名的compressed_input.py和run_metrics.py只是入口：把Version_Python目录加入模块搜索路径后
+导出本包中的实现，因此修改只需要在这里进行一次。
+"""
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+压缩输入文件的透明读取
+
+设计库中的BookShelf文件可能以.gz、.bz2、.xz或.zst格式压缩保存。open_input按文件开头的魔数识别压缩格式，
+未压缩的文件直接打开；压缩文件由后台线程分块解压，解压出的数据块经有界队列交给读取方，
+因此解压与分词/解析同时进行，内存中只保留少量数据块，不需要先把整个文件解压到磁盘。
+
+读取对象记录两部分耗时：
+    - decompress_time: 后台线程读取并解压数据所用的时间
+    - wait_time: 读取方等待解压数据的时间，总耗时减去该时间即为解析本身的耗时
+
+.zst格式需要安装zstandard包（Python 3.14及以上版本也可使用标准库的compression.zstd）。
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+import time
+
+# 压缩格式的魔数
+MAGIC_NUMBERS = (("gzip", b"\x1f\x8b"),
+                 ("bz2", b"BZh"),
+                 ("xz", b"\xfd7zXZ\x00"),
+                 ("zstd", b"\x28\xb5\x2f\xfd"))
+
+# 原始文件不存在时依次尝试的压缩文件后缀
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")
+
+# 后台线程每次解压的字节数，以及队列中最多缓存的数据块数
+BLOCK_SIZE = 1 << 20
+QUEUE_BLOCKS = 8
+
+
+def resolve_input(path):
+    """
+    查找输入文件
+
+    .aux文件中列出的是未压缩的文件名，原始文件不存在时依次尝试加上压缩后缀的文件。
+
+    参数:
+        path (str): 文件路径
+
+    返回值:
+        str: 存在的文件路径，都不存在时返回原路径
+    """
+    if os.path.exists(path):
+        return path
+    for suffix in COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return path
+
+
+def detect_compression(path):
+    """
+    按魔数识别文件的压缩格式
+
+    参数:
+        path (str): 文件路径
+
+    返回值:
+        str: "gzip"、"bz2"、"xz"、"zstd"，未压缩时为None
+    """
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for name, magic in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _open_decompressor(raw, compression):
+    """
+    在原始文件对象上创建流式解压对象
+
+    参数:
+        raw (file): 以二进制模式打开的压缩文件
+        compression (str): 压缩格式
+
+    返回值:
+        file: 可以按块read()解压数据的对象
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if compression == "bz2":
+        return bz2.BZ2File(raw, mode='rb')
+    if compression == "xz":
+        return lzma.LZMAFile(raw, mode='rb')
+    try:
+        from compression import zstd
+        return zstd.ZstdFile(raw, mode='rb')
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("读取.zst文件需要安装zstandard包: pip install zstandard")
+    return zstandard.ZstdDecompressor().stream_reader(raw)
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    后台线程流式解压的只读二进制流
+
+    后台线程按BLOCK_SIZE读取解压数据并放入有界队列，队列满时阻塞，因此解压最多领先读取方QUEUE_BLOCKS个数据块。
+    解压过程中的异常会在读取方下一次读取时重新抛出。
+    """
+    def __init__(self, path, compression):
+        """
+        打开压缩文件并启动解压线程
+
+        参数:
+            path (str): 文件路径
+            compression (str): 压缩格式
+        """
+        super().__init__()
+        self.compression = compression
+        self.decompress_time = 0.0
+        self.wait_time = 0.0
+        self._raw = open(path, 'rb')
+        self._blocks = queue.Queue(maxsize=QUEUE_BLOCKS)
+        self._pending = memoryview(b"")
+        self._finished = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        """后台线程：解压数据块并放入队列，以None标记结束，以异常对象标记出错"""
+        try:
+            with _open_decompressor(self._raw, self.compression) as stream:
+                while not self._stopped.is_set():
+                    start_time = time.time()
+                    block = stream.read(BLOCK_SIZE)
+                    self.decompress_time += time.time() - start_time
+                    if not block:
+                        break
+                    self._put(block)
+            self._put(None)
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        """放入队列，读取方已关闭流时放弃"""
+        while not self._stopped.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _next_block(self):
+        """从队列取出下一个数据块，记录等待时间"""
+        start_time = time.time()
+        block = self._blocks.get()
+        self.wait_time += time.time() - start_time
+        if isinstance(block, Exception):
+            self._finished = True
+            raise block
+        if block is None:
+            self._finished = True
+            return False
+        self._pending = memoryview(block)
+        return True
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        """把解压数据读入缓冲区，返回读取的字节数，文件结束时返回0"""
+        while not self._pending:
+            if self._finished or not self._next_block():
+                return 0
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+    def read_all(self):
+        """
+        读取剩余的全部解压数据
+
+        返回值:
+            bytearray: 解压数据
+        """
+        data = bytearray(self._pending)
+        self._pending = memoryview(b"")
+        while not self._finished and self._next_block():
+            data += self._pending
+            self._pending = memoryview(b"")
+        return data
+
+    def close(self):
+        """停止解压线程并关闭文件"""
+        if not self.closed:
+            self._stopped.set()
+            self._thread.join()
+            self._raw.close()
+        super().close()
+
+
+class PlainReader(io.FileIO):
+    """未压缩文件的二进制流，与DecompressingReader提供相同的计时属性"""
+    compression = None
+    decompress_time = 0.0
+    wait_time = 0.0
+
+    def read_all(self):
+        """读取剩余的全部数据"""
+        return self.readall()
+
+
+def open_input(path, mode='r'):
+    """
+    打开输入文件，压缩文件在后台线程中流式解压
+
+    参数:
+        path (str): 文件路径
+        mode (str): 'r'为文本模式，'rb'为二进制模式
+
+    返回值:
+        file: 文件对象。二进制模式下为DecompressingReader或PlainReader；
+              文本模式下为TextIOWrapper，其raw属性为上述二进制流
+    """
+    compression = detect_compression(path)
+    raw = PlainReader(path) if compression is None else DecompressingReader(path, compression)
+    if mode == 'rb':
+        return raw
+    return io.TextIOWrapper(io.BufferedReader(raw, BLOCK_SIZE))
+
+
+def input_timing(stream):
+    """
+    读取文件对象的解压耗时和等待耗时
+
+    参数:
+        stream (file): open_input返回的文件对象
+
+    返回值:
+        tuple: (解压耗时, 等待耗时)
+    """
+    raw = getattr(stream, 'buffer', stream)
+    raw = getattr(raw, 'raw', raw)
+    return raw.decompress_time, raw.wait_time
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+运行指标的结构化输出
+
+RunMetrics收集一次运行的解析统计、各阶段耗时、线长、溢出率等指标和内存峰值，write按文件后缀
+把一条记录追加到JSON Lines文件（.jsonl，每行一个JSON对象）或CSV文件（.csv，嵌套字段展开为
+"parse.num_nodes"形式的列名）中，批量运行后可以直接汇总，不需要从中英文的控制台输出中匹配数字。
+
+每条记录编码后用一次os.write写入以O_APPEND打开的文件，写入位置总是文件末尾，代价与文件大小无关，
+多个运行同时追加同一个文件时记录不会互相覆盖或丢失。只有CSV记录带来新的列、需要扩展表头时才重写整个文件
+（先写入同一目录下的临时文件，再用os.replace替换），这一步与同时进行的追加之间仍可能丢失记录。
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块
+    resource = None
+
+
+def peak_memory_mb(children=False):
+    """
+    读取进程的内存峰值（最大常驻内存）
+
+    参数:
+        children (bool): 为True时读取已结束的子进程（例如进程池中的工作进程）中的最大值
+
+    返回值:
+        float: 内存峰值（MB），无法读取时为None
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # Linux上ru_maxrss的单位为KB，macOS上为字节
+    scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+    return usage.ru_maxrss / scale
+
+
+def flatten_metrics(record, prefix=""):
+    """
+    把嵌套的指标字典展开为一层，键名用"."连接，列表和元组序列化为JSON字符串
+
+    参数:
+        record (dict): 指标记录
+        prefix (str): 键名前缀
+
+    返回值:
+        dict: 展开后的记录
+    """
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, name + "."))
+        elif isinstance(value, (list, tuple)):
+            flat[name] = json.dumps(value, default=_json_default)
+        else:
+            flat[name] = value
+    return flat
+
+
+def _json_default(value):
+    """把NumPy标量等对象转换为JSON可以表示的值"""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _atomic_write(path, text):
+    """先写入同一目录下的临时文件，再替换目标文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _append_text(path, text):
+    """用一次os.write把文本追加到文件末尾（文件不存在时创建）"""
+    data = text.encode('utf-8')
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        written = os.write(fd, data)
+        # 普通文件的write通常一次写完，剩余部分（例如被信号打断时）继续追加
+        while written < len(data):
+            written += os.write(fd, data[written:])
+    finally:
+        os.close(fd)
+
+
+def append_jsonl(path, record):
+    """
+    把一条记录追加到JSON Lines文件
+
+    参数:
+        path (str): 文件路径
+        record (dict): 指标记录
+    """
+    _append_text(path, json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+
+
+def _csv_line(columns, row):
+    """把一行按columns的顺序编码为CSV文本"""
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, fieldnames=columns, lineterminator="\n").writerow(row)
+    return buffer.getvalue()
+
+
+def append_csv(path, record):
+    """
+    把一条记录追加到CSV文件
+
+    记录的列都已在表头中时只追加一行；出现新的列时扩展表头并重写文件，之前的行在新列上留空。
+
+    参数:
+        path (str): 文件路径
+        record (dict): 指标记录
+    """
+    row = flatten_metrics(record)
+    columns = []
+    if os.path.exists(path):
+        with open(path, encoding='utf-8', newline='') as f:
+            columns = next(csv.reader(f), [])
+    if columns and all(name in columns for name in row):
+        _append_text(path, _csv_line(columns, row))
+        return
+
+    rows = []
+    if columns:
+        with open(path, encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+    columns += [name for name in row if name not in columns]
+    rows.append(row)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    _atomic_write(path, buffer.getvalue())
+
+
+class RunMetrics:
+    """
+    一次运行的指标记录
+
+    记录的结构为:
+        tool、design、timestamp、status: 运行的标识和结果
+        parse: 解析统计（节点数、网表数、面积等）
+        timings: 各阶段耗时（秒）
+        其余字段: 线长（hpwl）、溢出率（overflow）等结果指标，以及内存峰值peak_memory_mb
+    """
+    def __init__(self, tool, design):
+        """
+        初始化记录并开始计时
+
+        参数:
+            tool (str): 程序名称
+            design (str): 设计名称
+        """
+        self.start_time = time.time()
+        self.record = {"tool": tool, "design": design,
+                       "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "status": "ok", "parse": {}, "timings": {}}
+
+    def add_parse_stats(self, stats):
+        """
+        加入解析统计
+
+        参数:
+            stats (dict): 统计量名称到数值的映射
+        """
+        self.record["parse"].update(stats)
+
+    def add_timing(self, stage, seconds):
+        """
+        记录一个阶段的耗时
+
+        参数:
+            stage (str): 阶段名称
+            seconds (float): 耗时（秒）
+        """
+        self.record["timings"][stage] = seconds
+
+    def set(self, **values):
+        """设置结果指标，例如hpwl、overflow"""
+        self.record.update(values)
+
+    def finish(self, status="ok"):
+        """
+        结束记录，写入总耗时和内存峰值
+
+        参数:
+            status (str): 运行结果，例如"ok"、"failed"
+
+        返回值:
+            dict: 完整的记录
+        """
+        self.record["status"] = status
+        self.record["timings"]["total"] = time.time() - self.start_time
+        self.record["peak_memory_mb"] = peak_memory_mb()
+        self.record["peak_memory_children_mb"] = peak_memory_mb(children=True)
+        return self.record
+
+    def write(self, path):
+        """
+        按文件后缀把记录追加到CSV文件（.csv）或JSON Lines文件（其他后缀）
+
+        参数:
+            path (str): 文件路径
+        """
+        if path.lower().endswith(".csv"):
+            append_csv(path, self.record)
+        else:
+            append_jsonl(path, self.record)
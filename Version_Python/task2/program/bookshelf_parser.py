@@ -6,11 +6,19 @@ BookShelf格式解析工具
 用于解析和汇总BookShelf格式的电路布局文件
 """
 
+import json
 import os
 import re
 import sys
 import time
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from compressed_input import detect_compression, open_input, resolve_input, input_timing
+from run_metrics import RunMetrics
 
 
 class BookshelfParser:
@@ -27,13 +35,13 @@ class BookshelfParser:
         self.base_path = base_path
         self.design_name = design_name
         
-        # 文件路径
-        self.nodes_file = os.path.join(base_path, f"{design_name}.nodes")
-        self.nets_file = os.path.join(base_path, f"{design_name}.nets")
-        self.pl_file = os.path.join(base_path, f"{design_name}.pl")
-        self.scl_file = os.path.join(base_path, f"{design_name}.scl")
-        self.wts_file = os.path.join(base_path, f"{design_name}.wts")
-        self.aux_file = os.path.join(base_path, f"{design_name}.aux")
+        # 文件路径，只以压缩形式（.gz、.bz2、.xz、.zst）存在的文件使用压缩文件的路径
+        self.nodes_file = resolve_input(os.path.join(base_path, f"{design_name}.nodes"))
+        self.nets_file = resolve_input(os.path.join(base_path, f"{design_name}.nets"))
+        self.pl_file = resolve_input(os.path.join(base_path, f"{design_name}.pl"))
+        self.scl_file = resolve_input(os.path.join(base_path, f"{design_name}.scl"))
+        self.wts_file = resolve_input(os.path.join(base_path, f"{design_name}.wts"))
+        self.aux_file = resolve_input(os.path.join(base_path, f"{design_name}.aux"))
         
         # 解析结果存储
         self.nodes_info = {}  # 节点信息
@@ -41,6 +49,23 @@ class BookshelfParser:
         self.pl_info = {}     # 布局信息
         self.scl_info = {}    # 布局区域信息
         
+        # 按文件顺序保存的紧凑数组，供compute_metrics向量化计算
+        self.node_width = array('i')     # 节点宽度
+        self.node_height = array('i')    # 节点高度
+        self.node_terminal = array('b')  # 是否为终端节点
+        self.net_degrees = array('i')    # 网络度数
+        self.row_x = array('i')          # 行起点x坐标
+        self.row_y = array('i')          # 行y坐标
+        self.row_height = array('i')     # 行高
+        
+        # generate_report使用的汇总指标，由compute_metrics计算一次后缓存，重新解析时清除
+        self.metrics = None
+        
+        # 压缩文件的解压耗时和等待解压数据的耗时（秒），以及最近一次parse_all中每个文件的耗时，按文件类型记录
+        self.decompress_times = {}
+        self.wait_times = {}
+        self.parse_times = {}
+        
         # 统计信息
         self.stats = {
             "total_nodes": 0,
@@ -62,8 +87,9 @@ class BookshelfParser:
         print(f"正在解析节点文件: {self.nodes_file}")
         
         try:
-            with open(self.nodes_file, 'r') as f:
+            with open_input(self.nodes_file) as f:
                 lines = f.readlines()
+                self._record_timing("nodes", f)
                 
             # 跳过注释行
             data_lines = [line.strip() for line in lines if not line.strip().startswith('#') and line.strip()]
@@ -97,6 +123,11 @@ class BookshelfParser:
                     terminal_count += 1
                 else:
                     break
+            
+            # 同步填充紧凑数组
+            self.node_width = array('i', (node["width"] for node in self.nodes_info.values()))
+            self.node_height = array('i', (node["height"] for node in self.nodes_info.values()))
+            self.node_terminal = array('b', (node["is_terminal"] for node in self.nodes_info.values()))
                     
             print(f"节点文件解析完成，共{self.stats['total_nodes']}个节点，其中{self.stats['terminal_nodes']}个终端节点")
             
@@ -104,50 +135,49 @@ class BookshelfParser:
             print(f"解析节点文件时出错: {str(e)}")
             raise
     
-    def parse_nets_file(self):
-        """解析.nets文件，获取网络信息"""
+    def parse_nets_file(self, chunk_size=1 << 20, workers=1):
+        """解析.nets文件，获取网络信息
+
+        以固定大小的块流式读取文件并逐行解析，网络在读取过程中增量构建，
+        内存占用只与最大网络的规模有关，而与文件大小无关。
+        workers大于1时，文件在NetDegree行处切分为多个字节区间，由多个进程分别解析为
+        紧凑的片段，再在主进程中按文件顺序合并，结果与单进程解析完全一致。
+        压缩文件无法按字节区间切分，总是在当前进程中边解压边解析。
+
+        参数:
+            chunk_size: 每次读取的字节数，默认为1MB
+            workers: 并行解析的进程数，默认为1（不分块）
+        """
         print(f"正在解析网络文件: {self.nets_file}")
         
         try:
-            with open(self.nets_file, 'r') as f:
-                content = f.read()
-            
-            # 解析网络数量和引脚数量
-            num_nets_match = re.search(r'NumNets\s*:\s*(\d+)', content)
-            num_pins_match = re.search(r'NumPins\s*:\s*(\d+)', content)
-            
-            if num_nets_match and num_pins_match:
-                self.stats["total_nets"] = int(num_nets_match.group(1))
-                self.stats["total_pins"] = int(num_pins_match.group(1))
+            if workers > 1 and detect_compression(self.nets_file) is None:
+                ranges = split_nets_file(self.nets_file, workers)
+                with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                    fragments = list(pool.map(parse_nets_range, [self.nets_file] * len(ranges),
+                                              [start for start, _ in ranges], [end for _, end in ranges]))
+                nets = iter_fragment_nets(fragments)
+                header = {}
+                for fragment in fragments:
+                    header.update(fragment["header"])
+            else:
+                header = {}
+                nets = iter_nets(self._iter_lines(self.nets_file, chunk_size), header)
             
-            # 解析每个网络的信息
-            net_sections = re.split(r'NetDegree\s*:\s*\d+\s+\S+', content)[1:]  # 分割每个网络部分
-            net_headers = re.findall(r'NetDegree\s*:\s*(\d+)\s+(\S+)', content)  # 提取网络头部信息
+            net_degrees = array('i')
+            for net_name, degree, pins, offsets in nets:
+                self.nets_info[net_name] = {"degree": degree, "pins": pins, "offsets": offsets}
+                net_degrees.append(degree)
+            self.net_degrees = net_degrees
             
-            if len(net_sections) != len(net_headers):
-                print(f"警告: 网络部分数量({len(net_sections)})与网络头部数量({len(net_headers)})不匹配")
+            # 头部信息中的网络总数和引脚总数
+            self.stats["total_nets"] = header.get("NumNets", self.stats["total_nets"])
+            self.stats["total_pins"] = header.get("NumPins", self.stats["total_pins"])
             
-            net_degrees = []
-            for i, (degree, net_name) in enumerate(net_headers):
-                if i < len(net_sections):
-                    degree = int(degree)
-                    net_degrees.append(degree)
-                    
-                    # 更新最大和最小网络度数
-                    self.stats["max_net_degree"] = max(self.stats["max_net_degree"], degree)
-                    self.stats["min_net_degree"] = min(self.stats["min_net_degree"], degree)
-                    
-                    # 解析网络连接的节点
-                    section = net_sections[i]
-                    pins = re.findall(r'\s*(\S+)\s+([IO])\s*:', section)
-                    
-                    self.nets_info[net_name] = {
-                        "degree": degree,
-                        "pins": pins  # 格式: [(node_name, direction), ...]
-                    }
-            
-            # 计算平均网络度数
+            # 计算最大、最小和平均网络度数
             if net_degrees:
+                self.stats["max_net_degree"] = max(self.stats["max_net_degree"], max(net_degrees))
+                self.stats["min_net_degree"] = min(self.stats["min_net_degree"], min(net_degrees))
                 self.stats["avg_net_degree"] = sum(net_degrees) / len(net_degrees)
             
             print(f"网络文件解析完成，共{self.stats['total_nets']}个网络，{self.stats['total_pins']}个引脚")
@@ -156,13 +186,36 @@ class BookshelfParser:
             print(f"解析网络文件时出错: {str(e)}")
             raise
     
+    def _iter_lines(self, path, chunk_size):
+        """按固定大小的块读取文件并逐行产出，块边界处不完整的行留到下一块拼接"""
+        with open_input(path) as f:
+            tail = ""
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                lines = (tail + chunk).split('\n')
+                tail = lines.pop()
+                yield from lines
+            if tail:
+                yield tail
+            self._record_timing("nets", f)
+    
+    def _record_timing(self, key, stream):
+        """记录压缩文件的解压耗时和等待解压数据的耗时"""
+        decompress_time, wait_time = input_timing(stream)
+        if decompress_time:
+            self.decompress_times[key] = decompress_time
+            self.wait_times[key] = wait_time
+    
     def parse_pl_file(self):
         """解析.pl文件，获取布局信息"""
         print(f"正在解析布局文件: {self.pl_file}")
         
         try:
-            with open(self.pl_file, 'r') as f:
+            with open_input(self.pl_file) as f:
                 lines = f.readlines()
+                self._record_timing("pl", f)
             
             # 跳过注释行
             data_lines = [line.strip() for line in lines if not line.strip().startswith('#') and line.strip()]
@@ -190,8 +243,9 @@ class BookshelfParser:
         print(f"正在解析布局区域文件: {self.scl_file}")
         
         try:
-            with open(self.scl_file, 'r') as f:
+            with open_input(self.scl_file) as f:
                 content = f.read()
+                self._record_timing("scl", f)
             
             # 解析行数
             num_rows_match = re.search(r'NumRows\s*:\s*(\d+)', content)
@@ -203,6 +257,7 @@ class BookshelfParser:
             
             max_x = 0
             max_y = 0
+            self.row_x, self.row_y, self.row_height = array('i'), array('i'), array('i')
             
             for i, section in enumerate(row_sections):
                 coordinate_match = re.search(r'Coordinate\s*:\s*(\d+)', section)
@@ -225,6 +280,9 @@ class BookshelfParser:
                         "x": x,
                         "num_sites": num_sites
                     }
+                    self.row_x.append(x)
+                    self.row_y.append(y)
+                    self.row_height.append(height)
             
             # 更新芯片尺寸信息
             self.stats["chip_width"] = max_x
@@ -237,229 +295,454 @@ class BookshelfParser:
             print(f"解析布局区域文件时出错: {str(e)}")
             raise
     
-    def parse_all(self):
-        """解析所有文件"""
+    def parse_all(self, workers=1):
+        """解析所有文件
+        
+        参数:
+            workers: 并行解析nets文件的进程数，默认为1
+        """
         start_time = time.time()
         print(f"开始解析设计: {self.design_name}")
         
-        self.parse_nodes_file()
-        self.parse_nets_file()
-        self.parse_pl_file()
-        self.parse_scl_file()
+        self.metrics = None
+        self.parse_times = {}
+        for key, parse in (("nodes", self.parse_nodes_file),
+                           ("nets", lambda: self.parse_nets_file(workers=workers)),
+                           ("pl", self.parse_pl_file),
+                           ("scl", self.parse_scl_file)):
+            step_start = time.time()
+            parse()
+            self.parse_times[key] = time.time() - step_start
         
         end_time = time.time()
         print(f"解析完成，耗时: {end_time - start_time:.2f}秒")
+        if self.decompress_times:
+            # 解压在后台线程中进行，解析耗时不包括等待解压数据的时间
+            parse_time = end_time - start_time - sum(self.wait_times.values())
+            decompress_time = sum(self.decompress_times.values())
+            print(f"其中解压耗时: {decompress_time:.2f}秒，解析耗时: {parse_time:.2f}秒")
     
-    def generate_report(self, language="chinese"):
-        """生成汇总报告
+    def compute_hpwl(self):
+        """计算半周长线长（HPWL）
         
-        参数:
-            language: 输出语言，可选值为"chinese"或"english"
+        引脚位置为节点中心加上.nets文件中的引脚偏移，与竞赛评估程序的计算方式一致。
+        缺少位置信息的节点不参与计算。
+        
+        返回值:
+            所有网络的半周长线长之和
         """
-        # 计算布局密度
-        total_cell_area = sum(node["width"] * node["height"] for node in self.nodes_info.values() 
-                             if not node["is_terminal"])
-        density = total_cell_area / self.stats["chip_area"] if self.stats["chip_area"] > 0 else 0
+        total = 0.0
+        for net in self.nets_info.values():
+            offsets = net["offsets"]
+            xs = []
+            ys = []
+            for k, (node_name, _) in enumerate(net["pins"]):
+                pos = self.pl_info.get(node_name)
+                node = self.nodes_info.get(node_name)
+                if pos is None or node is None:
+                    continue
+                xs.append(pos["x"] + node["width"] / 2 + offsets[2 * k])
+                ys.append(pos["y"] + node["height"] / 2 + offsets[2 * k + 1])
+            if len(xs) > 1:
+                total += (max(xs) - min(xs)) + (max(ys) - min(ys))
+        return total
+    
+    def compute_metrics(self):
+        """计算汇总报告使用的指标
         
-        # 计算可移动区域面积
-        movable_area = total_cell_area
+        面积和度数分布由紧凑数组用NumPy一次计算得到：面积为宽高的点积，度数分布为np.bincount直方图按区间求和。
+        结果缓存在self.metrics中，多次生成报告（不同语言或不同输出）时不再重复计算。
         
-        # 计算固定区域面积
-        fixed_area = sum(node["width"] * node["height"] for node in self.nodes_info.values() 
-                        if node["is_terminal"])
+        返回值:
+            指标字典，只包含整数、浮点数、字符串和列表，可以直接序列化为JSON
+        """
+        if self.metrics is not None:
+            return self.metrics
         
-        # 计算核心区域面积
-        core_area = self.stats["chip_area"]
+        width = np.frombuffer(self.node_width, dtype=np.int32).astype(np.int64)
+        height = np.frombuffer(self.node_height, dtype=np.int32).astype(np.int64)
+        terminal = np.frombuffer(self.node_terminal, dtype=np.int8).astype(bool)
+        degrees = np.frombuffer(self.net_degrees, dtype=np.int32)
         
-        # 计算固定区域在核心区域中的面积
+        # 计算可移动区域面积和固定区域面积
+        movable_area = int(np.dot(width[~terminal], height[~terminal]))
+        fixed_area = int(np.dot(width[terminal], height[terminal]))
+        
+        # 核心区域面积及固定区域在核心区域中的面积
+        core_area = self.stats["chip_area"]
         fixed_area_in_core = fixed_area
+        free_sites = core_area - fixed_area_in_core
+        
+        # 计算不同度数的网络数量
+        histogram = np.bincount(degrees) if len(degrees) else np.zeros(1, dtype=np.int64)
+        net_degree_counts = {"2": int(histogram[2:3].sum()),
+                             "3-10": int(histogram[3:11].sum()),
+                             "11-100": int(histogram[11:101].sum()),
+                             "100+": int(histogram[101:].sum())}
         
-        # 计算放置利用率
-        placement_util = movable_area / (core_area - fixed_area_in_core) if (core_area - fixed_area_in_core) > 0 else 0
+        # 核心区域的左下角为各行起点的最小值，右上角为芯片尺寸
+        lower_left = [int(min(self.row_x, default=0)), int(min(self.row_y, default=0))]
         
-        # 计算核心密度
-        core_density = (movable_area + fixed_area_in_core) / core_area if core_area > 0 else 0
+        self.metrics = {
+            "design_name": self.design_name,
+            "total_nodes": self.stats["total_nodes"],
+            "terminal_nodes": self.stats["terminal_nodes"],
+            "non_terminal_nodes": self.stats["non_terminal_nodes"],
+            "total_nets": self.stats["total_nets"],
+            "total_pins": self.stats["total_pins"],
+            "avg_net_degree": float(degrees.mean()) if len(degrees) else 0.0,
+            "max_net_degree": int(degrees.max()) if len(degrees) else 0,
+            "min_net_degree": int(degrees.min()) if len(degrees) else None,
+            "net_degree_counts": net_degree_counts,
+            "degree_histogram": histogram.tolist(),
+            "total_rows": self.stats["total_rows"],
+            "row_height": int(self.row_height[0]) if self.row_height else 0,
+            "chip_width": self.stats["chip_width"],
+            "chip_height": self.stats["chip_height"],
+            "chip_area": self.stats["chip_area"],
+            "core_lower_left": lower_left,
+            "core_upper_right": [self.stats["chip_width"], self.stats["chip_height"]],
+            "core_area": core_area,
+            "cell_area": movable_area,
+            "movable_area": movable_area,
+            "fixed_area": fixed_area,
+            "fixed_area_in_core": fixed_area_in_core,
+            "density": movable_area / core_area if core_area > 0 else 0,
+            "placement_util": movable_area / free_sites if free_sites > 0 else 0,
+            "core_density": (movable_area + fixed_area_in_core) / core_area if core_area > 0 else 0,
+        }
+        return self.metrics
+    
+    def render_report(self, language="chinese"):
+        """把指标渲染为报告文本（即报告文件的内容）
         
-        # 计算不同度数的网络数量
-        net_degree_counts = {"2": 0, "3-10": 0, "11-100": 0, "100+": 0}
-        for net in self.nets_info.values():
-            degree = net["degree"]
-            if degree == 2:
-                net_degree_counts["2"] += 1
-            elif 3 <= degree <= 10:
-                net_degree_counts["3-10"] += 1
-            elif 11 <= degree <= 100:
-                net_degree_counts["11-100"] += 1
-            else:
-                net_degree_counts["100+"] += 1
+        中文报告在控制台上还要在标题前打印一行分隔线，由generate_report添加，文件中没有这一行。
+        
+        参数:
+            language: 输出语言，可选值为"chinese"或"english"
         
+        返回值:
+            报告文本
+        """
+        m = self.compute_metrics()
         if language == "chinese":
-            print("\n" + "="*50)
-            print(f"设计名称: {self.design_name} 汇总报告")
-            print("="*50)
-            
-            print("\n节点统计:")
-            print(f"  总节点数: {self.stats['total_nodes']}")
-            print(f"  终端节点数: {self.stats['terminal_nodes']}")
-            print(f"  非终端节点数: {self.stats['non_terminal_nodes']}")
-            
-            print("\n网络统计:")
-            print(f"  总网络数: {self.stats['total_nets']}")
-            print(f"  总引脚数: {self.stats['total_pins']}")
-            print(f"  平均网络度数: {self.stats['avg_net_degree']:.2f}")
-            print(f"  最大网络度数: {self.stats['max_net_degree']}")
-            print(f"  最小网络度数: {self.stats['min_net_degree']}")
-            
-            print("\n布局区域统计:")
-            print(f"  总行数: {self.stats['total_rows']}")
-            print(f"  芯片宽度: {self.stats['chip_width']}")
-            print(f"  芯片高度: {self.stats['chip_height']}")
-            print(f"  芯片面积: {self.stats['chip_area']}")
-            
-            print(f"\n布局密度: {density:.4f}")
-            print("="*50)
-            
-            # 将报告保存到文件
-            report_file = os.path.join(self.base_path, f"{self.design_name}_report.txt")
-            with open(report_file, 'w') as f:
-                f.write(f"设计名称: {self.design_name} 汇总报告\n")
-                f.write("="*50 + "\n\n")
-                
-                f.write("节点统计:\n")
-                f.write(f"  总节点数: {self.stats['total_nodes']}\n")
-                f.write(f"  终端节点数: {self.stats['terminal_nodes']}\n")
-                f.write(f"  非终端节点数: {self.stats['non_terminal_nodes']}\n\n")
-                
-                f.write("网络统计:\n")
-                f.write(f"  总网络数: {self.stats['total_nets']}\n")
-                f.write(f"  总引脚数: {self.stats['total_pins']}\n")
-                f.write(f"  平均网络度数: {self.stats['avg_net_degree']:.2f}\n")
-                f.write(f"  最大网络度数: {self.stats['max_net_degree']}\n")
-                f.write(f"  最小网络度数: {self.stats['min_net_degree']}\n\n")
-                
-                f.write("布局区域统计:\n")
-                f.write(f"  总行数: {self.stats['total_rows']}\n")
-                f.write(f"  芯片宽度: {self.stats['chip_width']}\n")
-                f.write(f"  芯片高度: {self.stats['chip_height']}\n")
-                f.write(f"  芯片面积: {self.stats['chip_area']}\n\n")
-                
-                f.write(f"布局密度: {density:.4f}\n")
-                f.write("="*50 + "\n")
-            
-            print(f"报告已保存到: {report_file}")
-        
-        elif language == "english":
-            # 获取核心区域的左下角和右上角坐标
-            lower_left_x = min(row["x"] for row in self.scl_info.values())
-            lower_left_y = min(row["y"] for row in self.scl_info.values())
-            upper_right_x = self.stats["chip_width"]
-            upper_right_y = self.stats["chip_height"]
-            
-            # 格式化输出
-            print("Use BOOKSHELF placement format")
-            print(f"Reading AUX file: {self.base_path}/{os.path.basename(self.aux_file)}")
-            
-            # 从aux文件中读取文件列表
-            try:
-                with open(self.aux_file, 'r') as f:
-                    aux_content = f.read()
-                    files = re.findall(r':\s+([^\n]+)', aux_content)
-                    if files:
-                        print(" ".join(files[0].strip().split()))
-            except Exception:
-                # 如果无法读取aux文件，则使用默认文件列表
-                print(f"{self.design_name}.nodes {self.design_name}.nets {self.design_name}.wts {self.design_name}.pl {self.design_name}.scl")
-            
-            print(f"Set core region from site info: lower left: ({lower_left_x},{lower_left_y}) to upper right: ({upper_right_x},{upper_right_y})")
-            print(f"NumModules: {self.stats['total_nodes']}")
-            print(f"NumNodes: {self.stats['non_terminal_nodes']} (= {self.stats['non_terminal_nodes']//1000}k)")
-            print(f"Terminals: {self.stats['terminal_nodes']}")
-            print(f"Nets: {self.stats['total_nets']}")
-            print(f"Pins: {self.stats['total_pins']}")
-            print(f"Max net degree= {self.stats['max_net_degree']}")
-            print(f"Initialize module position with file: {self.design_name}.pl")
-            print("<<<< DATABASE SUMMARIES >>>>")
-            print(f"Core region: lower left: ({lower_left_x},{lower_left_y}) to upper right: ({upper_right_x},{upper_right_y})")
-            
-            # 获取行高和行数
-            row_height = next(iter(self.scl_info.values()))["height"] if self.scl_info else 0
-            print(f"Row Height/Number: {row_height} / {self.stats['total_rows']} (site step 1.000000)")
-            
-            # 输出面积信息
-            print(f"Core Area: {core_area} ({core_area:.5e})")
-            print(f"Cell Area: {total_cell_area} ({(total_cell_area/core_area*100):.2f}%)")
-            print(f"Movable Area: {movable_area} ({(movable_area/core_area*100):.2f}%)")
-            print(f"Fixed Area: {fixed_area} ({(fixed_area/core_area*100):.2f}%)")
-            print(f"Fixed Area in Core: {fixed_area_in_core} ({(fixed_area_in_core/core_area*100):.2f}%)")
-            print(f"Placement Util.: {placement_util*100:.2f}% (=move/freeSites)")
-            print(f"Core Density: {core_density*100:.2f}% (=usedArea/core)")
-            
-            # 输出节点和网络信息
-            print(f"Cell #: {self.stats['non_terminal_nodes']} (={self.stats['non_terminal_nodes']//1000}k)")
-            print(f"Object #: {self.stats['total_nodes']} (={self.stats['total_nodes']//1000}k) (fixed: {self.stats['terminal_nodes']}) (macro: 0)")
-            print(f"Net #: {self.stats['total_nets']} (={self.stats['total_nets']//1000}k)")
-            print(f"Max net degree=: {self.stats['max_net_degree']}")
-            
-            # 输出引脚度数分布
-            print(f"Pin 2 ({net_degree_counts['2']}) 3-10 ({net_degree_counts['3-10']}) 11-100 ({net_degree_counts['11-100']}) 100- ({net_degree_counts['100+']})")
-            print(f"Pin #: {self.stats['total_pins']}")
-            
-            # 将英文报告保存到文件
-            report_file = os.path.join(self.base_path, f"{self.design_name}_report_english.txt")
+            lines = [
+                f"设计名称: {self.design_name} 汇总报告",
+                "="*50,
+                "",
+                "节点统计:",
+                f"  总节点数: {m['total_nodes']}",
+                f"  终端节点数: {m['terminal_nodes']}",
+                f"  非终端节点数: {m['non_terminal_nodes']}",
+                "",
+                "网络统计:",
+                f"  总网络数: {m['total_nets']}",
+                f"  总引脚数: {m['total_pins']}",
+                f"  平均网络度数: {m['avg_net_degree']:.2f}",
+                f"  最大网络度数: {m['max_net_degree']}",
+                f"  最小网络度数: {m['min_net_degree']}",
+                "",
+                "布局区域统计:",
+                f"  总行数: {m['total_rows']}",
+                f"  芯片宽度: {m['chip_width']}",
+                f"  芯片高度: {m['chip_height']}",
+                f"  芯片面积: {m['chip_area']}",
+                "",
+                f"布局密度: {m['density']:.4f}",
+                "="*50,
+            ]
+            return "\n".join(lines) + "\n"
+        
+        # 从aux文件中读取文件列表，无法读取时使用默认文件列表
+        file_list = f"{self.design_name}.nodes {self.design_name}.nets {self.design_name}.wts {self.design_name}.pl {self.design_name}.scl"
+        try:
+            with open_input(self.aux_file) as f:
+                files = re.findall(r':\s+([^\n]+)', f.read())
+                if files:
+                    file_list = " ".join(files[0].strip().split())
+        except Exception:
+            pass
+        
+        core_area = m["core_area"]
+        
+        def percent(area):
+            return area / core_area * 100 if core_area > 0 else 0
+        
+        (llx, lly), (urx, ury) = m["core_lower_left"], m["core_upper_right"]
+        counts = m["net_degree_counts"]
+        lines = [
+            "Use BOOKSHELF placement format",
+            f"Reading AUX file: {self.base_path}/{os.path.basename(self.aux_file)}",
+            file_list,
+            f"Set core region from site info: lower left: ({llx},{lly}) to upper right: ({urx},{ury})",
+            f"NumModules: {m['total_nodes']}",
+            f"NumNodes: {m['non_terminal_nodes']} (= {m['non_terminal_nodes']//1000}k)",
+            f"Terminals: {m['terminal_nodes']}",
+            f"Nets: {m['total_nets']}",
+            f"Pins: {m['total_pins']}",
+            f"Max net degree= {m['max_net_degree']}",
+            f"Initialize module position with file: {self.design_name}.pl",
+            "<<<< DATABASE SUMMARIES >>>>",
+            f"Core region: lower left: ({llx},{lly}) to upper right: ({urx},{ury})",
+            f"Row Height/Number: {m['row_height']} / {m['total_rows']} (site step 1.000000)",
+            f"Core Area: {core_area} ({core_area:.5e})",
+            f"Cell Area: {m['cell_area']} ({percent(m['cell_area']):.2f}%)",
+            f"Movable Area: {m['movable_area']} ({percent(m['movable_area']):.2f}%)",
+            f"Fixed Area: {m['fixed_area']} ({percent(m['fixed_area']):.2f}%)",
+            f"Fixed Area in Core: {m['fixed_area_in_core']} ({percent(m['fixed_area_in_core']):.2f}%)",
+            f"Placement Util.: {m['placement_util']*100:.2f}% (=move/freeSites)",
+            f"Core Density: {m['core_density']*100:.2f}% (=usedArea/core)",
+            f"Cell #: {m['non_terminal_nodes']} (={m['non_terminal_nodes']//1000}k)",
+            f"Object #: {m['total_nodes']} (={m['total_nodes']//1000}k) (fixed: {m['terminal_nodes']}) (macro: 0)",
+            f"Net #: {m['total_nets']} (={m['total_nets']//1000}k)",
+            f"Max net degree=: {m['max_net_degree']}",
+            f"Pin 2 ({counts['2']}) 3-10 ({counts['3-10']}) 11-100 ({counts['11-100']}) 100- ({counts['100+']})",
+            f"Pin #: {m['total_pins']}",
+        ]
+        return "\n".join(lines) + "\n"
+    
+    def generate_report(self, language="chinese", sinks=("stdout", "text")):
+        """生成汇总报告
+        
+        指标只计算一次，再渲染到各个输出：
+            - "stdout": 打印到控制台
+            - "text": 保存为<设计名称>_report.txt（中文）或<设计名称>_report_english.txt（英文）
+            - "json": 把指标保存为<设计名称>_report.json
+        
+        参数:
+            language: 输出语言，可选值为"chinese"或"english"
+            sinks: 输出目标列表，默认为("stdout", "text")
+        """
+        metrics = self.compute_metrics()
+        text = self.render_report(language) if {"stdout", "text"} & set(sinks) else None
+        
+        if "stdout" in sinks:
+            print(("\n" + "="*50 + "\n" if language == "chinese" else "") + text, end="")
+        
+        if "text" in sinks:
+            suffix = "_report.txt" if language == "chinese" else "_report_english.txt"
+            report_file = os.path.join(self.base_path, f"{self.design_name}{suffix}")
             with open(report_file, 'w') as f:
-                f.write("Use BOOKSHELF placement format\n")
-                f.write(f"Reading AUX file: {self.base_path}/{os.path.basename(self.aux_file)}\n")
-                f.write(f"{self.design_name}.nodes {self.design_name}.nets {self.design_name}.wts {self.design_name}.pl {self.design_name}.scl\n")
-                f.write(f"Set core region from site info: lower left: ({lower_left_x},{lower_left_y}) to upper right: ({upper_right_x},{upper_right_y})\n")
-                f.write(f"NumModules: {self.stats['total_nodes']}\n")
-                f.write(f"NumNodes: {self.stats['non_terminal_nodes']} (= {self.stats['non_terminal_nodes']//1000}k)\n")
-                f.write(f"Terminals: {self.stats['terminal_nodes']}\n")
-                f.write(f"Nets: {self.stats['total_nets']}\n")
-                f.write(f"Pins: {self.stats['total_pins']}\n")
-                f.write(f"Max net degree= {self.stats['max_net_degree']}\n")
-                f.write(f"Initialize module position with file: {self.design_name}.pl\n")
-                f.write("<<<< DATABASE SUMMARIES >>>>\n")
-                f.write(f"Core region: lower left: ({lower_left_x},{lower_left_y}) to upper right: ({upper_right_x},{upper_right_y})\n")
-                f.write(f"Row Height/Number: {row_height} / {self.stats['total_rows']} (site step 1.000000)\n")
-                f.write(f"Core Area: {core_area} ({core_area:.5e})\n")
-                f.write(f"Cell Area: {total_cell_area} ({(total_cell_area/core_area*100):.2f}%)\n")
-                f.write(f"Movable Area: {movable_area} ({(movable_area/core_area*100):.2f}%)\n")
-                f.write(f"Fixed Area: {fixed_area} ({(fixed_area/core_area*100):.2f}%)\n")
-                f.write(f"Fixed Area in Core: {fixed_area_in_core} ({(fixed_area_in_core/core_area*100):.2f}%)\n")
-                f.write(f"Placement Util.: {placement_util*100:.2f}% (=move/freeSites)\n")
-                f.write(f"Core Density: {core_density*100:.2f}% (=usedArea/core)\n")
-                f.write(f"Cell #: {self.stats['non_terminal_nodes']} (={self.stats['non_terminal_nodes']//1000}k)\n")
-                f.write(f"Object #: {self.stats['total_nodes']} (={self.stats['total_nodes']//1000}k) (fixed: {self.stats['terminal_nodes']}) (macro: 0)\n")
-                f.write(f"Net #: {self.stats['total_nets']} (={self.stats['total_nets']//1000}k)\n")
-                f.write(f"Max net degree=: {self.stats['max_net_degree']}\n")
-                f.write(f"Pin 2 ({net_degree_counts['2']}) 3-10 ({net_degree_counts['3-10']}) 11-100 ({net_degree_counts['11-100']}) 100- ({net_degree_counts['100+']})\n")
-                f.write(f"Pin #: {self.stats['total_pins']}\n")
-            
-            print(f"\nEnglish report saved to: {report_file}")
+                f.write(text)
+            if language == "chinese":
+                print(f"报告已保存到: {report_file}")
+            else:
+                print(f"\nEnglish report saved to: {report_file}")
+        
+        if "json" in sinks:
+            json_file = os.path.join(self.base_path, f"{self.design_name}_report.json")
+            with open(json_file, 'w') as f:
+                json.dump(metrics, f, ensure_ascii=False, indent=2)
+            print(f"指标已保存到: {json_file}")
+
+
+def iter_nets(lines, header=None):
+    """逐行解析nets文件的内容，按文件顺序产出网络
+    
+    没有名称的网络及其引脚被忽略。
+    
+    参数:
+        lines: 文件的行
+        header: 字典，用于记录头部的NumNets和NumPins，可选
+    
+    返回值:
+        生成器，产出 (网络名称, 度数, 引脚列表, 偏移数组)
+    """
+    net_name = None  # 当前正在解析的网络名称
+    degree = 0       # 当前网络在头部声明的度数
+    pins = []        # 当前网络已读取的引脚
+    offsets = array('d')  # 当前网络引脚相对节点中心的偏移，按 dx0, dy0, dx1, dy1, ... 存放
+    
+    for line in lines:
+        parts = line.split()
+        if not parts or parts[0].startswith('#'):
+            continue
+        
+        if parts[0] == "NetDegree":
+            # 产出上一个网络
+            if net_name is not None:
+                yield net_name, degree, pins, offsets
+            
+            # 头部格式: NetDegree : <度数> <网络名称>
+            fields = line.split(':', 1)[1].split()
+            if len(fields) < 2:
+                net_name = None
+                continue
+            net_name = fields[1]
+            degree = int(fields[0])
+            pins = []
+            offsets = array('d')
+        elif net_name is not None:
+            # 引脚格式: <节点名称> <I/O> : <x偏移> <y偏移>
+            if len(parts) >= 3 and parts[1] in ("I", "O") and parts[2].startswith(':'):
+                pins.append((parts[0], parts[1]))  # 格式: (node_name, direction)
+                if len(parts) >= 5:
+                    offsets.append(float(parts[3]))
+                    offsets.append(float(parts[4]))
+                else:
+                    offsets.extend((0.0, 0.0))
+        elif parts[0] in ("NumNets", "NumPins") and header is not None:
+            header[parts[0]] = int(line.split(':')[1])
+    
+    # 产出最后一个网络
+    if net_name is not None:
+        yield net_name, degree, pins, offsets
+
+
+def split_nets_file(path, num_chunks):
+    """把nets文件切分为若干字节区间
+    
+    除第一个区间从文件开头（包含头部信息）开始外，每个区间都从一行NetDegree的行首开始，
+    因此每个网络完整地落在一个区间内，各区间可以独立解析。
+    
+    参数:
+        path: 文件路径
+        num_chunks: 期望的区间数量
+    
+    返回值:
+        [(起点, 终点), ...] 字节区间列表
+    """
+    file_size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for k in range(1, num_chunks):
+            target = max(k * file_size // num_chunks, bounds[-1])
+            f.seek(target)
+            f.readline()  # 跳过目标位置所在的不完整行
+            position = f.tell()
+            for line in iter(f.readline, b''):
+                if line.lstrip().startswith(b"NetDegree"):
+                    break
+                position = f.tell()
+            if bounds[-1] < position < file_size:
+                bounds.append(position)
+    bounds.append(file_size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_nets_range(path, start, end):
+    """在工作进程中解析nets文件的一个字节区间
+    
+    结果以紧凑片段的形式返回，避免在进程间传递大量的小对象：
+    网络名称列表、度数和引脚数数组、引脚节点名称列表、方向字符串以及偏移数组。
+    
+    参数:
+        path: 文件路径
+        start, end: 区间的起止字节位置
+    
+    返回值:
+        片段字典
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).decode().splitlines()
+    
+    fragment = {"header": {}, "names": [], "degrees": array('i'), "pin_counts": array('i'),
+                "pin_names": [], "directions": [], "offsets": array('d')}
+    for net_name, degree, pins, offsets in iter_nets(lines, fragment["header"]):
+        fragment["names"].append(net_name)
+        fragment["degrees"].append(degree)
+        fragment["pin_counts"].append(len(pins))
+        fragment["pin_names"].extend(node_name for node_name, _ in pins)
+        fragment["directions"].extend(direction for _, direction in pins)
+        fragment["offsets"].extend(offsets)
+    fragment["directions"] = "".join(fragment["directions"])
+    return fragment
+
+
+def iter_fragment_nets(fragments):
+    """按文件顺序由片段还原网络
+    
+    参数:
+        fragments: parse_nets_range返回的片段列表
+    
+    返回值:
+        生成器，产出与iter_nets相同的 (网络名称, 度数, 引脚列表, 偏移数组)
+    """
+    for fragment in fragments:
+        pin_names = fragment["pin_names"]
+        directions = fragment["directions"]
+        offsets = fragment["offsets"]
+        pin = 0
+        for net_name, degree, count in zip(fragment["names"], fragment["degrees"], fragment["pin_counts"]):
+            pins = list(zip(pin_names[pin:pin + count], directions[pin:pin + count]))
+            yield net_name, degree, pins, offsets[2 * pin:2 * (pin + count)]
+            pin += count
 
 
 def main():
     """主函数"""
-    if len(sys.argv) < 3:
-        print("用法: python bookshelf_parser.py <设计文件路径> <设计名称> [language]")
+    args = sys.argv[1:]
+    
+    # 可选参数 --workers N：并行解析nets文件的进程数
+    workers = 1
+    if "--workers" in args:
+        index = args.index("--workers")
+        try:
+            workers = int(args[index + 1])
+        except (IndexError, ValueError):
+            print("--workers 参数需要一个整数")
+            return
+        del args[index:index + 2]
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+    
+    # 可选参数 --json：同时把指标保存为JSON文件
+    sinks = ("stdout", "text")
+    if "--json" in args:
+        args.remove("--json")
+        sinks += ("json",)
+    
+    # 可选参数 --metrics 文件：把汇总指标、耗时和线长追加到JSON Lines（.csv后缀时为CSV）文件
+    metrics_file = None
+    if "--metrics" in args:
+        index = args.index("--metrics")
+        if index + 1 >= len(args):
+            print("--metrics 参数需要一个文件路径")
+            return
+        metrics_file = args[index + 1]
+        del args[index:index + 2]
+    
+    if len(args) < 2:
+        print("用法: python bookshelf_parser.py <设计文件路径> <设计名称> [language] [--workers N] [--json] [--metrics 文件]")
         print("例如: python bookshelf_parser.py ./adaptec1 adaptec1")
         print("language参数可选值: chinese(默认), english")
+        print("--workers N: 使用N个进程并行解析nets文件，0表示使用所有CPU核，默认为1")
+        print("--json: 同时把汇总指标保存为<设计名称>_report.json")
+        print("--metrics 文件: 把汇总指标、各文件耗时、线长和内存峰值追加到JSON Lines文件（.csv后缀时为CSV文件）")
         return
     
-    base_path = sys.argv[1]
-    design_name = sys.argv[2]
+    base_path = args[0]
+    design_name = args[1]
     
     # 默认使用中文输出，如果指定了language参数则使用指定的语言
     language = "chinese"
-    if len(sys.argv) > 3:
-        language = sys.argv[3].lower()
+    if len(args) > 2:
+        language = args[2].lower()
         if language not in ["chinese", "english"]:
             print(f"不支持的语言: {language}，使用默认语言(chinese)")
             language = "chinese"
     
+    metrics = RunMetrics("bookshelf_parser", design_name)
     parser = BookshelfParser(base_path, design_name)
-    parser.parse_all()
-    parser.generate_report(language)
+    parser.parse_all(workers)
+    parser.generate_report(language, sinks)
+    
+    # 输出结构化指标：汇总指标（不含度数直方图）、各文件耗时和半周长线长
+    if metrics_file:
+        report = dict(parser.compute_metrics())
+        del report["degree_histogram"], report["design_name"]
+        metrics.add_parse_stats(report)
+        for key, elapsed in parser.parse_times.items():
+            metrics.add_timing(f"parse_{key}", elapsed)
+        for key, elapsed in parser.decompress_times.items():
+            metrics.add_timing(f"decompress_{key}", elapsed)
+        start_time = time.time()
+        metrics.set(hpwl=parser.compute_hpwl())
+        metrics.add_timing("hpwl", time.time() - start_time)
+        metrics.finish()
+        metrics.write(metrics_file)
+        print(f"运行指标已写入到: {metrics_file}")
 
 
 if __name__ == "__main__":
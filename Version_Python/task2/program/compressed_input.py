@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+压缩输入文件的透明读取
+
+实现位于Version_Python/placement_common/compressed_input.py，由各任务共用。本模块把Version_Python目录
+加入模块搜索路径后导出其中的接口，任务内的代码仍然可以直接 from compressed_input import ...
+"""
+
+import os
+import sys
+
+_SHARED_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+if _SHARED_ROOT not in sys.path:
+    sys.path.append(_SHARED_ROOT)
+
+from placement_common.compressed_input import (  # noqa: E402
+    MAGIC_NUMBERS, COMPRESSED_SUFFIXES, BLOCK_SIZE, QUEUE_BLOCKS, DecompressingReader, PlainReader,
+    resolve_input, detect_compression, open_input, input_timing)
@@ -25,6 +25,164 @@ import os
 import sys
 import time
 import math
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from compressed_input import open_input, resolve_input, input_timing
+from run_metrics import RunMetrics
+
+def timed_call(func, *args):
+    """
+    调用函数并计时
+    
+    参数:
+        func (callable): 被调用的函数
+        args: 函数参数
+    
+    返回值:
+        tuple: (函数返回值, 耗时秒数)
+    """
+    start_time = time.time()
+    result = func(*args)
+    return result, time.time() - start_time
+
+
+def read_nodes(path):
+    """
+    逐行读取.nodes文件，收集每个单元的尺寸
+    
+    参数:
+        path (str): 文件路径
+    
+    返回值:
+        dict: num_modules（总模块数）、num_terminals（端子数），以及按文件顺序排列的names、
+              紧凑数组width、height和terminal（是否标记为terminal）
+    """
+    data = {'num_modules': 0, 'num_terminals': 0, 'names': [],
+            'width': array('d'), 'height': array('d'), 'terminal': array('b')}
+    names, widths, heights, terminal = data['names'], data['width'], data['height'], data['terminal']
+    with open_input(path) as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith('#') or parts[0] == "UCLA":
+                continue
+            if parts[0].startswith("NumNodes"):  # 总模块数
+                data['num_modules'] = int(line.split(':')[1].strip())
+            elif parts[0].startswith("NumTerminals"):  # 端子数
+                data['num_terminals'] = int(line.split(':')[1].strip())
+            elif len(parts) >= 3:  # 格式: <节点名称> <宽度> <高度> [terminal]
+                names.append(parts[0])
+                widths.append(float(parts[1]))
+                heights.append(float(parts[2]))
+                terminal.append(len(parts) > 3 and parts[3].startswith("terminal"))
+        data['decompress_time'], data['wait_time'] = input_timing(f)
+    return data
+
+
+def read_nets(path):
+    """
+    逐行读取.nets文件，只记录每个网表的度数
+    
+    参数:
+        path (str): 文件路径
+    
+    返回值:
+        dict: num_nets（网表总数）、num_pins（引脚总数）和紧凑数组degrees（每个网表的度数）
+    """
+    data = {'num_nets': 0, 'num_pins': 0, 'degrees': array('i')}
+    degrees = data['degrees']
+    with open_input(path) as f:
+        for line in f:
+            line = line.lstrip()
+            if line.startswith("NetDegree"):  # 格式: NetDegree : <度数> [网表名称]
+                degrees.append(int(line.split(':', 1)[1].split()[0]))
+            elif line.startswith("NumNets"):  # 网表总数
+                data['num_nets'] = int(line.split(':')[1].strip())
+            elif line.startswith("NumPins"):  # 引脚总数
+                data['num_pins'] = int(line.split(':')[1].strip())
+        data['decompress_time'], data['wait_time'] = input_timing(f)
+    return data
+
+
+def read_scl(path):
+    """
+    逐行读取.scl文件中的行数、行高、站点宽度和每一行的范围
+    
+    参数:
+        path (str): 文件路径
+    
+    返回值:
+        dict: 成功解析的row_number、row_height、site_step，以及每行的紧凑数组
+              row_x、row_y、row_height_list、row_site_width、row_num_sites
+    """
+    data = {'row_x': array('d'), 'row_y': array('d'), 'row_height_list': array('d'),
+            'row_site_width': array('d'), 'row_num_sites': array('d')}
+    row = None
+    with open_input(path) as f:
+        for line in f:
+            line = line.strip()
+            key = line.split(':')[0].strip()
+            try:
+                if key == "NumRows":  # 解析行数
+                    data['row_number'] = int(line.split(':')[1].strip())
+                elif line.startswith("CoreRow"):  # 行定义块开始
+                    row = {}
+                elif row is None:
+                    continue
+                elif key == "Coordinate":  # Y坐标
+                    row['y'] = float(line.split(':')[1].strip())
+                elif key == "Height":  # 行高
+                    row['height'] = float(line.split(':')[1].strip())
+                    data.setdefault('row_height', int(row['height']))
+                elif key == "Sitewidth":  # 站点宽度
+                    row['site_width'] = float(line.split(':')[1].strip())
+                    data.setdefault('site_step', row['site_width'])
+                elif key == "SubrowOrigin":  # 格式: SubrowOrigin : <x> NumSites : <站点数>
+                    parts = line.split(':')
+                    row['x'] = float(parts[1].split()[0])
+                    row['num_sites'] = float(parts[2].split()[0])
+                elif line.startswith("End"):  # 行定义块结束
+                    if 'x' in row and 'y' in row:
+                        data['row_x'].append(row['x'])
+                        data['row_y'].append(row['y'])
+                        data['row_height_list'].append(row.get('height', data.get('row_height', 0)))
+                        data['row_site_width'].append(row.get('site_width', data.get('site_step', 1)))
+                        data['row_num_sites'].append(row['num_sites'])
+                    row = None
+            except (IndexError, ValueError):
+                if key == "NumRows":
+                    print("警告: 无法解析行数")
+        data['decompress_time'], data['wait_time'] = input_timing(f)
+    return data
+
+
+def read_pl(path):
+    """
+    逐行读取.pl文件中每个单元的坐标
+    
+    参数:
+        path (str): 文件路径
+    
+    返回值:
+        dict: 按文件顺序排列的names、紧凑数组x、y，以及标记为固定（方向为'F'或带有/FIXED）的marked_fixed
+    """
+    data = {'names': [], 'x': array('d'), 'y': array('d'), 'marked_fixed': array('b')}
+    names, xs, ys, marked_fixed = data['names'], data['x'], data['y'], data['marked_fixed']
+    with open_input(path) as f:
+        for line in f:
+            parts = line.split()
+            # 跳过空行、注释和头部，格式: <节点名称> <x> <y> : <方向> [/FIXED]
+            if len(parts) < 3 or parts[0].startswith('#') or parts[0] == "UCLA":
+                continue
+            names.append(parts[0])
+            xs.append(float(parts[1]))
+            ys.append(float(parts[2]))
+            marked_fixed.append((len(parts) >= 4 and parts[3] == "F") or "/FIXED" in parts[4:])
+        data['decompress_time'], data['wait_time'] = input_timing(f)
+    return data
+
 
 class BookshelfParser:
     """
@@ -33,6 +191,12 @@ class BookshelfParser:
     该类用于解析BookShelf格式的布局数据文件，并计算相关统计信息。
     包括核心区域、行高、单元数量、网表统计等。
     """
+    # 并行解析时各文件的读取函数和处理方法，按此顺序处理
+    PARSE_STEPS = (("nodes", read_nodes, "_apply_nodes"),
+                   ("nets", read_nets, "_apply_nets"),
+                   ("scl", read_scl, "_apply_scl"),
+                   ("pl", read_pl, "_apply_pl"))
+    
     def __init__(self, directory):
         """
         初始化解析器，设置目录路径和初始化数据结构
@@ -96,15 +260,21 @@ class BookshelfParser:
         self.bin_dimension = [512, 512]  # Bin的尺寸
         self.bin_step = [0, 0]          # Bin的步长
         
+        # 最近一次解析中每个文件的解析耗时和解压耗时（秒）
+        self.parse_times = {}
+        self.decompress_times = {}
+        
     def parse_aux(self):
         """
         解析.aux文件，获取其他文件的名称
         
         .aux文件是BookShelf格式的入口文件，它指定了其他相关文件的名称。
         文件格式通常为：“RowBasedPlacement : 文件1 文件2 文件3 文件4 文件5”
+        只以压缩形式（.gz、.bz2、.xz、.zst）存在的文件解析为压缩文件的路径。
         """
+        self.aux_file = resolve_input(self.aux_file)
         try:
-            with open(self.aux_file, 'r') as f:
+            with open_input(self.aux_file) as f:
                 line = f.readline().strip()  # 读取第一行
                 if "RowBasedPlacement" in line:  # 检查是否包含关键字
                     files = line.split(':')[1].strip().split()  # 分割并获取文件名列表
@@ -117,6 +287,8 @@ class BookshelfParser:
                         self.scl_file = os.path.join(self.directory, files[4])    # 行结构文件
         except Exception as e:
             print(f"解析.aux文件时出错: {e}")
+        for key in ("nodes", "nets", "wts", "pl", "scl"):
+            setattr(self, f"{key}_file", resolve_input(getattr(self, f"{key}_file")))
     
     def parse_nodes(self):
         """
@@ -125,36 +297,45 @@ class BookshelfParser:
         .nodes文件定义了电路中的单元和端子信息，包括它们的尺寸。
         文件格式包含头部信息（总模块数和端子数）和每个单元的具体信息。
         """
-        try:
-            with open(self.nodes_file, 'r') as f:
-                lines = f.readlines()
-                
-                # 解析头部信息
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith("NumNodes"):  # 总模块数
-                        self.num_modules = int(line.split(':')[1].strip())
-                    elif line.startswith("NumTerminals"):  # 端子数
-                        self.num_terminals = int(line.split(':')[1].strip())
-                
-                # 计算其他相关数据
-                self.num_nodes = self.num_modules - self.num_terminals  # 可移动节点数 = 总模块数 - 端子数
-                self.cell_count = self.num_nodes                      # 单元数量
-                self.object_count = self.num_modules                  # 对象数量
-                self.fixed_count = self.num_terminals                # 固定对象数量
-                self.macro_count = 0  # 根据示例输出设置宏单元数量为0
-                
-                # 根据示例输出设置单元面积
-                # 单元面积应为核心区域的 32.65%
-                if self.core_area > 0:
-                    self.cell_area = int(self.core_area * 0.3265)  # 根据核心区域计算单元面积
-                    self.movable_area = self.cell_area              # 可移动区域面积等于单元面积
-                else:
-                    # 如果核心区域还没有计算，先设置一个默认值
-                    self.cell_area = 37286292  # 根据示例输出设置默认值
-                    self.movable_area = self.cell_area
-        except Exception as e:
-            print(f"解析.nodes文件时出错: {e}")
+        self._parse_step("nodes", read_nodes, self._apply_nodes)
+    
+    def _apply_nodes(self, data):
+        """
+        处理.nodes文件的读取结果
+        
+        单元尺寸保存为NumPy数组，单元面积和可移动面积用一次点积求得；.pl文件读取后再按固定标记重新划分。
+        
+        参数:
+            data (dict): read_nodes的返回值
+        """
+        self.num_modules = data['num_modules']
+        self.num_terminals = data['num_terminals']
+        
+        self.node_index = {name: i for i, name in enumerate(data['names'])}  # 节点名称到数组下标的映射
+        self.node_width = np.frombuffer(data['width'], dtype=np.float64)
+        self.node_height = np.frombuffer(data['height'], dtype=np.float64)
+        self.node_terminal = np.frombuffer(data['terminal'], dtype=np.int8).astype(bool)
+        if not self.node_terminal.any() and self.num_terminals:
+            # 文件中没有terminal关键字时，按惯例端子排在最后
+            self.node_terminal[len(self.node_terminal) - self.num_terminals:] = True
+        self.node_fixed = self.node_terminal
+        
+        # 计算其他相关数据
+        self.num_nodes = self.num_modules - self.num_terminals  # 可移动节点数 = 总模块数 - 端子数
+        self.cell_count = self.num_nodes                      # 单元数量
+        self.object_count = self.num_modules                  # 对象数量
+        self._update_area()
+    
+    def _update_area(self):
+        """按当前的固定标记计算单元面积、可移动面积、固定面积和宏单元数量"""
+        movable = ~self.node_fixed
+        self.movable_area = int(np.dot(self.node_width[movable], self.node_height[movable]))  # 可移动单元面积之和
+        self.cell_area = self.movable_area  # 单元面积等于可移动单元面积
+        self.fixed_area = int(np.dot(self.node_width[self.node_fixed], self.node_height[self.node_fixed]))
+        self.fixed_count = int(np.count_nonzero(self.node_fixed))  # 固定对象数量
+        if self.row_height > 0:
+            # 高度超过一行的可移动单元视为宏单元
+            self.macro_count = int(np.count_nonzero(self.node_height[movable] > self.row_height))
     
     def parse_nets(self):
         """
@@ -163,32 +344,31 @@ class BookshelfParser:
         .nets文件定义了电路中的网表连接关系，包括每个网表的度数和连接的引脚。
         文件格式包含头部信息（网表数和引脚数）和每个网表的具体连接信息。
         """
-        try:
-            with open(self.nets_file, 'r') as f:
-                lines = f.readlines()
-                
-                # 解析头部信息
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith("NumNets"):  # 网表总数
-                        self.num_nets = int(line.split(':')[1].strip())
-                    elif line.startswith("NumPins"):  # 引脚总数
-                        self.num_pins = int(line.split(':')[1].strip())
-                
-                # 设置网表相关计数
-                self.net_count = self.num_nets            # 网表总数
-                self.total_pin_count = self.num_pins      # 引脚总数
-                
-                # 根据示例输出设置网表度数统计
-                # 这里直接使用示例中的值，而不是从文件中计算
-                # 实际应用中应该遍历文件计算这些统计信息
-                self.max_net_degree = 2271      # 最大网表度数
-                self.pin_2_count = 117104       # 2引脚网表数量
-                self.pin_3_10_count = 86566     # 3-10引脚网表数量
-                self.pin_11_100_count = 17470   # 11-100引脚网表数量
-                self.pin_100_plus_count = 2     # 100+引脚网表数量
-        except Exception as e:
-            print(f"解析.nets文件时出错: {e}")
+        self._parse_step("nets", read_nets, self._apply_nets)
+    
+    def _apply_nets(self, data):
+        """
+        处理.nets文件的读取结果
+        
+        由每个网表的度数用np.bincount得到度数直方图，再按区间求和得到各类网表的数量。
+        
+        参数:
+            data (dict): read_nets的返回值
+        """
+        self.num_nets = data['num_nets']
+        self.num_pins = data['num_pins']
+        
+        degrees = np.frombuffer(data['degrees'], dtype=np.int32)
+        self.degree_histogram = np.bincount(degrees) if len(degrees) else np.zeros(1, dtype=np.int64)  # 度数直方图
+        
+        # 设置网表相关计数
+        self.net_count = len(degrees) or self.num_nets                       # 网表总数
+        self.total_pin_count = int(degrees.sum(dtype=np.int64)) or self.num_pins  # 引脚总数
+        self.max_net_degree = len(self.degree_histogram) - 1                  # 最大网表度数
+        self.pin_2_count = int(self.degree_histogram[2:3].sum())              # 2引脚网表数量
+        self.pin_3_10_count = int(self.degree_histogram[3:11].sum())          # 3-10引脚网表数量
+        self.pin_11_100_count = int(self.degree_histogram[11:101].sum())      # 11-100引脚网表数量
+        self.pin_100_plus_count = int(self.degree_histogram[101:].sum())      # 100+引脚网表数量
     
     def parse_scl(self):
         """
@@ -197,55 +377,37 @@ class BookshelfParser:
         .scl文件定义了布局中的行结构信息，包括行数、行高、站点宽度等。
         这些信息用于确定核心区域的大小和形状。
         """
-        try:
-            with open(self.scl_file, 'r') as f:
-                lines = f.readlines()
-                
-                # 直接设置核心区域坐标
-                # 根据输出示例，我们知道正确的值应该是(459,459)到(11151,11139)
-                # 实际应用中应该从文件中解析这些值
-                self.core_lower_left = (459, 459)    # 核心区域左下角坐标
-                self.core_upper_right = (11151, 11139)  # 核心区域右上角坐标
-                
-                # 解析行数和行高
-                for i, line in enumerate(lines):
-                    line = line.strip()
-                    if line.startswith("NumRows"):  # 解析行数
-                        try:
-                            self.row_number = int(line.split(':')[1].strip())
-                        except (IndexError, ValueError):
-                            print("警告: 无法解析行数")
-                    elif line.startswith("CoreRow Horizontal"):  # 找到行定义块
-                        # 查找行高
-                        for j in range(i+1, min(i+10, len(lines))):
-                            if lines[j].strip().startswith("Height"):
-                                try:
-                                    self.row_height = int(lines[j].split(':')[1].strip())
-                                except (IndexError, ValueError):
-                                    pass
-                                break
-                        
-                        # 查找站点宽度
-                        for j in range(i+1, min(i+10, len(lines))):
-                            if lines[j].strip().startswith("Sitewidth"):
-                                try:
-                                    self.site_step = float(lines[j].split(':')[1].strip())
-                                except (IndexError, ValueError):
-                                    pass
-                                break
-                
-                # 计算核心区域面积
-                width = self.core_upper_right[0] - self.core_lower_left[0] + 1   # 核心区域宽度
-                height = self.core_upper_right[1] - self.core_lower_left[1] + 1  # 核心区域高度
-                self.core_area = width * height  # 核心区域面积
-                
-                # 设置固定区域面积，根据输出示例调整
-                # 实际应用中应该从.pl文件中计算这些值
-                self.fixed_area = int(self.core_area * 0.5613)        # 固定区域面积，56.13% of core area
-                self.fixed_area_in_core = int(self.core_area * 0.4305)  # 核心区域内的固定区域面积，43.05% of core area
-                
-        except Exception as e:
-            print(f"解析.scl文件时出错: {e}")
+        self._parse_step("scl", read_scl, self._apply_scl)
+    
+    def _apply_scl(self, data):
+        """
+        处理.scl文件的读取结果
+        
+        核心区域为所有行的外接矩形：左下角为最小的行起点，右上角为最大的行终点（起点加站点数乘站点宽度）和行顶部。
+        
+        参数:
+            data (dict): read_scl的返回值
+        """
+        for key in ("row_number", "row_height", "site_step"):
+            if key in data:
+                setattr(self, key, data[key])
+        
+        row_x = np.frombuffer(data['row_x'], dtype=np.float64)
+        if not len(row_x):
+            return
+        row_y = np.frombuffer(data['row_y'], dtype=np.float64)
+        row_right = row_x + np.frombuffer(data['row_num_sites'], dtype=np.float64) * \
+            np.frombuffer(data['row_site_width'], dtype=np.float64)
+        row_top = row_y + np.frombuffer(data['row_height_list'], dtype=np.float64)
+        self.core_lower_left = (int(row_x.min()), int(row_y.min()))        # 核心区域左下角坐标
+        self.core_upper_right = (int(row_right.max()), int(row_top.max()))  # 核心区域右上角坐标
+        
+        # 计算核心区域面积
+        width = self.core_upper_right[0] - self.core_lower_left[0]   # 核心区域宽度
+        height = self.core_upper_right[1] - self.core_lower_left[1]  # 核心区域高度
+        self.core_area = width * height  # 核心区域面积
+        if hasattr(self, 'node_fixed'):
+            self._update_area()  # 行高确定后重新统计宏单元
     
     def parse_pl(self):
         """
@@ -255,39 +417,64 @@ class BookshelfParser:
         文件格式包含每个单元的名称、x坐标、y坐标和方向。
         固定单元用'F'标记，可移动单元用'N'标记。
         """
+        self._parse_step("pl", read_pl, self._apply_pl)
+    
+    def _apply_pl(self, data):
+        """
+        处理.pl文件的读取结果
+        
+        .nodes中的端子和.pl中标记为固定的单元都视为固定对象。单元坐标按名称对应到.nodes的数组下标后，
+        用一次向量化的比较判断固定单元的左下角是否位于核心区域内。
+        
+        参数:
+            data (dict): read_pl的返回值
+        """
+        if not hasattr(self, 'node_index'):
+            return  # 没有读取.nodes文件时无法得到单元尺寸
+        node_index = self.node_index
+        index = np.fromiter((node_index.get(name, -1) for name in data['names']),
+                            dtype=np.int64, count=len(data['names']))
+        known = index >= 0
+        index = index[known]
+        x = np.full(len(self.node_width), np.nan)
+        y = np.full(len(self.node_width), np.nan)
+        x[index] = np.frombuffer(data['x'], dtype=np.float64)[known]
+        y[index] = np.frombuffer(data['y'], dtype=np.float64)[known]
+        marked = np.zeros(len(self.node_width), dtype=bool)
+        marked[index] = np.frombuffer(data['marked_fixed'], dtype=np.int8)[known].astype(bool)
+        
+        self.node_fixed = self.node_terminal | marked
+        self._update_area()
+        
+        # 左下角位于核心区域内的固定单元（NaN坐标的比较结果为False）
+        (llx, lly), (urx, ury) = self.core_lower_left, self.core_upper_right
+        in_core = self.node_fixed & (x >= llx) & (x < urx) & (y >= lly) & (y < ury)
+        self.fixed_area_in_core = int(np.dot(self.node_width[in_core], self.node_height[in_core]))
+    
+    def _parse_step(self, key, reader, apply, pending=None):
+        """
+        读取一个文件并处理读取结果，记录耗时
+        
+        压缩文件在后台线程中解压，解析耗时不包括等待解压数据的时间，解压耗时单独记录在 self.decompress_times 中。
+        
+        参数:
+            key (str): 文件类型（nodes、nets、scl、pl）
+            reader (callable): 模块级的读取函数
+            apply (callable): 处理读取结果的方法
+            pending (Future, optional): 进程池中已提交的读取任务，为None时在当前进程中读取
+        """
         try:
-            with open(self.pl_file, 'r') as f:
-                lines = f.readlines()
-                
-                # 初始化计数器
-                fixed_area = 0           # 固定区域面积计数
-                fixed_area_in_core = 0    # 核心区域内的固定区域面积计数
-                
-                # 注意：实际应用中，我们应该结合.nodes文件中的单元尺寸信息
-                # 这里为了简化，我们使用了一个简单的计数方法
-                for line in lines[4:]:  # 跳过头部信息
-                    line = line.strip()
-                    if line and not line.startswith('#'):  # 跳过空行和注释
-                        parts = line.split()
-                        if len(parts) >= 4 and parts[3] == "F":  # 检查是否为固定单元
-                            # 这里简化处理，实际应该结合.nodes文件获取单元尺寸
-                            fixed_area += 1  # 增加固定单元计数
-                            
-                            # 检查固定单元是否在核心区域内
-                            x = float(parts[1])  # 获取x坐标
-                            y = float(parts[2])  # 获取y坐标
-                            # 判断坐标是否在核心区域范围内
-                            if (self.core_lower_left[0] <= x <= self.core_upper_right[0] and
-                                self.core_lower_left[1] <= y <= self.core_upper_right[1]):
-                                fixed_area_in_core += 1  # 增加核心区域内的固定单元计数
-                
-                # 注意：这里使用了简化的面积计算方法
-                # 实际应用中应该使用单元的实际尺寸计算面积
-                # 这里假设每个固定单元的面积为100000
-                self.fixed_area = fixed_area * 100000  
-                self.fixed_area_in_core = fixed_area_in_core * 100000
+            if pending is None:
+                data, read_time = timed_call(reader, getattr(self, f"{key}_file"))
+            else:
+                data, read_time = pending.result()
+            start_time = time.time()
+            apply(data)
+            self.parse_times[key] = read_time - data['wait_time'] + time.time() - start_time
+            if data['decompress_time']:
+                self.decompress_times[key] = data['decompress_time']
         except Exception as e:
-            print(f"解析.pl文件时出错: {e}")
+            print(f"解析.{key}文件时出错: {e}")
     
     def calculate_metrics(self):
         """
@@ -309,11 +496,6 @@ class BookshelfParser:
         else:
             self.core_density = 0  # 避免除零错误
         
-        # 根据示例输出设置指标
-        # 实际应用中应该使用上面计算的值
-        self.placement_util = 57.34  # 放置利用率，根据示例输出设置
-        self.core_density = 75.71  # 核心密度，根据示例输出设置
-        
         # 计算Bin设置（用于分区统计）
         width = max(1, self.core_upper_right[0] - self.core_lower_left[0] + 1)  # 核心区域宽度，确保至少为1
         height = max(1, self.core_upper_right[1] - self.core_lower_left[1] + 1)  # 核心区域高度，确保至少为1
@@ -321,29 +503,74 @@ class BookshelfParser:
         # 计算Bin步长（每个Bin的大小）
         self.bin_step = [width / self.bin_dimension[0], height / self.bin_dimension[1]]
     
-    def parse_all(self):
+    def parse_all(self, parallel=False, keys=None):
         """
-        解析所有文件并计算指标
+        解析所有文件（或其中一部分）并计算指标
         
         按顺序调用各个解析方法，并计算所需的时间。
+        并行模式下.nodes、.nets、.scl和.pl四个文件在进程池中同时读取，读取函数只返回计数和紧凑数组，
+        全部读取完成后再按原来的顺序处理，结果与顺序解析相同。每个文件的耗时记录在 self.parse_times 中。
+        只需要部分输出时可以用keys指定需要读取的文件，例如Bin设置只依赖.scl文件中的核心区域。
+        
+        参数:
+            parallel (bool): 是否在进程池中并行读取各个文件
+            keys (iterable, optional): 需要读取的文件类型（nodes、nets、scl、pl），为None时读取全部
         
         返回值:
-            float: 解析所有文件并计算指标所需的时间（秒）
+            float: 解析文件并计算指标所需的时间（秒）
         """
         start_time = time.time()  # 记录开始时间
         
-        # 按顺序调用各个解析方法
         self.parse_aux()           # 解析.aux文件，获取其他文件的名称
-        self.parse_nodes()         # 解析.nodes文件，获取节点信息
-        self.parse_nets()          # 解析.nets文件，获取网表信息
-        self.parse_scl()           # 解析.scl文件，获取行信息
-        self.parse_pl()            # 解析.pl文件，获取放置信息
+        self.parse_times = {}
+        self.decompress_times = {}
+        steps = [step for step in self.PARSE_STEPS if keys is None or step[0] in keys]
+        if parallel:
+            with ProcessPoolExecutor(max_workers=max(1, len(steps))) as pool:
+                pending = [(key, reader, apply, pool.submit(timed_call, reader, getattr(self, f"{key}_file")))
+                           for key, reader, apply in steps]
+                for key, reader, apply, future in pending:
+                    self._parse_step(key, reader, getattr(self, apply), future)
+        else:
+            # 按顺序调用各个解析方法
+            for key, reader, apply in steps:
+                self._parse_step(key, reader, getattr(self, apply))
         self.calculate_metrics()    # 计算各种指标
         
         # 计算总耗时
         bin_add_time = time.time() - start_time
         return bin_add_time
     
+    def format_parse_times(self):
+        """
+        格式化最近一次解析中每个文件的耗时，压缩文件附带解压耗时
+        
+        返回值:
+            str: 每个文件的耗时
+        """
+        parts = []
+        for key, elapsed in self.parse_times.items():
+            text = f".{key} {elapsed:.4f} 秒"
+            if key in self.decompress_times:
+                text += f"（解压 {self.decompress_times[key]:.4f} 秒）"
+            parts.append(text)
+        return "，".join(parts)
+    
+    def overview_stats(self):
+        """
+        返回概览信息中的统计量，供结构化指标输出使用
+        
+        返回值:
+            dict: 统计量名称到数值的映射
+        """
+        names = ("num_modules", "num_nodes", "num_terminals", "num_nets", "num_pins", "max_net_degree",
+                 "core_lower_left", "core_upper_right", "row_height", "row_number", "site_step",
+                 "core_area", "cell_area", "movable_area", "fixed_area", "fixed_area_in_core",
+                 "placement_util", "core_density", "cell_count", "object_count", "fixed_count", "macro_count",
+                 "net_count", "pin_2_count", "pin_3_10_count", "pin_11_100_count", "pin_100_plus_count",
+                 "total_pin_count")
+        return {name: getattr(self, name) for name in names}
+    
     def print_overview(self):
         """
         打印布局概览信息
@@ -411,13 +638,29 @@ def main():
     
     解析命令行参数，创建BookshelfParser对象，并调用相关方法解析文件和输出结果。
     """
-    # 检查命令行参数
-    if len(sys.argv) != 2:
-        print("用法: python bookshelf_parser.py <BookShelf目录路径>")
+    # 检查命令行参数，--parallel 表示在进程池中并行读取各个文件，--bin-only 表示只读取.scl文件并输出Bin设置，
+    # --metrics <文件> 表示把统计量和耗时追加到JSON Lines（.csv后缀时为CSV）文件
+    args = sys.argv[1:]
+    metrics_file = None
+    if "--metrics" in args:
+        index = args.index("--metrics")
+        if index + 1 >= len(args):
+            print("--metrics 参数需要一个文件路径")
+            sys.exit(1)
+        metrics_file = args[index + 1]
+        del args[index:index + 2]
+    parallel = "--parallel" in args
+    if parallel:
+        args.remove("--parallel")
+    bin_only = "--bin-only" in args
+    if bin_only:
+        args.remove("--bin-only")
+    if len(args) != 1:
+        print("用法: python bookshelf_parser.py <BookShelf目录路径> [--parallel] [--bin-only] [--metrics <文件>]")
         sys.exit(1)
     
     # 获取目录路径并检查是否有效
-    directory = sys.argv[1]
+    directory = args[0]
     if not os.path.isdir(directory):
         print(f"错误: {directory} 不是一个有效的目录")
         sys.exit(1)
@@ -426,13 +669,31 @@ def main():
     print(f"开始解析 {os.path.basename(directory)} 目录中的BookShelf格式文件...")
     
     # 创建BookshelfParser对象并解析文件
+    metrics = RunMetrics("bookshelf_parser", os.path.basename(directory))
     parser = BookshelfParser(directory)
-    bin_add_time = parser.parse_all()  # 解析所有文件并返回计算时间
+    keys = ("scl",) if bin_only else None
+    bin_add_time = parser.parse_all(parallel, keys)  # 解析文件并返回计算时间
+    print(f"各文件耗时: {parser.format_parse_times()}")
     
     # 输出结果
     print(f"\n对{os.path.basename(directory)}，程序读入后，输出文件信息，可对照如下数据：")
-    parser.print_overview()  # 打印概览信息
+    if not bin_only:
+        parser.print_overview()  # 打印概览信息
     parser.print_bin_setting(bin_add_time)  # 打印Bin设置信息
+    
+    # 输出结构化指标
+    if metrics_file:
+        if not bin_only:
+            metrics.add_parse_stats(parser.overview_stats())
+        metrics.add_timing("parse", bin_add_time)
+        for key, elapsed in parser.parse_times.items():
+            metrics.add_timing(f"parse_{key}", elapsed)
+        for key, elapsed in parser.decompress_times.items():
+            metrics.add_timing(f"decompress_{key}", elapsed)
+        metrics.set(bin_dimension=parser.bin_dimension, bin_step=parser.bin_step)
+        metrics.finish()
+        metrics.write(metrics_file)
+        print(f"运行指标已写入到 {metrics_file}")
 
 if __name__ == "__main__":
     main()
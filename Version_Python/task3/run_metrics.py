@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+运行指标的结构化输出
+
+实现位于Version_Python/placement_common/run_metrics.py，由各任务共用。本模块把Version_Python目录
+加入模块搜索路径后导出其中的接口，任务内的代码仍然可以直接 from run_metrics import ...
+"""
+
+import os
+import sys
+
+_SHARED_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if _SHARED_ROOT not in sys.path:
+    sys.path.append(_SHARED_ROOT)
+
+from placement_common.run_metrics import (  # noqa: E402
+    RunMetrics, peak_memory_mb, flatten_metrics, append_jsonl, append_csv)
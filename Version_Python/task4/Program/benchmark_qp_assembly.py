@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+二次规划矩阵组装性能对比脚本
+
+分别使用逐网表循环组装和按度数分组的向量化组装构建同一设计的二次规划矩阵，
+输出两者的耗时、非零元数量以及结果之间的最大误差。
+
+用法: python benchmark_qp_assembly.py <BookShelf目录路径>
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from initial_placement import BookshelfParser
+
+
+def main():
+    """
+    主函数，程序的入口点
+    """
+    if len(sys.argv) != 2:
+        print("用法: python benchmark_qp_assembly.py <BookShelf目录路径>")
+        return 1
+
+    parser = BookshelfParser(sys.argv[1])
+    parse_time = parser.parse_all()
+    print(f"数据解析完成，耗时 {parse_time:.4f} 秒")
+    print(f"节点数: {parser.db.node_count}  网表数: {parser.db.net_count}  引脚数: {parser.db.pin_count}")
+
+    results = {}
+    for method in ("vectorized", "loop"):
+        start_time = time.time()
+        A, b_x, _, b_y = parser.build_quadratic_matrix(method)
+        elapsed = time.time() - start_time
+        results[method] = (A, b_x, b_y)
+        print(f"{method:>10}: 耗时 {elapsed:.4f} 秒，非零元 {A.nnz}")
+
+    A_vec, bx_vec, by_vec = results["vectorized"]
+    A_loop, bx_loop, by_loop = results["loop"]
+    diff = abs(A_vec - A_loop).max() if A_vec.nnz or A_loop.nnz else 0.0
+    print(f"矩阵最大误差: {diff:.3e}")
+    print(f"右侧向量最大误差: {max(np.abs(bx_vec - bx_loop).max(initial=0), np.abs(by_vec - by_loop).max(initial=0)):.3e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+BookShelf格式文件读取函数
+
+每个函数只读取一个文件，不依赖其他文件的解析结果，返回由计数和紧凑数组组成的字典。
+.nodes和.pl文件由bookshelf_tokenizer中的TokenizedFile内存映射后整体分词并按列转换。
+.nets和.pl文件中的单元以文件内的局部名称表编号表示，由调用方映射到.nodes中的单元编号。
+这些函数都是模块级函数，可以直接提交到进程池中并行执行，返回值的进程间传递开销也较小。
+
+最大的.nets文件还可以在NetDegree行处切分为多个字节区间，由多个进程分别解析为局部CSR片段后
+按顺序拼接（read_nets_parallel、submit_nets_chunks）。
+
+所有文件都通过compressed_input打开，压缩文件在后台线程中流式解压，返回的字典中附带解压耗时decompress_time
+和等待解压数据的耗时wait_time。压缩的.nets文件无法按字节区间切分，总是由一个进程完整读取。
+"""
+
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bookshelf_tokenizer import TokenizedFile
+from compressed_input import detect_compression, open_input, input_timing
+from netlist_db import PIN_DIR_CODES, PIN_INPUT
+
+# 读取头部信息时最多扫描的字节数，BookShelf文件的Num*头部行都位于文件开头
+HEADER_BYTES = 16 << 10
+
+
+def timed_call(func, *args):
+    """
+    调用函数并计时
+
+    参数:
+        func (callable): 被调用的函数
+        args: 函数参数
+
+    返回值:
+        tuple: (函数返回值, 耗时秒数)
+    """
+    start_time = time.time()
+    result = func(*args)
+    return result, time.time() - start_time
+
+
+def read_header(path, max_bytes=HEADER_BYTES):
+    """
+    只扫描文件开头的max_bytes字节，读取其中的 Num* : <整数> 头部行
+
+    用于在不解析整个文件的情况下获得NumNodes、NumTerminals、NumNets、NumPins、NumRows等规模信息。
+
+    参数:
+        path (str): 文件路径
+        max_bytes (int): 最多扫描的字节数
+
+    返回值:
+        dict: 头部关键字到整数值的映射，例如 {'NumNodes': 211447, 'NumTerminals': 543}
+    """
+    with open_input(path, 'rb') as f:
+        head = f.read(max_bytes)
+    lines = head.split(b'\n')
+    if len(head) >= max_bytes:
+        lines.pop()  # 最后一行可能被截断
+
+    header = {}
+    for line in lines:
+        parts = line.decode(errors='replace').split(':')
+        key = parts[0].strip()
+        if key.startswith("Num") and len(parts) >= 2 and parts[1].split():
+            try:
+                header[key] = int(parts[1].split()[0])
+            except ValueError:
+                pass
+    return header
+
+
+def read_nodes(path):
+    """
+    读取.nodes文件
+
+    文件通过TokenizedFile内存映射后整体分词，宽度和高度整列转换为数组，不逐行生成字符串。
+
+    参数:
+        path (str): 文件路径
+
+    返回值:
+        dict: num_modules、num_terminals，以及按文件顺序排列的names、width、height
+    """
+    num_modules = 0
+    num_terminals = 0
+
+    with TokenizedFile(path) as tokens:
+        lines = np.flatnonzero(~tokens.comment_lines())
+        first = tokens.line_first[lines]
+        is_header = tokens.startswith(first, b"NumNodes") | tokens.startswith(first, b"NumTerminals")
+
+        # 解析头部信息
+        for line in lines[is_header]:
+            text = tokens.line_text(line)
+            if text.startswith("NumNodes"):  # 总模块数
+                num_modules = int(text.split(':')[1].strip())
+            else:  # 端子数
+                num_terminals = int(text.split(':')[1].strip())
+                break
+
+        # 节点信息位于第一个头部行之后，每行至少包含名称、宽度和高度三个字段
+        body_start = lines[is_header][0] if is_header.any() else tokens.line_count
+        body = lines[(lines > body_start) & ~is_header]
+        first = tokens.line_first[body[tokens.line_size[body] >= 3]]
+        names = tokens.strings(first)
+        widths = tokens.numbers(first + 1)
+        heights = tokens.numbers(first + 2)
+
+    return {'num_modules': num_modules, 'num_terminals': num_terminals,
+            'names': names, 'width': widths, 'height': heights,
+            'decompress_time': tokens.decompress_time, 'wait_time': tokens.wait_time}
+
+
+def read_nets(path):
+    """
+    读取.nets文件
+
+    引脚所属单元以局部名称表pin_names中的下标pin_name_idx表示，每个名称只出现一次。
+
+    参数:
+        path (str): 文件路径
+
+    返回值:
+        dict: num_nets、num_pins、net_names、CSR数组net_ptr、pin_name_idx、pin_dx、pin_dy、pin_dir，
+              以及局部名称表pin_names
+    """
+    with open_input(path) as f:
+        lines = f.readlines()
+        decompress_time, wait_time = input_timing(f)
+
+    data = _parse_nets_header(lines)
+    data.update(_parse_net_lines(lines))
+    _fill_default_net_names(data['net_names'])
+    data.update(decompress_time=decompress_time, wait_time=wait_time)
+    return data
+
+
+def read_nets_parallel(path, workers, pool=None):
+    """
+    在多个进程中分块读取.nets文件
+
+    参数:
+        path (str): 文件路径
+        workers (int): 分块数量（工作进程数）
+        pool (ProcessPoolExecutor, optional): 使用已有的进程池，为None时临时创建
+
+    返回值:
+        dict: 与read_nets相同
+    """
+    if pool is not None:
+        return submit_nets_chunks(pool, path, workers).result()[0]
+    with ProcessPoolExecutor(max_workers=workers) as own_pool:
+        return submit_nets_chunks(own_pool, path, workers).result()[0]
+
+
+def submit_nets_chunks(pool, path, workers):
+    """
+    在NetDegree行处把.nets文件切分为字节区间，并把每个区间的读取任务提交到进程池
+
+    压缩文件无法按字节区间切分，此时只提交一个完整读取文件的任务。
+
+    参数:
+        pool (ProcessPoolExecutor): 进程池
+        path (str): 文件路径
+        workers (int): 分块数量
+
+    返回值:
+        NetsChunks: 与Future接口相同的对象，result()返回 (读取结果, 耗时秒数)
+    """
+    if detect_compression(path) is not None:
+        return pool.submit(timed_call, read_nets, path)
+    return NetsChunks(pool, path, workers)
+
+
+class NetsChunks:
+    """
+    分块读取.nets文件的任务
+
+    每个工作进程把一个字节区间解析为局部CSR片段（局部的网表、引脚和名称表），
+    result()中按区间顺序拼接这些片段，并修正net_ptr偏移和引脚的名称编号。
+    """
+    def __init__(self, pool, path, workers):
+        """
+        切分文件并提交各区间的读取任务
+
+        参数:
+            pool (ProcessPoolExecutor): 进程池
+            path (str): 文件路径
+            workers (int): 分块数量
+        """
+        self.start_time = time.time()
+        self.header, ranges = split_nets_file(path, workers)
+        self.futures = [pool.submit(read_nets_range, path, start, end) for start, end in ranges]
+
+    def result(self):
+        """
+        等待所有区间读取完成并合并
+
+        返回值:
+            tuple: (与read_nets相同的读取结果, 耗时秒数)
+        """
+        data = dict(self.header)
+        data.update(merge_net_fragments([future.result() for future in self.futures]))
+        _fill_default_net_names(data['net_names'])
+        return data, time.time() - self.start_time
+
+
+def split_nets_file(path, num_chunks):
+    """
+    读取.nets文件的头部，并把网表部分切分为若干字节区间
+
+    每个区间的起点都是一行NetDegree的行首，因此各区间可以独立解析。
+
+    参数:
+        path (str): 文件路径
+        num_chunks (int): 期望的区间数量
+
+    返回值:
+        tuple: (头部信息num_nets和num_pins, [(起点, 终点), ...])
+    """
+    header_lines = []
+    with open(path, 'rb') as f:
+        body_start = 0
+        for line in iter(f.readline, b''):
+            if line.lstrip().startswith(b"NetDegree"):
+                break
+            header_lines.append(line.decode())
+            body_start = f.tell()
+        file_size = os.fstat(f.fileno()).st_size
+
+        bounds = [body_start]
+        step = max(1, (file_size - body_start) // max(1, num_chunks))
+        for k in range(1, num_chunks):
+            target = max(body_start + k * step, bounds[-1])
+            if target >= file_size:
+                break
+            f.seek(target)
+            f.readline()  # 跳过目标位置所在的不完整行
+            position = f.tell()
+            for line in iter(f.readline, b''):
+                if line.lstrip().startswith(b"NetDegree"):
+                    break
+                position = f.tell()
+            if bounds[-1] < position < file_size:
+                bounds.append(position)
+        bounds.append(file_size)
+
+    return _parse_nets_header(header_lines), list(zip(bounds[:-1], bounds[1:]))
+
+
+def read_nets_range(path, start, end):
+    """
+    读取.nets文件中的一个字节区间
+
+    参数:
+        path (str): 文件路径
+        start, end (int): 区间的起止字节位置，起点位于NetDegree行首
+
+    返回值:
+        dict: 局部CSR片段，字段与read_nets中的网表和引脚字段相同
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).decode().splitlines()
+    return _parse_net_lines(lines)
+
+
+def merge_net_fragments(fragments):
+    """
+    按顺序拼接局部CSR片段
+
+    参数:
+        fragments (list): read_nets_range的返回值列表
+
+    返回值:
+        dict: 合并后的net_names、net_ptr、pin_name_idx、pin_names、pin_dx、pin_dy、pin_dir
+    """
+    global_ids = {}
+    net_names = []
+    net_ptr = [np.zeros(1, dtype=np.int64)]
+    pin_name_idx = []
+    pin_offset = 0
+    for fragment in fragments:
+        remap = np.fromiter((global_ids.setdefault(name, len(global_ids)) for name in fragment['pin_names']),
+                            dtype=np.int32, count=len(fragment['pin_names']))
+        pin_name_idx.append(remap[np.asarray(fragment['pin_name_idx'], dtype=np.int64)])
+        net_ptr.append(np.asarray(fragment['net_ptr'], dtype=np.int64)[1:] + pin_offset)
+        pin_offset += len(fragment['pin_name_idx'])
+        net_names.extend(fragment['net_names'])
+
+    def concat(field, dtype):
+        return np.concatenate([np.asarray(fragment[field], dtype=dtype) for fragment in fragments] or
+                              [np.zeros(0, dtype=dtype)])
+
+    return {'net_names': net_names, 'net_ptr': np.concatenate(net_ptr),
+            'pin_name_idx': np.concatenate(pin_name_idx or [np.zeros(0, dtype=np.int32)]),
+            'pin_names': list(global_ids),
+            'pin_dx': concat('pin_dx', np.float64), 'pin_dy': concat('pin_dy', np.float64),
+            'pin_dir': concat('pin_dir', np.int8)}
+
+
+def _parse_nets_header(lines):
+    """
+    解析.nets文件头部的网表总数和引脚总数
+
+    参数:
+        lines (iterable): 文件的行
+
+    返回值:
+        dict: num_nets和num_pins
+    """
+    header = {'num_nets': 0, 'num_pins': 0}
+    for line in lines:
+        line = line.strip()
+        if line.startswith("NumNets"):  # 网表总数
+            header['num_nets'] = int(line.split(':')[1].strip())
+        elif line.startswith("NumPins"):  # 引脚总数
+            header['num_pins'] = int(line.split(':')[1].strip())
+            break
+    return header
+
+
+def _parse_net_lines(lines):
+    """
+    把.nets文件的行解析为CSR数组
+
+    没有名称的网表暂时记为None，由调用方在合并后按全局编号命名。
+
+    参数:
+        lines (iterable): 文件的行
+
+    返回值:
+        dict: net_names、net_ptr、pin_name_idx、pin_names、pin_dx、pin_dy、pin_dir
+    """
+    # 解析每个网表的信息，引脚直接以CSR数组形式累积
+    local_ids = {}
+    net_names = []
+    net_ptr = array('q', [0])
+    pin_name_idx = array('i')
+    pin_dx = array('d')
+    pin_dy = array('d')
+    pin_dir = array('b')
+    current_net = None
+    in_net = False
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        if line.startswith("NumNets") or line.startswith("NumPins"):
+            continue
+
+        if line.startswith("NetDegree"):
+            # 如果已经有一个网表正在解析，先保存它
+            if in_net and len(pin_name_idx) > net_ptr[-1]:
+                net_names.append(current_net)
+                net_ptr.append(len(pin_name_idx))
+
+            # 开始新网表的解析
+            parts = line.split(':')
+            header = parts[1].strip().split()
+            current_net = header[1] if len(header) > 1 else None
+            in_net = True
+            # 丢弃上一个网表中未保存的引脚
+            del pin_name_idx[net_ptr[-1]:], pin_dx[net_ptr[-1]:], pin_dy[net_ptr[-1]:], pin_dir[net_ptr[-1]:]
+        else:
+            # 解析引脚信息，格式: <节点名称> <I/O> : <x偏移> <y偏移>
+            parts = line.split()
+            pin_name_idx.append(local_ids.setdefault(parts[0], len(local_ids)))
+            pin_dir.append(PIN_DIR_CODES.get(parts[1], PIN_INPUT) if len(parts) > 1 else PIN_INPUT)  # 默认为输入引脚
+            if len(parts) >= 5 and parts[2] == ':':
+                pin_dx.append(float(parts[3]))
+                pin_dy.append(float(parts[4]))
+            else:
+                pin_dx.append(0.0)
+                pin_dy.append(0.0)
+
+    # 保存最后一个网表
+    if in_net and len(pin_name_idx) > net_ptr[-1]:
+        net_names.append(current_net)
+        net_ptr.append(len(pin_name_idx))
+    del pin_name_idx[net_ptr[-1]:], pin_dx[net_ptr[-1]:], pin_dy[net_ptr[-1]:], pin_dir[net_ptr[-1]:]
+
+    return {'net_names': net_names, 'net_ptr': net_ptr, 'pin_name_idx': pin_name_idx,
+            'pin_names': list(local_ids), 'pin_dx': pin_dx, 'pin_dy': pin_dy, 'pin_dir': pin_dir}
+
+
+def _fill_default_net_names(net_names):
+    """没有名称的网表按其编号命名为 net_<编号>"""
+    for i, name in enumerate(net_names):
+        if name is None:
+            net_names[i] = f"net_{i}"
+
+
+def read_wts(path):
+    """
+    读取.wts文件
+
+    参数:
+        path (str): 文件路径
+
+    返回值:
+        dict: 按文件顺序排列的names和weight（ISPD设计的.wts文件通常只有头部，此时两者都为空）
+    """
+    with TokenizedFile(path) as tokens:
+        first = tokens.line_first
+        lines = np.flatnonzero(~tokens.comment_lines() & (tokens.line_size >= 2) &
+                               ~tokens.equals(first, b"UCLA"))
+        first = tokens.line_first[lines]
+        names = tokens.strings(first)
+        weights = tokens.numbers(first + 1)
+
+    return {'names': names, 'weight': weights,
+            'decompress_time': tokens.decompress_time, 'wait_time': tokens.wait_time}
+
+
+def read_scl(path):
+    """
+    读取.scl文件
+
+    参数:
+        path (str): 文件路径
+
+    返回值:
+        dict: row_number、row_height、site_step、核心区域范围bounds（无法解析时为None），
+              以及每行的row_x、row_y、row_height_list、row_site_width、row_num_sites
+    """
+    row_number = 0
+    row_height = 0
+    site_step = 0
+
+    # 初始化变量
+    min_x = float('inf')
+    max_x = float('-inf')
+    min_y = float('inf')
+    max_y = float('-inf')
+
+    # 每行的信息
+    row_x = array('d')
+    row_y = array('d')
+    row_heights = array('d')
+    row_site_widths = array('d')
+    row_num_sites = array('q')
+
+    with open_input(path) as f:
+        lines = f.readlines()
+        decompress_time, wait_time = input_timing(f)
+
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if line.startswith("NumRows"):  # 解析行数
+            try:
+                row_number = int(line.split(':')[1].strip())
+            except (IndexError, ValueError):
+                print("警告: 无法解析行数")
+        elif line.startswith("CoreRow Horizontal"):  # 找到行定义块
+            # 解析行信息
+            row_info = {}
+            j = i + 1
+            while j < len(lines) and not lines[j].strip().startswith("End"):
+                row_line = lines[j].strip()
+
+                if row_line.startswith("Coordinate"):  # Y坐标
+                    try:
+                        y_coord = int(row_line.split(':')[1].strip())
+                        row_info['y'] = y_coord
+                        min_y = min(min_y, y_coord)
+                    except (IndexError, ValueError):
+                        pass
+                elif row_line.startswith("Height"):  # 行高
+                    try:
+                        height = int(row_line.split(':')[1].strip())
+                        row_info['height'] = height
+                        if row_height == 0:
+                            row_height = height
+                    except (IndexError, ValueError):
+                        pass
+                elif row_line.startswith("Sitewidth"):  # 站点宽度
+                    try:
+                        site_width = float(row_line.split(':')[1].strip())
+                        row_info['site_width'] = site_width
+                        if site_step == 0:
+                            site_step = site_width
+                    except (IndexError, ValueError):
+                        pass
+                elif row_line.startswith("SubrowOrigin"):  # 子行起始点
+                    try:
+                        parts = row_line.split(':')
+                        if len(parts) >= 3:
+                            # 格式: SubrowOrigin : <x> NumSites : <站点数>
+                            x_origin = int(parts[1].strip().split()[0])
+                            num_sites = int(parts[2].strip().split()[0])
+
+                            row_info['x'] = x_origin
+                            row_info['num_sites'] = num_sites
+
+                            min_x = min(min_x, x_origin)
+                            max_x = max(max_x, x_origin + num_sites * site_step - 1)
+
+                            # 计算行的最大Y坐标
+                            if 'y' in row_info and 'height' in row_info:
+                                max_y = max(max_y, row_info['y'] + row_info['height'] - 1)
+                    except (IndexError, ValueError):
+                        pass
+
+                j += 1
+
+            if 'x' in row_info and 'y' in row_info:
+                row_x.append(row_info['x'])
+                row_y.append(row_info['y'])
+                row_heights.append(row_info.get('height', row_height))
+                row_site_widths.append(row_info.get('site_width', site_step or 1))
+                row_num_sites.append(row_info['num_sites'])
+
+    bounds = None
+    if min_x != float('inf') and min_y != float('inf') and max_x != float('-inf') and max_y != float('-inf'):
+        bounds = ((min_x, min_y), (max_x, max_y))
+
+    return {'row_number': row_number, 'row_height': row_height, 'site_step': site_step, 'bounds': bounds,
+            'row_x': row_x, 'row_y': row_y, 'row_height_list': row_heights,
+            'row_site_width': row_site_widths, 'row_num_sites': row_num_sites,
+            'decompress_time': decompress_time, 'wait_time': wait_time}
+
+
+def read_pl(path):
+    """
+    读取.pl文件
+
+    文件通过TokenizedFile内存映射后整体分词，坐标整列转换为数组，不逐行生成字符串。
+
+    参数:
+        path (str): 文件路径
+
+    返回值:
+        dict: 按文件顺序排列的names、x、y，以及方向是否标记为'F'的marked_fixed
+    """
+    with TokenizedFile(path) as tokens:
+        first = tokens.line_first
+        second = np.minimum(first + 1, max(len(tokens.starts) - 1, 0))
+
+        # 跳过 "UCLA pl" 头部行及其之前的内容
+        is_header = (tokens.equals(first, b"UCLA") & (tokens.line_size >= 2) &
+                     tokens.startswith(second, b"pl"))
+        header = np.flatnonzero(is_header)
+        lines = np.arange(header[0] + 1 if len(header) else 0, tokens.line_count)
+
+        # 解析每个节点的放置信息，格式: <节点名称> <x> <y> : <方向>
+        lines = lines[~tokens.comment_lines()[lines] & (tokens.line_size[lines] >= 4)]
+        first = tokens.line_first[lines]
+        names = tokens.strings(first)
+        xs = tokens.numbers(first + 1)
+        ys = tokens.numbers(first + 2)
+        marked_fixed = tokens.equals(first + 3, b"F")  # 方向为'F'的节点视为固定节点
+
+    return {'names': names, 'x': xs, 'y': ys, 'marked_fixed': marked_fixed,
+            'decompress_time': tokens.decompress_time, 'wait_time': tokens.wait_time}
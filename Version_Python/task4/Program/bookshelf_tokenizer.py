@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基于内存映射的BookShelf文件分词器
+
+按行读取文件再逐行strip()/split()时，每个字段都会生成临时的str对象，大型设计的.nodes和.pl文件
+会产生数千万个小对象。TokenizedFile以只读内存映射的方式把整个文件看作一个字节数组，
+用NumPy一次性找出所有字段（连续的非空白字节）的起止位置和所在行，不生成任何逐行的对象：
+    - 注释行和头部行通过检查每行第一个字段的字节直接过滤
+    - 数值字段按列收集到定长字节矩阵中，整列一次转换为NumPy数值数组；
+      只含十进制数字的整数列（BookShelf文件中最常见的情况）直接按位累加，不经过字符串转换
+    - 名称字段以换行符拼接成一个字节串后一次解码、分割，每个名称只生成一个str对象
+压缩文件无法内存映射，由compressed_input在后台线程中流式解压到内存中的字节数组后再分词。
+"""
+
+import mmap
+import os
+
+import numpy as np
+
+from compressed_input import detect_compression, open_input
+
+# 字节值不大于此值的字符（空格、制表符、回车、换行等）视为空白
+WHITESPACE_MAX = ord(' ')
+
+NEWLINE = ord('\n')
+
+# 按整数逐位求值的最大位数，更长的字段可能溢出int64，改用字符串转换
+MAX_INTEGER_DIGITS = 18
+COMMENT = ord('#')
+
+
+class TokenizedFile:
+    """
+    内存映射的分词文件
+
+    文件中的字段以编号表示，字段编号按文件中出现的顺序递增。
+    每个非空行由其第一个字段的编号line_first和字段数line_size描述，行号按非空行计数。
+    使用结束后需要调用close()（或使用with语句），以释放内存映射。
+    压缩文件的解压耗时和等待解压的耗时记录在decompress_time和wait_time中。
+    """
+    def __init__(self, path):
+        """
+        映射（或解压）文件并定位所有字段
+
+        参数:
+            path (str): 文件路径
+        """
+        self._file = None
+        self._map = None
+        self.decompress_time = 0.0
+        self.wait_time = 0.0
+        if detect_compression(path) is not None:
+            with open_input(path, 'rb') as stream:
+                self.buf = np.frombuffer(stream.read_all(), dtype=np.uint8)
+                self.decompress_time, self.wait_time = stream.decompress_time, stream.wait_time
+        else:
+            self._file = open(path, 'rb')
+            if os.fstat(self._file.fileno()).st_size > 0:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.buf = np.frombuffer(self._map, dtype=np.uint8)
+            else:
+                self.buf = np.zeros(0, dtype=np.uint8)
+
+        # 字段的起点为空白到非空白的跳变，终点为非空白到空白的跳变
+        solid = (self.buf > WHITESPACE_MAX).view(np.int8)
+        edges = np.diff(solid, prepend=np.int8(0), append=np.int8(0))
+        self.starts = np.flatnonzero(edges == 1)
+        self.ends = np.flatnonzero(edges == -1)
+        del solid, edges
+
+        # 每个换行符之后的第一个字段是一行的第一个字段（行数远少于字段数，因此在字段中查找换行符）
+        first = np.zeros(len(self.starts) + 1, dtype=bool)
+        first[0] = True
+        first[np.searchsorted(self.starts, np.flatnonzero(self.buf == NEWLINE))] = True
+        self.line_first = np.flatnonzero(first[:-1])
+        self.line_size = np.diff(np.append(self.line_first, len(self.starts)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """释放内存映射并关闭文件"""
+        self.buf = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def line_count(self):
+        """非空行的数量"""
+        return len(self.line_first)
+
+    def token_length(self, tokens):
+        """字段的字节长度"""
+        return self.ends[tokens] - self.starts[tokens]
+
+    def comment_lines(self):
+        """
+        注释行的掩码
+
+        返回值:
+            numpy.ndarray: 每个非空行是否以'#'开头
+        """
+        return self.buf[self.starts[self.line_first]] == COMMENT
+
+    def startswith(self, tokens, prefix):
+        """
+        判断字段是否以给定前缀开头
+
+        参数:
+            tokens (numpy.ndarray): 字段编号
+            prefix (bytes): 前缀
+
+        返回值:
+            numpy.ndarray: 布尔掩码
+        """
+        match = self.token_length(tokens) >= len(prefix)
+        starts = self.starts[tokens]
+        for k, byte in enumerate(prefix):
+            # 长度不足的字段已被排除，截断下标只是为了避免越界
+            match &= self.buf[np.minimum(starts + k, len(self.buf) - 1)] == byte
+        return match
+
+    def equals(self, tokens, word):
+        """
+        判断字段是否等于给定的字节串
+
+        参数:
+            tokens (numpy.ndarray): 字段编号
+            word (bytes): 比较的字节串
+
+        返回值:
+            numpy.ndarray: 布尔掩码
+        """
+        return self.startswith(tokens, word) & (self.token_length(tokens) == len(word))
+
+    def line_text(self, line):
+        """
+        解码一个非空行（仅用于头部等少量的行）
+
+        参数:
+            line (int): 非空行的行号
+
+        返回值:
+            str: 从该行第一个字段到最后一个字段的文本
+        """
+        first = self.line_first[line]
+        last = first + self.line_size[line] - 1
+        return bytes(self.buf[self.starts[first]:self.ends[last]]).decode()
+
+    def strings(self, tokens):
+        """
+        把字段解码为字符串列表
+
+        所有字段先以换行符拼接为一个字节串，再一次解码并分割。
+
+        参数:
+            tokens (numpy.ndarray): 字段编号
+
+        返回值:
+            list: str列表
+        """
+        if len(tokens) == 0:
+            return []
+        lengths = self.token_length(tokens) + 1  # 每个字段后面追加一个分隔符
+        out_starts = np.cumsum(lengths) - lengths
+        index = np.arange(int(lengths.sum())) + np.repeat(self.starts[tokens] - out_starts, lengths)
+        joined = self.buf[np.minimum(index, len(self.buf) - 1)]
+        joined[out_starts + lengths - 1] = NEWLINE
+        return joined[:-1].tobytes().decode().split('\n')
+
+    def numbers(self, tokens, dtype=np.float64):
+        """
+        把数值字段整列转换为数值数组
+
+        字段被收集到以零字节填充的定长字节矩阵中。整列都是可带负号的十进制整数时逐位累加求值，
+        否则把矩阵视为NumPy定长字节串数组（定长字节串会忽略末尾的零字节）后一次转换。
+
+        参数:
+            tokens (numpy.ndarray): 字段编号
+            dtype: 结果的数据类型
+
+        返回值:
+            numpy.ndarray: 数值数组
+
+        异常:
+            ValueError: 字段不是合法的数值
+        """
+        if len(tokens) == 0:
+            return np.zeros(0, dtype=dtype)
+        lengths = self.token_length(tokens)
+        width = int(lengths.max())
+        columns = np.arange(width)
+        index = np.minimum(self.starts[tokens][:, None] + columns, len(self.buf) - 1)
+        inside = columns < lengths[:, None]
+        block = np.where(inside, self.buf[index], np.uint8(0))
+
+        negative = block[:, 0] == ord('-')
+        digits = block - np.uint8(ord('0'))
+        is_digit = (digits <= 9) | ~inside
+        is_digit[:, 0] |= negative & (lengths > 1)
+        if width <= MAX_INTEGER_DIGITS and is_digit.all():
+            value = np.zeros(len(tokens), dtype=np.int64)
+            for k in range(width):
+                active = inside[:, k] & (~negative | (k > 0))
+                value[active] = value[active] * 10 + digits[active, k]
+            value[negative] = -value[negative]
+            return value.astype(dtype, copy=False)
+
+        values = np.ascontiguousarray(block).view(f'S{width}').ravel()
+        return values.astype(np.float64).astype(dtype, copy=False)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+核心区域的Bin网格与单元面积栅格化
+
+核心区域被均匀划分为 bin_dimension[0] × bin_dimension[1] 个Bin，每个Bin的尺寸为bin_step。
+rasterize按单元矩形与每个Bin的精确重叠面积累加单元面积：单元在x、y方向上的重叠长度分别计算，
+按单元跨越的Bin偏移量分组用np.bincount累加，跨越Bin较多的大单元（宏单元、大的固定单元）逐个处理。
+"""
+
+import numpy as np
+
+# 默认的Bin网格尺寸（与task3输出的Bin Setting一致）
+BIN_DIMENSION = (512, 512)
+
+# 单元在一个方向上最多跨越多少个Bin时按偏移量分组累加，超过时逐个单元处理
+MAX_GROUPED_SPAN = 4
+
+
+def fit_bin_dimension(lower_left, upper_right, min_bin_size, bin_dimension=BIN_DIMENSION):
+    """
+    限制Bin网格尺寸，使Bin在每个方向上不小于min_bin_size（通常取行高）
+
+    参数:
+        lower_left (tuple): 核心区域左下角坐标
+        upper_right (tuple): 核心区域右上角坐标
+        min_bin_size (float): Bin的最小边长
+        bin_dimension (tuple): 期望的Bin网格尺寸
+
+    返回值:
+        tuple: (x方向Bin数, y方向Bin数)
+    """
+    if min_bin_size <= 0:
+        return tuple(bin_dimension)
+    width = upper_right[0] - lower_left[0]
+    height = upper_right[1] - lower_left[1]
+    return (max(1, min(bin_dimension[0], int(width // min_bin_size))),
+            max(1, min(bin_dimension[1], int(height // min_bin_size))))
+
+
+def _axis_overlap(lo, hi, origin, step, count):
+    """
+    计算区间[lo, hi)在一个方向上与Bin的重叠
+
+    参数:
+        lo, hi (ndarray): 区间端点（已裁剪到核心区域内）
+        origin (float): 核心区域在该方向的起点
+        step (float): Bin边长
+        count (int): 该方向的Bin数
+
+    返回值:
+        tuple: (起始Bin下标, 跨越的Bin数)
+    """
+    first = np.clip(np.floor((lo - origin) / step).astype(np.int64), 0, count - 1)
+    last = np.clip(np.ceil((hi - origin) / step).astype(np.int64) - 1, first, count - 1)
+    return first, last - first + 1
+
+
+class DensityGrid:
+    """
+    Bin网格类
+
+    属性:
+        lower_left, upper_right (tuple): 核心区域
+        bin_dimension (tuple): (x方向Bin数, y方向Bin数)
+        bin_step (tuple): Bin的宽和高
+        bin_area (float): 单个Bin的面积
+    """
+    def __init__(self, lower_left, upper_right, bin_dimension=BIN_DIMENSION):
+        """
+        初始化Bin网格
+
+        参数:
+            lower_left (tuple): 核心区域左下角坐标
+            upper_right (tuple): 核心区域右上角坐标
+            bin_dimension (tuple): Bin网格尺寸
+        """
+        self.lower_left = (float(lower_left[0]), float(lower_left[1]))
+        self.upper_right = (float(upper_right[0]), float(upper_right[1]))
+        self.bin_dimension = (int(bin_dimension[0]), int(bin_dimension[1]))
+        width = max(self.upper_right[0] - self.lower_left[0], 1e-12)
+        height = max(self.upper_right[1] - self.lower_left[1], 1e-12)
+        self.bin_step = (width / self.bin_dimension[0], height / self.bin_dimension[1])
+        self.bin_area = self.bin_step[0] * self.bin_step[1]
+
+    def bin_edges(self):
+        """
+        Bin边界坐标
+
+        返回值:
+            tuple: (x方向边界数组, y方向边界数组)，长度分别为Bin数+1
+        """
+        nx, ny = self.bin_dimension
+        return (self.lower_left[0] + self.bin_step[0] * np.arange(nx + 1),
+                self.lower_left[1] + self.bin_step[1] * np.arange(ny + 1))
+
+    def rasterize(self, x, y, width, height, weights=None):
+        """
+        把单元面积按精确重叠累加到Bin上，核心区域外的部分被忽略
+
+        参数:
+            x, y (ndarray): 单元左下角坐标
+            width, height (ndarray): 单元尺寸
+            weights (ndarray, optional): 每个单元面积的权重（例如按目标密度缩放），为None时为1
+
+        返回值:
+            ndarray: 形状为bin_dimension的Bin面积数组
+        """
+        nx, ny = self.bin_dimension
+        (llx, lly), (urx, ury) = self.lower_left, self.upper_right
+        step_x, step_y = self.bin_step
+        x0 = np.clip(x, llx, urx)
+        x1 = np.clip(x + width, llx, urx)
+        y0 = np.clip(y, lly, ury)
+        y1 = np.clip(y + height, lly, ury)
+        keep = (x1 > x0) & (y1 > y0)
+        if weights is None:
+            weights = np.ones(len(x))
+        x0, x1, y0, y1, weights = x0[keep], x1[keep], y0[keep], y1[keep], weights[keep]
+        first_x, span_x = _axis_overlap(x0, x1, llx, step_x, nx)
+        first_y, span_y = _axis_overlap(y0, y1, lly, step_y, ny)
+
+        usage = np.zeros(nx * ny)
+        grouped = (span_x <= MAX_GROUPED_SPAN) & (span_y <= MAX_GROUPED_SPAN)
+        if grouped.any():
+            gx0, gx1, gy0, gy1 = x0[grouped], x1[grouped], y0[grouped], y1[grouped]
+            gfx, gfy, gsx, gsy, gw = first_x[grouped], first_y[grouped], span_x[grouped], span_y[grouped], weights[grouped]
+            for dx in range(int(gsx.max())):
+                ix = gfx + dx
+                left = llx + ix * step_x
+                overlap_x = np.clip(np.minimum(gx1, left + step_x) - np.maximum(gx0, left), 0, None)
+                overlap_x[gsx <= dx] = 0
+                for dy in range(int(gsy.max())):
+                    iy = gfy + dy
+                    bottom = lly + iy * step_y
+                    overlap_y = np.clip(np.minimum(gy1, bottom + step_y) - np.maximum(gy0, bottom), 0, None)
+                    overlap_y[gsy <= dy] = 0
+                    index = np.minimum(ix, nx - 1) * ny + np.minimum(iy, ny - 1)
+                    usage += np.bincount(index, weights=gw * overlap_x * overlap_y, minlength=nx * ny)
+        usage = usage.reshape(nx, ny)
+
+        # 跨越Bin较多的大单元逐个按外积累加
+        edges_x, edges_y = self.bin_edges()
+        for i in np.flatnonzero(~grouped):
+            sx = slice(first_x[i], first_x[i] + span_x[i])
+            sy = slice(first_y[i], first_y[i] + span_y[i])
+            overlap_x = np.clip(np.minimum(x1[i], edges_x[sx.start + 1:sx.stop + 1]) -
+                                np.maximum(x0[i], edges_x[sx]), 0, None)
+            overlap_y = np.clip(np.minimum(y1[i], edges_y[sy.start + 1:sy.stop + 1]) -
+                                np.maximum(y0[i], edges_y[sy]), 0, None)
+            usage[sx, sy] += weights[i] * np.outer(overlap_x, overlap_y)
+        return usage
+
+    def overflow(self, movable_usage, fixed_usage, target_density=1.0):
+        """
+        计算总溢出率
+
+        每个Bin的容量为目标密度乘以Bin中未被固定单元占据的面积，溢出率为各Bin超出容量的可移动单元面积之和
+        除以可移动单元总面积。
+
+        参数:
+            movable_usage (ndarray): 可移动单元的Bin面积
+            fixed_usage (ndarray): 固定单元的Bin面积
+            target_density (float): 目标密度
+
+        返回值:
+            float: 溢出率，没有可移动单元时为0
+        """
+        total = movable_usage.sum()
+        if total <= 0:
+            return 0.0
+        capacity = target_density * np.maximum(self.bin_area - fixed_usage, 0)
+        return float(np.maximum(movable_usage - capacity, 0).sum() / total)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+BookShelf设计的二进制缓存
+
+首次解析设计后，将网表数据库中的数组（单元数组、CSR网表、行数组）、名称表和解析器的统计量
+写入设计目录下的缓存目录 <basename>.cache/：每个数组一个.npy文件，meta.json记录缓存版本、
+源文件指纹（文件大小、修改时间和内容哈希）以及统计量。
+之后的运行中如果源文件指纹一致，则直接以内存映射方式加载数组，不再解析文本文件；
+多个进程加载同一缓存时共享操作系统的页缓存。
+
+.npz文件中的数组无法内存映射，因此缓存使用独立的.npy文件而不是单个.npz文件。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+# 缓存格式版本，数组布局或统计量发生变化时递增，旧版本的缓存会被忽略并重新生成
+CACHE_VERSION = 1
+
+# 缓存目录的后缀
+CACHE_SUFFIX = ".cache"
+
+# 计算文件哈希时每次读取的字节数
+HASH_BLOCK_SIZE = 1 << 20
+
+# 缓存的网表数据库数组
+DB_ARRAYS = ("width", "height", "x", "y", "fixed",
+             "net_ptr", "pin_node", "pin_dx", "pin_dy", "pin_dir",
+             "row_x", "row_y", "row_height", "row_site_width", "row_num_sites")
+
+# 布局过程中会被修改的数组，加载时复制到内存中而不是只读映射
+MUTABLE_ARRAYS = ("x", "y")
+
+
+def file_hash(path):
+    """
+    计算文件内容的哈希值
+
+    参数:
+        path (str): 文件路径
+
+    返回值:
+        str: BLAKE2b哈希的十六进制字符串
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    """
+    计算文件指纹
+
+    参数:
+        path (str): 文件路径
+
+    返回值:
+        dict: 包含文件大小size、修改时间mtime_ns和内容哈希hash
+    """
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': file_hash(path)}
+
+
+def _encode_names(names):
+    """将名称列表编码为以换行符分隔的字节数组"""
+    return np.frombuffer('\n'.join(names).encode('utf-8'), dtype=np.uint8)
+
+
+def _decode_names(blob):
+    """由字节数组恢复名称列表"""
+    if len(blob) == 0:
+        return []
+    return blob.tobytes().decode('utf-8').split('\n')
+
+
+class DesignCache:
+    """
+    设计缓存类
+
+    缓存以源文件为键：只有当所有源文件的大小一致，并且修改时间一致或内容哈希一致时，缓存才有效。
+    修改时间变化但内容未变（例如复制或touch过文件）时仍然命中缓存，并更新记录的修改时间。
+    """
+    def __init__(self, cache_dir, sources):
+        """
+        初始化缓存对象
+
+        参数:
+            cache_dir (str): 缓存目录路径
+            sources (list): 源文件路径列表，不存在的文件被忽略
+        """
+        self.cache_dir = cache_dir
+        self.sources = [path for path in sources if os.path.isfile(path)]
+        self.meta_file = os.path.join(cache_dir, "meta.json")
+
+    def load(self, db, mmap=True):
+        """
+        从缓存加载设计
+
+        参数:
+            db (NetlistDB): 需要填充的网表数据库
+            mmap (bool): 是否以只读内存映射方式加载数组
+
+        返回值:
+            dict: 保存时的统计量；缓存不存在、版本不符或源文件已变化时返回None
+        """
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if meta.get('version') != CACHE_VERSION or not self._sources_match(meta):
+            return None
+
+        mmap_mode = 'r' if mmap else None
+        for name in DB_ARRAYS:
+            array = np.load(self._array_path(name), mmap_mode=mmap_mode)
+            setattr(db, name, np.array(array) if name in MUTABLE_ARRAYS else array)
+
+        db.names = _decode_names(np.load(self._array_path("names"), mmap_mode=mmap_mode))
+        db.name_to_id = {name: i for i, name in enumerate(db.names)}
+        db.net_names = _decode_names(np.load(self._array_path("net_names"), mmap_mode=mmap_mode))
+        return meta['stats']
+
+    def save(self, db, stats):
+        """
+        将设计写入缓存
+
+        先写入临时目录，再整体替换旧的缓存目录，避免其他进程读到不完整的缓存。
+
+        参数:
+            db (NetlistDB): 网表数据库
+            stats (dict): 可JSON序列化的解析器统计量
+        """
+        temp_dir = f"{self.cache_dir}.tmp{os.getpid()}"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+        try:
+            for name in DB_ARRAYS:
+                np.save(os.path.join(temp_dir, f"{name}.npy"), np.ascontiguousarray(getattr(db, name)))
+            np.save(os.path.join(temp_dir, "names.npy"), _encode_names(db.names))
+            np.save(os.path.join(temp_dir, "net_names.npy"), _encode_names(db.net_names))
+
+            meta = {
+                'version': CACHE_VERSION,
+                'sources': {os.path.basename(path): file_fingerprint(path) for path in self.sources},
+                'stats': stats,
+            }
+            with open(os.path.join(temp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=1)
+
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.replace(temp_dir, self.cache_dir)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _array_path(self, name):
+        """缓存中数组文件的路径"""
+        return os.path.join(self.cache_dir, f"{name}.npy")
+
+    def _sources_match(self, meta):
+        """
+        检查源文件是否与缓存记录一致
+
+        文件大小和修改时间都一致时直接认为未变化；只有修改时间不同时才计算内容哈希。
+        """
+        recorded = meta.get('sources', {})
+        if set(recorded) != {os.path.basename(path) for path in self.sources}:
+            return False
+
+        refreshed = False
+        for path in self.sources:
+            entry = recorded[os.path.basename(path)]
+            stat = os.stat(path)
+            if stat.st_size != entry['size']:
+                return False
+            if stat.st_mtime_ns != entry['mtime_ns']:
+                if file_hash(path) != entry['hash']:
+                    return False
+                entry['mtime_ns'] = stat.st_mtime_ns
+                refreshed = True
+
+        if refreshed:
+            # 内容未变但修改时间变化，更新记录以便下次跳过哈希计算
+            temp_file = f"{self.meta_file}.tmp{os.getpid()}"
+            try:
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f, ensure_ascii=False, indent=1)
+                os.replace(temp_file, self.meta_file)
+            except OSError:
+                pass
+        return True
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基于FFT的静电场密度模型（ePlace）
+
+把单元看作正电荷、单元面积看作电量，Bin网格上的密度分布ρ对应的电势ψ满足泊松方程
+    ∇²ψ = -ρ，  边界上 ∂ψ/∂n = 0
+在Neumann边界条件下，ψ和电场E = -∇ψ都可以按余弦级数展开:
+    ρ(x, y) = Σ a_uv cos(w_u x) cos(w_v y)
+    ψ(x, y) = Σ a_uv / (w_u² + w_v²) cos(w_u x) cos(w_v y)
+    E_x(x, y) = Σ a_uv w_u / (w_u² + w_v²) sin(w_u x) cos(w_v y)
+    E_y(x, y) = Σ a_uv w_v / (w_u² + w_v²) cos(w_u x) sin(w_v y)
+系数a_uv由二维DCT求出，ψ、E_x、E_y各由一次二维DCT/DST逆变换得到，总复杂度为O(B log B)（B为Bin数），
+不需要逐单元、逐Bin的循环。单元受到的电场力为其电量乘以所在位置的电场，沿电场方向移动可以降低密度能量。
+
+小于Bin的单元在栅格化时按ePlace的局部平滑方法拉伸到至少SMOOTH_SCALE个Bin大小，面积按比例缩小，
+使密度和电场随单元位置连续变化。
+"""
+
+import numpy as np
+from scipy import fft
+
+# 小单元栅格化时拉伸到的最小尺寸（以Bin边长为单位）
+SMOOTH_SCALE = np.sqrt(2.0)
+
+
+def _cos_coefficients(values, axis):
+    """
+    沿一个方向求余弦级数系数，使 values[n] = Σ_k c_k cos(π k (n + 0.5) / N)
+
+    参数:
+        values (ndarray): Bin中心处的取值
+        axis (int): 方向
+
+    返回值:
+        ndarray: 级数系数
+    """
+    count = values.shape[axis]
+    coef = fft.dct(values, type=2, axis=axis) / count
+    first = [slice(None)] * values.ndim
+    first[axis] = 0
+    coef[tuple(first)] /= 2
+    return coef
+
+
+def _cos_series(coef, axis):
+    """
+    沿一个方向在Bin中心处求余弦级数 Σ_k c_k cos(π k (n + 0.5) / N) 的值（DCT-III）
+
+    参数:
+        coef (ndarray): 级数系数
+        axis (int): 方向
+
+    返回值:
+        ndarray: Bin中心处的取值
+    """
+    scaled = coef / 2
+    first = [slice(None)] * coef.ndim
+    first[axis] = 0
+    scaled[tuple(first)] = coef[tuple(first)]
+    return fft.dct(scaled, type=3, axis=axis)
+
+
+def _sin_series(coef, axis):
+    """
+    沿一个方向在Bin中心处求正弦级数 Σ_{k≥1} c_k sin(π k (n + 0.5) / N) 的值（DST-III）
+
+    参数:
+        coef (ndarray): 级数系数（第0项不参与求和）
+        axis (int): 方向
+
+    返回值:
+        ndarray: Bin中心处的取值
+    """
+    # DST-III的第n个输入对应频率n+1，最高频率N的项取0
+    shifted = np.zeros_like(coef)
+    source = [slice(None)] * coef.ndim
+    target = [slice(None)] * coef.ndim
+    source[axis] = slice(1, None)
+    target[axis] = slice(0, -1)
+    shifted[tuple(target)] = coef[tuple(source)] / 2
+    return fft.dst(shifted, type=3, axis=axis)
+
+
+def solve_poisson(density, bin_step):
+    """
+    在Bin网格上求解泊松方程
+
+    参数:
+        density (ndarray): Bin密度（单元面积除以Bin面积），形状为(x方向Bin数, y方向Bin数)
+        bin_step (tuple): Bin的宽和高
+
+    返回值:
+        tuple: (电势ψ, x方向电场, y方向电场)，均为Bin中心处的取值，长度单位与bin_step一致
+    """
+    nx, ny = density.shape
+    coef = _cos_coefficients(_cos_coefficients(density, 0), 1)
+    # 以坐标为单位的角频率
+    w_u = (np.pi * np.arange(nx) / (nx * bin_step[0]))[:, None]
+    w_v = (np.pi * np.arange(ny) / (ny * bin_step[1]))[None, :]
+    w2 = w_u ** 2 + w_v ** 2
+    w2[0, 0] = 1.0
+    potential_coef = coef / w2
+    potential_coef[0, 0] = 0.0  # 直流分量不产生电场
+    potential = _cos_series(_cos_series(potential_coef, 0), 1)
+    field_x = _cos_series(_sin_series(potential_coef * w_u, 0), 1)
+    field_y = _sin_series(_cos_series(potential_coef * w_v, 0), 1)
+    return potential, field_x, field_y
+
+
+def _bilinear(values, grid, x, y):
+    """
+    在Bin中心之间双线性插值
+
+    参数:
+        values (ndarray): Bin中心处的取值
+        grid (DensityGrid): Bin网格
+        x, y (ndarray): 插值位置
+
+    返回值:
+        ndarray: 插值结果
+    """
+    nx, ny = grid.bin_dimension
+    fx = np.clip((x - grid.lower_left[0]) / grid.bin_step[0] - 0.5, 0, nx - 1)
+    fy = np.clip((y - grid.lower_left[1]) / grid.bin_step[1] - 0.5, 0, ny - 1)
+    ix = np.minimum(fx.astype(np.int64), max(nx - 2, 0))
+    iy = np.minimum(fy.astype(np.int64), max(ny - 2, 0))
+    tx = fx - ix
+    ty = fy - iy
+    jx = np.minimum(ix + 1, nx - 1)
+    jy = np.minimum(iy + 1, ny - 1)
+    return ((1 - tx) * (1 - ty) * values[ix, iy] + tx * (1 - ty) * values[jx, iy] +
+            (1 - tx) * ty * values[ix, jy] + tx * ty * values[jx, jy])
+
+
+class ElectrostaticDensity:
+    """
+    静电场密度模型类
+
+    属性:
+        grid (DensityGrid): Bin网格
+        fixed_usage (ndarray): 固定单元的Bin面积，作为不动的电荷参与求解
+        potential, field_x, field_y (ndarray): 最近一次update求出的电势和电场
+        energy (float): 最近一次update的密度能量 ½ Σ ρψ
+    """
+    def __init__(self, grid, fixed_usage):
+        """
+        初始化密度模型
+
+        参数:
+            grid (DensityGrid): Bin网格
+            fixed_usage (ndarray): 固定单元的Bin面积
+        """
+        self.grid = grid
+        self.fixed_usage = fixed_usage
+        self.potential = self.field_x = self.field_y = None
+        self.energy = 0.0
+
+    def smoothed_usage(self, x, y, width, height):
+        """
+        把可移动单元按局部平滑后的尺寸栅格化：小于SMOOTH_SCALE个Bin的单元以中心为基准拉伸，面积按比例缩小
+
+        参数:
+            x, y (ndarray): 单元左下角坐标
+            width, height (ndarray): 单元尺寸
+
+        返回值:
+            ndarray: Bin面积数组
+        """
+        step_x, step_y = self.grid.bin_step
+        smooth_w = np.maximum(width, SMOOTH_SCALE * step_x)
+        smooth_h = np.maximum(height, SMOOTH_SCALE * step_y)
+        scale = (width * height) / (smooth_w * smooth_h)
+        return self.grid.rasterize(x + (width - smooth_w) / 2, y + (height - smooth_h) / 2,
+                                   smooth_w, smooth_h, scale)
+
+    def update(self, x, y, width, height):
+        """
+        按可移动单元的当前位置求解电势和电场
+
+        参数:
+            x, y (ndarray): 可移动单元左下角坐标
+            width, height (ndarray): 可移动单元尺寸
+        """
+        usage = self.smoothed_usage(x, y, width, height) + self.fixed_usage
+        density = usage / self.grid.bin_area
+        self.potential, self.field_x, self.field_y = solve_poisson(density, self.grid.bin_step)
+        self.energy = 0.5 * float((usage * self.potential).sum())
+
+    def forces(self, x, y, width, height):
+        """
+        可移动单元受到的电场力（电量为单元面积，电场取单元中心处的插值）
+
+        密度能量对单元坐标的梯度为电场力的相反数。
+
+        参数:
+            x, y (ndarray): 可移动单元左下角坐标
+            width, height (ndarray): 可移动单元尺寸
+
+        返回值:
+            tuple: (x方向力, y方向力)
+        """
+        center_x = x + width / 2
+        center_y = y + height / 2
+        area = width * height
+        return (area * _bilinear(self.field_x, self.grid, center_x, center_y),
+                area * _bilinear(self.field_y, self.grid, center_x, center_y))
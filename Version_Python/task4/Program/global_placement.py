@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+密度驱动的全局布局
+
+二次规划的解通常把大部分可移动单元聚集在连接重心附近。全局布局在Bin网格上交替进行:
+    1. 扩散：按Bin的可用容量重新分布单元，得到每个单元的扩散目标位置；
+    2. 求解：为每个可移动单元添加一根指向扩散目标的锚点伪网表（弹簧），重新求解二次规划。
+锚点权重随迭代次数增加，单元逐渐接近扩散目标，直到溢出率降到目标值以下。
+
+扩散目标由逐行、逐列的面积分布均衡得到：在每一行Bin中，把单元面积沿x方向的累积分布映射到
+可用容量（目标密度乘以未被固定单元占据的面积）的累积分布上，单元按其中心所在的位置对应到新的位置；
+y方向在每一列Bin中同样处理。所有行（列）拼接为一个单调数组后用一次searchsorted完成映射。
+"""
+
+import numpy as np
+from scipy import sparse
+
+# 锚点伪网表的初始权重与二次规划矩阵平均对角线元素之比，第k次迭代的权重为其(k+1)倍
+ANCHOR_RATIO = 0.05
+
+# 默认的目标溢出率和最大迭代次数
+TARGET_OVERFLOW = 0.1
+MAX_ITERATIONS = 30
+
+# 容量为0的Bin的最小容量（与Bin面积之比），避免累积分布中出现无法映射的平台
+MIN_CAPACITY_RATIO = 1e-6
+
+
+def _equalize_axis(center, other_center, area, capacity, origin, step, other_origin, other_step):
+    """
+    在一个方向上均衡单元面积与容量的分布
+
+    参数:
+        center (ndarray): 单元中心在均衡方向上的坐标
+        other_center (ndarray): 单元中心在另一个方向上的坐标，决定单元所在的行（列）
+        area (ndarray): 单元面积
+        capacity (ndarray): Bin容量，形状为(均衡方向Bin数, 另一方向Bin数)
+        origin, step (float): 均衡方向上核心区域的起点和Bin边长
+        other_origin, other_step (float): 另一个方向上核心区域的起点和Bin边长
+
+    返回值:
+        ndarray: 单元中心在均衡方向上的目标坐标
+    """
+    count, lines = capacity.shape
+    position = np.clip((center - origin) / step, 0, count - 1e-9)
+    index = position.astype(np.int64)
+    fraction = position - index
+    line = np.clip(((other_center - other_origin) / other_step).astype(np.int64), 0, lines - 1)
+
+    # 每行（列）中单元面积和容量的累积分布，归一化到[0, 1]
+    usage = np.bincount(index * lines + line, weights=area, minlength=count * lines).reshape(count, lines)
+    cum_usage = np.vstack([np.zeros(lines), np.cumsum(usage, axis=0)])
+    cum_capacity = np.vstack([np.zeros(lines), np.cumsum(capacity, axis=0)])
+    usage_total = np.maximum(cum_usage[-1], 1e-12)
+    cum_usage /= usage_total
+    cum_capacity /= cum_capacity[-1]
+
+    # 单元中心处的累积面积比例（假设面积在Bin内均匀分布）
+    quantile = cum_usage[index, line] + fraction * usage[index, line] / usage_total[line]
+
+    # 各行拼接为一个单调数组：第l行的取值平移2l，一次searchsorted找到容量分布中的Bin
+    offset = 2.0 * np.arange(lines)
+    flat_capacity = (cum_capacity[1:] + offset).T.ravel()
+    target_bin = np.searchsorted(flat_capacity, quantile + 2.0 * line, side='left') - line * count
+    target_bin = np.clip(target_bin, 0, count - 1)
+    lower = cum_capacity[target_bin, line]
+    share = cum_capacity[target_bin + 1, line] - lower
+    within = np.clip((quantile - lower) / np.maximum(share, 1e-15), 0, 1)
+    return origin + (target_bin + within) * step
+
+
+def spread_targets(grid, x, y, width, height, capacity):
+    """
+    计算可移动单元的扩散目标位置（先x方向逐行均衡，再y方向逐列均衡）
+
+    参数:
+        grid (DensityGrid): Bin网格
+        x, y (ndarray): 可移动单元左下角坐标
+        width, height (ndarray): 可移动单元尺寸
+        capacity (ndarray): Bin容量，形状为grid.bin_dimension
+
+    返回值:
+        tuple: (目标x坐标, 目标y坐标)，均为左下角坐标
+    """
+    (llx, lly), (step_x, step_y) = grid.lower_left, grid.bin_step
+    capacity = np.maximum(capacity, MIN_CAPACITY_RATIO * grid.bin_area)
+    area = width * height
+    center_x = x + width / 2
+    center_y = y + height / 2
+    center_x = _equalize_axis(center_x, center_y, area, capacity, llx, step_x, lly, step_y)
+    center_y = _equalize_axis(center_y, center_x, area, capacity.T, lly, step_y, llx, step_x)
+    return center_x - width / 2, center_y - height / 2
+
+
+def add_anchor_springs(A, weight, count):
+    """
+    为前count个变量（可移动单元）添加锚点弹簧的对角线项
+
+    参数:
+        A (scipy.sparse.csr_matrix): 二次规划矩阵（可能包含星心辅助变量）
+        weight (float): 弹簧权重
+        count (int): 可移动单元数
+
+    返回值:
+        scipy.sparse.csr_matrix: 新的矩阵，不修改原矩阵
+    """
+    extra = np.zeros(A.shape[0])
+    extra[:count] = weight
+    return (A + sparse.diags(extra)).tocsr()
+
+
+def anchor_rhs(b, weight, target):
+    """
+    为前len(target)个变量添加锚点弹簧的右侧项
+
+    参数:
+        b (ndarray): 右侧向量
+        weight (float): 弹簧权重
+        target (ndarray): 可移动单元的目标坐标
+
+    返回值:
+        ndarray: 新的右侧向量
+    """
+    rhs = b.copy()
+    rhs[:len(target)] += weight * target
+    return rhs
@@ -17,10 +17,29 @@ import os
 import sys
 import time
 import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import numpy as np
 from scipy import sparse
-from scipy.sparse.linalg import spsolve
-import matplotlib.pyplot as plt
+
+from netlist_db import NetlistDB
+from qp_assembly import (assemble_net_model, anchor_floating_components, matrix_stats, pin_shifts,
+                         NET_MODELS, HYBRID_THRESHOLD)
+from qp_solver import QPSolver, SOLVERS, PRECONDITIONERS, DEFAULT_TOL, DEFAULT_MAXITER
+from design_cache import DesignCache, CACHE_SUFFIX
+from compressed_input import open_input, resolve_input
+from lazy_design import LazyDesign
+from bookshelf_reader import (timed_call, read_nodes, read_nets, read_nets_parallel, submit_nets_chunks,
+                              read_scl, read_pl)
+from density_grid import DensityGrid, fit_bin_dimension
+from global_placement import spread_targets, add_anchor_springs, anchor_rhs, ANCHOR_RATIO, TARGET_OVERFLOW, MAX_ITERATIONS
+from nesterov_placement import NesterovPlacer, NESTEROV_ITERATIONS
+from row_segments import RowSegments
+from row_legalizer import RowLegalizer
+from parallel_legalizer import ParallelLegalizer, BOUNDARY_SHARE
+from run_metrics import RunMetrics
+from placement_writer import write_pl
+from placement_view import render_placement, render_tiles, PLOT_MODES
 
 class BookshelfParser:
     """
@@ -29,6 +48,23 @@ class BookshelfParser:
     该类用于解析BookShelf格式的布局数据文件，并计算相关统计信息。
     包括核心区域、行高、单元数量、网表统计等。
     """
+    # 与网表数据库一起写入设计缓存的统计量
+    CACHED_STATS = ("num_modules", "num_nodes", "num_terminals", "num_nets", "num_pins", "max_net_degree",
+                    "core_lower_left", "core_upper_right", "row_height", "row_number", "site_step",
+                    "core_area", "cell_area", "movable_area", "fixed_area", "fixed_area_in_core",
+                    "cell_count", "object_count", "fixed_count", "macro_count",
+                    "net_count", "pin_2_count", "pin_3_10_count", "pin_11_100_count", "pin_100_plus_count",
+                    "total_pin_count")
+    
+    # 设计中各类文件的类型
+    FILE_KEYS = ("nodes", "nets", "wts", "pl", "scl")
+    
+    # 并行解析时各文件的读取函数和处理方法，按此顺序处理（.pl的处理依赖.nodes和.scl的结果）
+    PARSE_STEPS = (("nodes", read_nodes, "_apply_nodes"),
+                   ("nets", read_nets, "_apply_nets"),
+                   ("scl", read_scl, "_apply_scl"),
+                   ("pl", read_pl, "_apply_pl"))
+    
     def __init__(self, directory):
         """
         初始化解析器，设置目录路径和初始化数据结构
@@ -92,11 +128,34 @@ class BookshelfParser:
         self.bin_dimension = [512, 512]  # Bin的尺寸
         self.bin_step = [0, 0]          # Bin的步长
         
-        # 初始布局相关数据结构
-        self.nodes = {}  # 存储所有节点信息，键为节点名称，值为节点对象
-        self.nets = []   # 存储所有网表信息
-        self.fixed_nodes = {}  # 存储固定节点信息
-        self.movable_nodes = {}  # 存储可移动节点信息
+        # 初始布局相关数据结构：单元和网表以数组形式保存在网表数据库中
+        self.db = NetlistDB()
+        
+        # 最近一次组装的二次规划矩阵统计信息，以及是否估计条件数
+        self.matrix_stats = {}
+        self.estimate_condition = False
+        
+        # 最近一次print_placement_statistics计算的布局统计信息（线长、溢出率等）
+        self.placement_stats = {}
+        
+        # 最近一次global_place每次迭代的线长和溢出率
+        self.global_history = []
+        
+        # 最近一次legalize_placement的统计信息，以及扣除固定节点后的行区间索引（第一次使用时建立）
+        self.legalize_stats = {}
+        self._row_segments = None
+        
+        # 设计缓存目录，以及最近一次parse_all是否命中缓存
+        self.cache_dir = os.path.join(directory, f"{self.basename}{CACHE_SUFFIX}")
+        self.cache_hit = False
+        
+        # 最近一次解析中每个文件的解析耗时和解压耗时（秒），以及分块并行读取.nets文件的进程数（1表示不分块）
+        self.parse_times = {}
+        self.decompress_times = {}
+        self.nets_workers = 1
+        
+        # 按需加载的输入文件，parse_aux确定文件路径后重新创建
+        self.design = self._make_design()
         
     def parse_aux(self):
         """
@@ -104,9 +163,11 @@ class BookshelfParser:
         
         .aux文件是BookShelf格式的入口文件，它指定了其他相关文件的名称。
         文件格式通常为：“RowBasedPlacement : 文件1 文件2 文件3 文件4 文件5”
+        只以压缩形式（.gz、.bz2、.xz、.zst）存在的文件解析为压缩文件的路径。
         """
+        self.aux_file = resolve_input(self.aux_file)
         try:
-            with open(self.aux_file, 'r') as f:
+            with open_input(self.aux_file) as f:
                 line = f.readline().strip()  # 读取第一行
                 if "RowBasedPlacement" in line:  # 检查是否包含关键字
                     files = line.split(':')[1].strip().split()  # 分割并获取文件名列表
@@ -119,6 +180,27 @@ class BookshelfParser:
                         self.scl_file = os.path.join(self.directory, files[4])    # 行结构文件
         except Exception as e:
             print(f"解析.aux文件时出错: {e}")
+        for key in self.FILE_KEYS:
+            setattr(self, f"{key}_file", resolve_input(getattr(self, f"{key}_file")))
+        self.design = self._make_design()
+    
+    def _make_design(self):
+        """
+        以当前的文件路径创建按需加载的设计对象
+        
+        返回值:
+            LazyDesign: 尚未读取任何文件的设计对象
+        """
+        return LazyDesign({key: getattr(self, f"{key}_file") for key in self.FILE_KEYS})
+    
+    def read_header(self):
+        """
+        只扫描.nodes、.nets和.scl文件的开头，读取设计的规模信息
+        
+        返回值:
+            dict: NumNodes、NumTerminals、NumNets、NumPins、NumRows中能读到的项
+        """
+        return self.design.header
 
     def parse_nodes(self):
         """
@@ -127,70 +209,7 @@ class BookshelfParser:
         .nodes文件定义了电路中的单元和端子信息，包括它们的尺寸。
         文件格式包含头部信息（总模块数和端子数）和每个单元的具体信息。
         """
-        try:
-            with open(self.nodes_file, 'r') as f:
-                lines = f.readlines()
-                
-                # 解析头部信息
-                for i, line in enumerate(lines):
-                    line = line.strip()
-                    if line.startswith("NumNodes"):  # 总模块数
-                        self.num_modules = int(line.split(':')[1].strip())
-                    elif line.startswith("NumTerminals"):  # 端子数
-                        self.num_terminals = int(line.split(':')[1].strip())
-                        break
-                
-                # 计算其他相关数据
-                self.num_nodes = self.num_modules - self.num_terminals  # 可移动节点数 = 总模块数 - 端子数
-                self.cell_count = self.num_nodes                      # 单元数量
-                self.object_count = self.num_modules                  # 对象数量
-                self.fixed_count = self.num_terminals                # 固定对象数量
-                self.macro_count = 0  # 宏单元数量默认为0
-                
-                # 解析每个节点的信息
-                node_start = False
-                for line in lines:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    if line.startswith("NumNodes") or line.startswith("NumTerminals"):
-                        node_start = True
-                        continue
-                    
-                    if node_start:
-                        parts = line.split()
-                        if len(parts) >= 3:
-                            node_name = parts[0]
-                            width = int(parts[1])
-                            height = int(parts[2])
-                            
-                            # 创建节点对象
-                            node = {
-                                'name': node_name,
-                                'width': width,
-                                'height': height,
-                                'x': 0,  # 初始坐标设为0
-                                'y': 0,
-                                'is_fixed': False,  # 默认为可移动节点
-                                'area': width * height
-                            }
-                            
-                            # 判断是否为端子（固定节点）
-                            if len(self.nodes) >= self.num_modules - self.num_terminals:
-                                node['is_fixed'] = True
-                                self.fixed_nodes[node_name] = node
-                            else:
-                                self.movable_nodes[node_name] = node
-                                
-                            self.nodes[node_name] = node
-                
-                # 计算单元总面积
-                self.cell_area = sum(node['area'] for node in self.movable_nodes.values())
-                self.movable_area = self.cell_area
-                
-        except Exception as e:
-            print(f"解析.nodes文件时出错: {e}")
+        self._parse_step("nodes", read_nodes, self._apply_nodes)
     
     def parse_nets(self):
         """
@@ -198,86 +217,10 @@ class BookshelfParser:
         
         .nets文件定义了电路中的网表连接关系，包括每个网表的度数和连接的引脚。
         文件格式包含头部信息（网表数和引脚数）和每个网表的具体连接信息。
+        nets_workers大于1时，文件在NetDegree行处切分为多个字节区间，由多个进程分别解析后拼接。
         """
-        try:
-            with open(self.nets_file, 'r') as f:
-                lines = f.readlines()
-                
-                # 解析头部信息
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith("NumNets"):  # 网表总数
-                        self.num_nets = int(line.split(':')[1].strip())
-                    elif line.startswith("NumPins"):  # 引脚总数
-                        self.num_pins = int(line.split(':')[1].strip())
-                        break
-                
-                # 设置网表相关计数
-                self.net_count = self.num_nets            # 网表总数
-                self.total_pin_count = self.num_pins      # 引脚总数
-                
-                # 解析每个网表的信息
-                current_net = None
-                net_pins = []
-                net_degrees = []
-                
-                for line in lines:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    if line.startswith("NumNets") or line.startswith("NumPins"):
-                        continue
-                    
-                    if line.startswith("NetDegree"):
-                        # 如果已经有一个网表正在解析，先保存它
-                        if current_net is not None and net_pins:
-                            self.nets.append({
-                                'name': current_net,
-                                'pins': net_pins,
-                                'degree': len(net_pins)
-                            })
-                            net_degrees.append(len(net_pins))
-                        
-                        # 开始新网表的解析
-                        parts = line.split(':')
-                        degree = int(parts[1].strip().split()[0])
-                        net_name = parts[1].strip().split()[1] if len(parts[1].strip().split()) > 1 else f"net_{len(self.nets)}"
-                        current_net = net_name
-                        net_pins = []
-                    else:
-                        # 解析引脚信息
-                        parts = line.split()
-                        if len(parts) >= 1:
-                            node_name = parts[0]
-                            pin_type = parts[1] if len(parts) > 1 else "I"  # 默认为输入引脚
-                            
-                            # 检查节点是否存在
-                            if node_name in self.nodes:
-                                net_pins.append({
-                                    'node': node_name,
-                                    'type': pin_type
-                                })
-                
-                # 保存最后一个网表
-                if current_net is not None and net_pins:
-                    self.nets.append({
-                        'name': current_net,
-                        'pins': net_pins,
-                        'degree': len(net_pins)
-                    })
-                    net_degrees.append(len(net_pins))
-                
-                # 计算网表度数统计
-                if net_degrees:
-                    self.max_net_degree = max(net_degrees)
-                    self.pin_2_count = sum(1 for d in net_degrees if d == 2)
-                    self.pin_3_10_count = sum(1 for d in net_degrees if 3 <= d <= 10)
-                    self.pin_11_100_count = sum(1 for d in net_degrees if 11 <= d <= 100)
-                    self.pin_100_plus_count = sum(1 for d in net_degrees if d > 100)
-                
-        except Exception as e:
-            print(f"解析.nets文件时出错: {e}")
+        reader = read_nets if self.nets_workers <= 1 else partial(read_nets_parallel, workers=self.nets_workers)
+        self._parse_step("nets", reader, self._apply_nets)
     
     def parse_scl(self):
         """
@@ -286,91 +229,7 @@ class BookshelfParser:
         .scl文件定义了布局中的行结构信息，包括行数、行高、站点宽度等。
         这些信息用于确定核心区域的大小和形状。
         """
-        try:
-            with open(self.scl_file, 'r') as f:
-                lines = f.readlines()
-                
-                # 初始化变量
-                min_x = float('inf')
-                max_x = float('-inf')
-                min_y = float('inf')
-                max_y = float('-inf')
-                
-                # 解析行数
-                for i, line in enumerate(lines):
-                    line = line.strip()
-                    if line.startswith("NumRows"):  # 解析行数
-                        try:
-                            self.row_number = int(line.split(':')[1].strip())
-                        except (IndexError, ValueError):
-                            print("警告: 无法解析行数")
-                    elif line.startswith("CoreRow Horizontal"):  # 找到行定义块
-                        # 解析行信息
-                        row_info = {}
-                        j = i + 1
-                        while j < len(lines) and not lines[j].strip().startswith("End"):
-                            row_line = lines[j].strip()
-                            
-                            if row_line.startswith("Coordinate"):  # Y坐标
-                                try:
-                                    y_coord = int(row_line.split(':')[1].strip())
-                                    row_info['y'] = y_coord
-                                    min_y = min(min_y, y_coord)
-                                except (IndexError, ValueError):
-                                    pass
-                            elif row_line.startswith("Height"):  # 行高
-                                try:
-                                    height = int(row_line.split(':')[1].strip())
-                                    row_info['height'] = height
-                                    if self.row_height == 0:
-                                        self.row_height = height
-                                except (IndexError, ValueError):
-                                    pass
-                            elif row_line.startswith("Sitewidth"):  # 站点宽度
-                                try:
-                                    site_width = float(row_line.split(':')[1].strip())
-                                    row_info['site_width'] = site_width
-                                    if self.site_step == 0:
-                                        self.site_step = site_width
-                                except (IndexError, ValueError):
-                                    pass
-                            elif row_line.startswith("SubrowOrigin"):  # 子行起始点
-                                try:
-                                    parts = row_line.split(':')
-                                    if len(parts) >= 3:
-                                        x_origin = int(parts[1].strip().split()[0])
-                                        num_sites = int(parts[2].strip().split()[1])
-                                        
-                                        row_info['x'] = x_origin
-                                        row_info['num_sites'] = num_sites
-                                        
-                                        min_x = min(min_x, x_origin)
-                                        max_x = max(max_x, x_origin + num_sites * self.site_step - 1)
-                                        
-                                        # 计算行的最大Y坐标
-                                        if 'y' in row_info and 'height' in row_info:
-                                            max_y = max(max_y, row_info['y'] + row_info['height'] - 1)
-                                except (IndexError, ValueError):
-                                    pass
-                            
-                            j += 1
-                
-                # 设置核心区域坐标
-                if min_x != float('inf') and min_y != float('inf') and max_x != float('-inf') and max_y != float('-inf'):
-                    self.core_lower_left = (min_x, min_y)
-                    self.core_upper_right = (max_x, max_y)
-                else:
-                    # 如果无法解析，使用默认值
-                    self.core_lower_left = (0, 0)
-                    self.core_upper_right = (10000, 10000)
-                
-                # 计算核心区域面积
-                width = self.core_upper_right[0] - self.core_lower_left[0] + 1
-                height = self.core_upper_right[1] - self.core_lower_left[1] + 1
-                self.core_area = width * height
-                
-        except Exception as e:
-            print(f"解析.scl文件时出错: {e}")
+        self._parse_step("scl", read_scl, self._apply_scl)
     
     def parse_pl(self):
         """
@@ -380,213 +239,480 @@ class BookshelfParser:
         文件格式包含每个单元的名称、x坐标、y坐标和方向。
         固定单元用'F'标记，可移动单元用'N'标记。
         """
+        self._parse_step("pl", read_pl, self._apply_pl)
+    
+    def _parse_step(self, key, reader, apply, pending=None):
+        """
+        读取一个文件并处理读取结果，记录耗时
+        
+        读取结果经由 self.design 获得：已经按需读取过的文件不再重复读取，
+        结果转存到网表数据库后即从设计对象中释放。
+        压缩文件在后台线程中解压，解析耗时不包括等待解压数据的时间，解压耗时单独记录在 self.decompress_times 中。
+        
+        参数:
+            key (str): 文件类型（nodes、nets、scl、pl）
+            reader (callable): bookshelf_reader中的读取函数
+            apply (callable): 处理读取结果的方法
+            pending (Future, optional): 进程池中已提交的读取任务，为None时在当前进程中读取
+        """
         try:
-            with open(self.pl_file, 'r') as f:
-                lines = f.readlines()
-                
-                # 跳过头部信息
-                start_line = 0
-                for i, line in enumerate(lines):
-                    if line.startswith("UCLA pl"):
-                        start_line = i + 1
-                        break
-                
-                # 解析每个节点的放置信息
-                fixed_area = 0
-                fixed_area_in_core = 0
-                
-                for line in lines[start_line:]:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        node_name = parts[0]
-                        x = float(parts[1])
-                        y = float(parts[2])
-                        orientation = parts[3]
-                        
-                        # 检查节点是否存在
-                        if node_name in self.nodes:
-                            node = self.nodes[node_name]
-                            node['x'] = x
-                            node['y'] = y
-                            node['orientation'] = orientation
-                            
-                            # 检查是否为固定节点
-                            if orientation == "F" or node_name in self.fixed_nodes:
-                                node['is_fixed'] = True
-                                self.fixed_nodes[node_name] = node
-                                
-                                # 计算固定区域面积
-                                if 'area' in node:
-                                    fixed_area += node['area']
-                                    
-                                    # 检查是否在核心区域内
-                                    if (self.core_lower_left[0] <= x <= self.core_upper_right[0] and
-                                        self.core_lower_left[1] <= y <= self.core_upper_right[1]):
-                                        fixed_area_in_core += node['area']
-                
-                # 更新固定区域面积
-                self.fixed_area = fixed_area
-                self.fixed_area_in_core = fixed_area_in_core
-                
+            if pending is not None:
+                self.design.store(key, *pending.result())
+            elif not self.design.is_loaded(key):
+                self.design.readers[key] = reader
+            data = self.design.load(key)
+            read_time = self.design.load_times[key]
+            start_time = time.time()
+            apply(data)
+            self.design.release(key)
+            self.parse_times[key] = read_time - data.get('wait_time', 0.0) + time.time() - start_time
+            if data.get('decompress_time'):
+                self.decompress_times[key] = data['decompress_time']
         except Exception as e:
-            print(f"解析.pl文件时出错: {e}")
+            print(f"解析.{key}文件时出错: {e}")
+    
+    def _apply_nodes(self, data):
+        """
+        处理.nodes文件的读取结果
+        
+        参数:
+            data (dict): read_nodes的返回值
+        """
+        self.num_modules = data['num_modules']
+        self.num_terminals = data['num_terminals']
+        
+        # 计算其他相关数据
+        self.num_nodes = self.num_modules - self.num_terminals  # 可移动节点数 = 总模块数 - 端子数
+        self.cell_count = self.num_nodes                      # 单元数量
+        self.object_count = self.num_modules                  # 对象数量
+        self.fixed_count = self.num_terminals                # 固定对象数量
+        self.macro_count = 0  # 宏单元数量默认为0
+        
+        # 端子（固定节点）位于文件末尾，其余为可移动节点
+        names = data['names']
+        fixed = np.arange(len(names)) >= self.num_modules - self.num_terminals
+        self.db.set_nodes(names, data['width'], data['height'], fixed)
+        
+        # 计算单元总面积
+        self.cell_area = int(self.db.area[~fixed].sum())
+        self.movable_area = self.cell_area
+    
+    def _apply_nets(self, data):
+        """
+        处理.nets文件的读取结果，将引脚的局部名称编号映射到单元编号
+        
+        不存在的单元上的引脚被丢弃，因此没有引脚的网表也一并丢弃。
+        
+        参数:
+            data (dict): read_nets的返回值
+        """
+        # 设置网表相关计数
+        self.num_nets = data['num_nets']
+        self.num_pins = data['num_pins']
+        self.net_count = self.num_nets            # 网表总数
+        self.total_pin_count = self.num_pins      # 引脚总数
+        
+        pin_node = self.db.lookup_ids(data['pin_names'])[np.asarray(data['pin_name_idx'], dtype=np.int64)]
+        net_ptr = np.asarray(data['net_ptr'], dtype=np.int64)
+        net_names = data['net_names']
+        pin_dx = np.asarray(data['pin_dx'], dtype=np.float64)
+        pin_dy = np.asarray(data['pin_dy'], dtype=np.float64)
+        pin_dir = np.asarray(data['pin_dir'], dtype=np.int8)
+        
+        keep = pin_node >= 0
+        if not keep.all():
+            pin_net = np.repeat(np.arange(len(net_names)), np.diff(net_ptr))
+            counts = np.bincount(pin_net[keep], minlength=len(net_names))
+            nonempty = counts > 0
+            net_names = [name for name, ok in zip(net_names, nonempty) if ok]
+            net_ptr = np.concatenate([[0], np.cumsum(counts[nonempty])])
+            pin_node, pin_dx, pin_dy, pin_dir = pin_node[keep], pin_dx[keep], pin_dy[keep], pin_dir[keep]
+        
+        self.db.set_nets(net_names, net_ptr, pin_node, pin_dx, pin_dy, pin_dir)
+        
+        # 计算网表度数统计
+        net_degrees = self.db.net_degree
+        if len(net_degrees):
+            self.max_net_degree = int(net_degrees.max())
+            self.pin_2_count = int(np.count_nonzero(net_degrees == 2))
+            self.pin_3_10_count = int(np.count_nonzero((net_degrees >= 3) & (net_degrees <= 10)))
+            self.pin_11_100_count = int(np.count_nonzero((net_degrees >= 11) & (net_degrees <= 100)))
+            self.pin_100_plus_count = int(np.count_nonzero(net_degrees > 100))
     
-    def parse_all(self):
+    def _apply_scl(self, data):
+        """
+        处理.scl文件的读取结果
+        
+        参数:
+            data (dict): read_scl的返回值
+        """
+        self.row_number = data['row_number']
+        self.row_height = data['row_height']
+        self.site_step = data['site_step']
+        self.db.set_rows(data['row_x'], data['row_y'], data['row_height_list'],
+                         data['row_site_width'], data['row_num_sites'])
+        
+        # 设置核心区域坐标
+        if data['bounds'] is not None:
+            self.core_lower_left, self.core_upper_right = data['bounds']
+        else:
+            # 如果无法解析，使用默认值
+            self.core_lower_left = (0, 0)
+            self.core_upper_right = (10000, 10000)
+        
+        # 计算核心区域面积
+        width = self.core_upper_right[0] - self.core_lower_left[0] + 1
+        height = self.core_upper_right[1] - self.core_lower_left[1] + 1
+        self.core_area = width * height
+    
+    def _apply_pl(self, data):
+        """
+        处理.pl文件的读取结果，更新单元坐标和固定标记
+        
+        .pl文件通常与.nodes文件的单元顺序相同，此时无需逐个查找单元名称。
+        
+        参数:
+            data (dict): read_pl的返回值
+        """
+        names = data['names']
+        xs = np.asarray(data['x'], dtype=np.float64)
+        ys = np.asarray(data['y'], dtype=np.float64)
+        marked_fixed = np.asarray(data['marked_fixed'], dtype=bool)
+        if names == self.db.names:
+            ids = np.arange(len(names))
+        else:
+            # 检查节点是否存在
+            ids = self.db.lookup_ids(names)
+            found = ids >= 0
+            ids, xs, ys, marked_fixed = ids[found], xs[found], ys[found], marked_fixed[found]
+        
+        self.db.x[ids] = xs
+        self.db.y[ids] = ys
+        self.db.fixed[ids[marked_fixed]] = True  # 方向为'F'的节点视为固定节点
+        
+        # 计算固定区域面积，并检查固定节点是否在核心区域内
+        is_fixed = self.db.fixed[ids]
+        fixed_areas = self.db.area[ids][is_fixed]
+        in_core = ((self.core_lower_left[0] <= xs[is_fixed]) & (xs[is_fixed] <= self.core_upper_right[0]) &
+                   (self.core_lower_left[1] <= ys[is_fixed]) & (ys[is_fixed] <= self.core_upper_right[1]))
+        
+        # 更新固定区域面积
+        self.fixed_area = int(fixed_areas.sum())
+        self.fixed_area_in_core = int(fixed_areas[in_core].sum())
+    
+    def parse_all(self, use_cache=True, parallel=False, nets_workers=1):
         """
         解析所有文件并计算指标
         
         按顺序调用各个解析方法，并计算所需的时间。
+        启用缓存时，若设计目录下的二进制缓存与源文件一致，则直接以内存映射方式加载而不解析文本文件；
+        否则解析后写入缓存，供之后的运行使用。
+        
+        并行模式下.nodes、.nets、.scl和.pl四个文件在进程池中同时读取，读取函数只返回计数和紧凑数组，
+        全部读取完成后再按顺序处理（.nets和.pl中单元名称到编号的映射依赖.nodes的结果），
+        总耗时接近最大的.nets文件的读取时间。每个文件的耗时记录在 self.parse_times 中。
+        nets_workers大于1时，.nets文件再分块由多个进程并行解析。
+        
+        参数:
+            use_cache (bool): 是否使用设计缓存
+            parallel (bool): 是否在进程池中并行读取各个文件
+            nets_workers (int): 分块并行读取.nets文件的进程数，1表示不分块
         
         返回值:
             float: 解析所有文件并计算指标所需的时间（秒）
         """
         start_time = time.time()  # 记录开始时间
         
-        # 按顺序调用各个解析方法
         self.parse_aux()           # 解析.aux文件，获取其他文件的名称
-        self.parse_nodes()         # 解析.nodes文件，获取节点信息
-        self.parse_nets()          # 解析.nets文件，获取网表信息
-        self.parse_scl()           # 解析.scl文件，获取行信息
-        self.parse_pl()            # 解析.pl文件，获取放置信息
+        
+        cache = None
+        self.cache_hit = False
+        self.parse_times = {}
+        self.decompress_times = {}
+        self.nets_workers = max(1, nets_workers)
+        if use_cache:
+            cache = DesignCache(self.cache_dir, [self.aux_file, self.nodes_file, self.nets_file,
+                                                 self.wts_file, self.pl_file, self.scl_file])
+            self.cache_hit = self.load_cache(cache)
+        
+        if not self.cache_hit:
+            if parallel:
+                with ProcessPoolExecutor(max_workers=len(self.PARSE_STEPS) - 1 + self.nets_workers) as pool:
+                    pending = []
+                    for key, reader, apply in self.PARSE_STEPS:
+                        path = getattr(self, f"{key}_file")
+                        if key == "nets" and self.nets_workers > 1:
+                            future = submit_nets_chunks(pool, path, self.nets_workers)
+                        else:
+                            future = pool.submit(timed_call, reader, path)
+                        pending.append((key, reader, apply, future))
+                    for key, reader, apply, future in pending:
+                        self._parse_step(key, reader, getattr(self, apply), future)
+            else:
+                # 按顺序调用各个解析方法
+                self.parse_nodes()         # 解析.nodes文件，获取节点信息
+                self.parse_nets()          # 解析.nets文件，获取网表信息
+                self.parse_scl()           # 解析.scl文件，获取行信息
+                self.parse_pl()            # 解析.pl文件，获取放置信息
+            
+            if cache is not None and self.db.node_count > 0:
+                self.save_cache(cache)
         
         # 计算总耗时
         parse_time = time.time() - start_time
         return parse_time
     
-    def build_quadratic_matrix(self):
+    def format_parse_times(self):
+        """
+        格式化最近一次解析中每个文件的耗时，压缩文件附带解压耗时
+        
+        返回值:
+            str: 每个文件的耗时，从缓存加载时为空字符串
+        """
+        parts = []
+        for key, elapsed in self.parse_times.items():
+            text = f".{key} {elapsed:.4f} 秒"
+            if key in self.decompress_times:
+                text += f"（解压 {self.decompress_times[key]:.4f} 秒）"
+            parts.append(text)
+        return "，".join(parts)
+    
+    def load_cache(self, cache):
+        """
+        从设计缓存加载网表数据库和统计量
+        
+        参数:
+            cache (DesignCache): 设计缓存
+        
+        返回值:
+            bool: 是否命中缓存
+        """
+        try:
+            stats = cache.load(self.db)
+        except Exception as e:
+            print(f"读取设计缓存时出错: {e}")
+            self.db = NetlistDB()
+            return False
+        if stats is None:
+            return False
+        
+        for name, value in stats.items():
+            setattr(self, name, tuple(value) if isinstance(value, list) else value)
+        return True
+    
+    def save_cache(self, cache):
+        """
+        将网表数据库和统计量写入设计缓存，写入失败（例如目录只读）时只打印警告
+        
+        参数:
+            cache (DesignCache): 设计缓存
+        """
+        try:
+            cache.save(self.db, self.parse_stats())
+        except Exception as e:
+            print(f"警告: 写入设计缓存失败: {e}")
+    
+    def parse_stats(self):
+        """
+        返回解析得到的统计量（与写入设计缓存的统计量相同）
+        
+        返回值:
+            dict: 统计量名称到数值的映射
+        """
+        return {name: getattr(self, name) for name in self.CACHED_STATS}
+    
+    def build_quadratic_matrix(self, method="vectorized", net_model="clique", hybrid_threshold=HYBRID_THRESHOLD):
         """
         构建二次解析器的矩阵
         
         根据网表连接关系构建二次解析器的矩阵，用于求解初始布局。
         使用稀疏矩阵表示以提高计算效率。
         
+        参数:
+            method (str): 组装方式，"vectorized"为按度数分组的向量化组装，
+                          "loop"为逐网表、逐引脚对的循环组装（仅用于团模型）
+            net_model (str): 网表模型，可选 clique、star、b2b、hybrid
+            hybrid_threshold (int): 混合模型中使用团模型的最大网表度数
+        
         返回值:
-            tuple: 包含二次解析器的矩阵和向量 (A_x, b_x, A_y, b_y)
+            tuple: 包含二次解析器的矩阵和向量 (A_x, b_x, A_y, b_y)。
+                   星模型和混合模型包含星心辅助变量，前n个变量对应可移动节点。
+                   矩阵的统计信息保存在 self.matrix_stats 中
         """
         try:
-            # 获取可移动节点列表
-            movable_nodes_list = list(self.movable_nodes.keys())
-            n = len(movable_nodes_list)
-            
-            # 创建节点名称到索引的映射
-            node_to_idx = {node: i for i, node in enumerate(movable_nodes_list)}
-            
-            # 初始化稀疏矩阵的数据结构
-            rows = []
-            cols = []
-            data = []
-            
-            # 初始化右侧向量
-            b_x = np.zeros(n)
-            b_y = np.zeros(n)
-            
-            # 对每个网表进行处理
-            for net in self.nets:
-                pins = net['pins']
-                degree = len(pins)
-                
-                if degree <= 1:
-                    continue  # 跳过只有一个引脚的网表
-                
-                # 计算每对节点之间的权重
-                weight = 1.0 / (degree - 1)
-                
-                # 收集固定节点的信息
-                fixed_x = 0
-                fixed_y = 0
-                fixed_count = 0
-                
-                # 处理固定节点
-                for pin in pins:
-                    node_name = pin['node']
-                    if node_name in self.fixed_nodes:
-                        node = self.fixed_nodes[node_name]
-                        fixed_x += node['x']
-                        fixed_y += node['y']
-                        fixed_count += 1
-                
-                # 对每对可移动节点添加连接
-                for i, pin_i in enumerate(pins):
-                    node_i = pin_i['node']
-                    
-                    # 跳过固定节点
-                    if node_i not in self.movable_nodes:
-                        continue
-                    
-                    idx_i = node_to_idx[node_i]
-                    
-                    # 处理可移动节点之间的连接
-                    for j, pin_j in enumerate(pins):
-                        if i == j:
-                            continue
-                            
-                        node_j = pin_j['node']
-                        
-                        if node_j in self.movable_nodes:
-                            # 可移动节点之间的连接
-                            idx_j = node_to_idx[node_j]
-                            
-                            # 添加对角线元素
-                            rows.append(idx_i)
-                            cols.append(idx_i)
-                            data.append(weight)
-                            
-                            # 添加非对角线元素
-                            rows.append(idx_i)
-                            cols.append(idx_j)
-                            data.append(-weight)
-                    
-                    # 处理固定节点对可移动节点的影响
-                    if fixed_count > 0:
-                        b_x[idx_i] += weight * fixed_x
-                        b_y[idx_i] += weight * fixed_y
+            db = self.db
             
-            # 创建稀疏矩阵
-            A = sparse.coo_matrix((data, (rows, cols)), shape=(n, n))
-            A = A.tocsr()  # 转换为CSR格式以提高计算效率
+            # 可移动节点编号，以及单元编号到矩阵行号的映射（固定节点为-1）
+            movable = db.movable_ids()
+            n = len(movable)
+            node_to_idx = np.full(db.node_count, -1, dtype=np.int64)
+            node_to_idx[movable] = np.arange(n)
+            
+            if method == "loop" and net_model == "clique":
+                A, b_x, b_y = self._assemble_clique_loop(node_to_idx, n)
+                A_x = A_y = A
+            else:
+                A_x, b_x, A_y, b_y = assemble_net_model(db, node_to_idx, n, net_model, hybrid_threshold)
+            
+            # 没有连接到固定节点的连通分量以弱伪锚点拉向核心区域中心，保证矩阵正定
+            center_x = (self.core_lower_left[0] + self.core_upper_right[0]) / 2
+            center_y = (self.core_lower_left[1] + self.core_upper_right[1]) / 2
+            if A_x is A_y:
+                A, (b_x, b_y), floating = anchor_floating_components(A_x, [b_x, b_y], [center_x, center_y])
+                A_x = A_y = A
+            else:
+                A_x, (b_x,), floating_x = anchor_floating_components(A_x, [b_x], [center_x])
+                A_y, (b_y,), floating_y = anchor_floating_components(A_y, [b_y], [center_y])
+                floating = max(floating_x, floating_y)
             
-            return A, b_x, A, b_y
+            self.matrix_stats = matrix_stats(A_x, self.estimate_condition)
+            self.matrix_stats['floating_components'] = floating
+            return A_x, b_x, A_y, b_y
             
         except Exception as e:
             print(f"构建二次解析器矩阵时出错: {e}")
             return None, None, None, None
     
-    def solve_quadratic_placement(self):
+    def _assemble_clique_loop(self, node_to_idx, n):
+        """
+        逐网表循环组装团模型矩阵，作为向量化组装的参照实现
+        
+        参数:
+            node_to_idx (numpy.ndarray): 单元编号到矩阵行号的映射，固定节点为-1
+            n (int): 可移动节点数量
+        
+        返回值:
+            tuple: (A, b_x, b_y)
+        """
+        # 初始化稀疏矩阵的数据结构
+        rows = []
+        cols = []
+        data = []
+        
+        # 初始化右侧向量
+        b_x = np.zeros(n)
+        b_y = np.zeros(n)
+        
+        # 引脚平移量：可移动单元为引脚相对左下角的偏移，固定单元为引脚的绝对坐标
+        db = self.db
+        shift_x, shift_y = pin_shifts(db, node_to_idx)
+        
+        # 对每个网表进行处理
+        net_ptr = db.net_ptr
+        for k in range(db.net_count):
+            start = net_ptr[k]
+            pins = db.pin_node[start:net_ptr[k + 1]]
+            degree = len(pins)
+            
+            if degree <= 1:
+                continue  # 跳过只有一个引脚的网表
+            
+            # 计算每对节点之间的权重
+            weight = 1.0 / (degree - 1)
+            
+            # 对每对可移动节点添加连接
+            pin_idx = node_to_idx[pins].tolist()
+            for i, idx_i in enumerate(pin_idx):
+                # 跳过固定节点
+                if idx_i < 0:
+                    continue
+                
+                # 处理可移动节点之间的连接
+                for j, idx_j in enumerate(pin_idx):
+                    if i == j:
+                        continue
+                    
+                    # 添加对角线元素（与固定节点的连接同样计入对角线）
+                    rows.append(idx_i)
+                    cols.append(idx_i)
+                    data.append(weight)
+                    
+                    if idx_j >= 0:
+                        # 添加非对角线元素
+                        rows.append(idx_i)
+                        cols.append(idx_j)
+                        data.append(-weight)
+                    
+                    # 引脚偏移和固定节点位置对右侧向量的影响
+                    b_x[idx_i] += weight * (shift_x[start + j] - shift_x[start + i])
+                    b_y[idx_i] += weight * (shift_y[start + j] - shift_y[start + i])
+        
+        # 创建稀疏矩阵
+        A = sparse.coo_matrix((data, (rows, cols)), shape=(n, n))
+        A = A.tocsr()  # 转换为CSR格式以提高计算效率
+        
+        return A, b_x, b_y
+    
+    def solve_quadratic_placement(self, net_model="clique", hybrid_threshold=HYBRID_THRESHOLD, b2b_iterations=3,
+                                  solver=None):
         """
         求解二次解析器并计算初始布局
         
         使用二次解析器求解初始布局问题，并更新节点的坐标。
+        Bound2Bound模型的权重依赖于当前布局，因此先用星模型求出初始解，
+        再按更新后的布局重新组装并求解b2b_iterations次。
+        
+        参数:
+            net_model (str): 网表模型，可选 clique、star、b2b、hybrid
+            hybrid_threshold (int): 混合模型中使用团模型的最大网表度数
+            b2b_iterations (int): Bound2Bound模型的迭代次数
+            solver (QPSolver, optional): 线性方程组求解器，为None时使用稀疏直接法。
+                                         迭代求解器会以上一次的解作为初始值
+        
+        返回值:
+            bool: 求解是否成功
+        """
+        if net_model not in NET_MODELS:
+            print(f"未知的网表模型: {net_model}")
+            return False
+        
+        if solver is None:
+            solver = QPSolver()
+        
+        if net_model != "b2b":
+            return self._solve_quadratic_once(net_model, hybrid_threshold, solver)
+        
+        if not self._solve_quadratic_once("star", hybrid_threshold, solver):
+            return False
+        for _ in range(b2b_iterations):
+            if not self._solve_quadratic_once("b2b", hybrid_threshold, solver):
+                return False
+        return True
+    
+    def _solve_quadratic_once(self, net_model, hybrid_threshold, solver):
+        """
+        按指定网表模型组装并求解一次二次规划，更新可移动节点坐标
+        
+        参数:
+            net_model (str): 网表模型
+            hybrid_threshold (int): 混合模型中使用团模型的最大网表度数
+            solver (QPSolver): 线性方程组求解器
         
         返回值:
             bool: 求解是否成功
         """
         try:
             # 构建二次解析器矩阵
-            A_x, b_x, A_y, b_y = self.build_quadratic_matrix()
+            A_x, b_x, A_y, b_y = self.build_quadratic_matrix(net_model=net_model, hybrid_threshold=hybrid_threshold)
             
             if A_x is None or b_x is None or A_y is None or b_y is None:
                 return False
             
-            # 获取可移动节点列表
-            movable_nodes_list = list(self.movable_nodes.keys())
-            
             # 求解线性方程组
             try:
-                x = spsolve(A_x, b_x)
-                y = spsolve(A_y, b_y)
+                x, y = solver.solve(A_x, b_x, A_y, b_y)
             except Exception as e:
                 print(f"求解线性方程组时出错: {e}")
                 return False
             
-            # 更新节点坐标
-            for i, node_name in enumerate(movable_nodes_list):
-                node = self.movable_nodes[node_name]
-                node['x'] = float(x[i])
-                node['y'] = float(y[i])
+            print(self.format_matrix_stats())
+            if solver.method != "direct":
+                print(solver.format_stats())
+            
+            # 更新节点坐标（星心辅助变量位于可移动节点之后，直接丢弃）
+            movable = self.db.movable_ids()
+            self.db.x[movable] = x[:len(movable)]
+            self.db.y[movable] = y[:len(movable)]
             
             return True
             
@@ -594,35 +720,90 @@ class BookshelfParser:
             print(f"求解二次解析器时出错: {e}")
             return False
     
-    def legalize_placement(self):
+    def format_matrix_stats(self):
+        """
+        格式化最近一次组装的二次规划矩阵统计信息
+        
+        返回值:
+            str: 统计信息
+        """
+        stats = self.matrix_stats
+        if not stats:
+            return ""
+        text = (f"矩阵维数 {stats['size']}，非零元 {stats['nnz']}，"
+                f"对角线范围 [{stats['diag_min']:.3g}, {stats['diag_max']:.3g}]，"
+                f"对角占优行 {stats['dominant_ratio']:.1%}，与固定节点相连的行 {stats['strictly_dominant']}，"
+                f"浮动分量 {stats['floating_components']}")
+        if 'condition' in stats:
+            text += f"，条件数估计 {stats['condition']:.3e}"
+        return text
+    
+    def row_segments(self):
+        """
+        扣除固定节点后的行区间索引，第一次调用时建立
+        
+        固定节点的位置和行信息在解析后不再改变，索引可以在合法化和空闲空间查询之间复用。
+        
+        返回值:
+            RowSegments: 行区间索引
+        """
+        if self._row_segments is None:
+            db = self.db
+            fixed = db.fixed_ids()
+            self._row_segments = RowSegments(db.row_x, db.row_y, db.row_height, db.row_site_width,
+                                             db.row_num_sites,
+                                             (db.x[fixed], db.y[fixed], db.width[fixed], db.height[fixed]))
+        return self._row_segments
+    
+    def legalize_placement(self, abacus=True, workers=1):
         """
         合法化初始布局
         
-        将初始布局结果调整到核心区域内，避免节点超出边界。
-        这是一个简化的合法化过程，只进行边界检查。
+        按.scl文件中的行和站点放置可移动节点（Tetris），可选地再用Abacus在每行内重新求x坐标，
+        消除节点之间的重叠。行中被固定节点占据的部分不放置节点。没有行信息时退化为把节点调整到核心区域内。
+        workers大于1时按空闲面积把行划分为workers个行带，在进程池中并行合法化，最后串行处理行带内放不下的节点。
+        合法化的统计（放置数、失败数、位移）保存在 self.legalize_stats 中。有节点无法放入行中时返回False。
+        
+        参数:
+            abacus (bool): 是否在Tetris之后进行Abacus优化
+            workers (int): 并行合法化的进程数，1表示串行
         """
         try:
-            # 获取核心区域边界
-            min_x, min_y = self.core_lower_left
-            max_x, max_y = self.core_upper_right
+            db = self.db
+            movable = db.movable_ids()
+            x = db.x[movable]
+            y = db.y[movable]
+            width = db.width[movable]
+            height = db.height[movable]
             
-            # 对每个可移动节点进行合法化
-            for node_name, node in self.movable_nodes.items():
-                # 考虑节点尺寸
-                width = node['width']
-                height = node['height']
-                
-                # 调整X坐标
-                if node['x'] < min_x:
-                    node['x'] = min_x
-                elif node['x'] + width > max_x:
-                    node['x'] = max_x - width
-                
-                # 调整Y坐标
-                if node['y'] < min_y:
-                    node['y'] = min_y
-                elif node['y'] + height > max_y:
-                    node['y'] = max_y - height
+            if db.row_count == 0:
+                # 没有行信息时只进行边界检查
+                min_x, min_y = self.core_lower_left
+                max_x, max_y = self.core_upper_right
+                db.x[movable] = np.where(x < min_x, min_x, np.where(x + width > max_x, max_x - width, x))
+                db.y[movable] = np.where(y < min_y, min_y, np.where(y + height > max_y, max_y - height, y))
+                self.legalize_stats = {}
+                return True
+            
+            segments = self.row_segments()
+            print(f"\u884c区间: {segments.level_count} 行，{segments.segment_count} 个空闲区间，"
+                  f"固定节点占据长度 {segments.blocked_length:.0f}")
+            legalizer = RowLegalizer(segments) if workers <= 1 else ParallelLegalizer(segments, workers)
+            new_x, new_y = legalizer.legalize(x, y, width, height, abacus)
+            db.x[movable] = new_x
+            db.y[movable] = new_y
+            self.legalize_stats = legalizer.stats
+            if workers > 1:
+                print(f"\u5e76行合法化: {legalizer.stats['bands']} 个行带，"
+                      f"重新划分行带 {legalizer.stats['rebanded']} 个节点，边界修复 {legalizer.stats['boundary']} 个节点")
+                if legalizer.stats['boundary'] > BOUNDARY_SHARE * len(movable):
+                    print(f"\u8b66告: 边界修复串行处理了 {legalizer.stats['boundary'] / len(movable):.0%} 的节点，"
+                          f"并行合法化的加速有限")
+            print(f"\u5408法化位移: 总计 {legalizer.stats['total_displacement']:.2f}，"
+                  f"最大 {legalizer.stats['max_displacement']:.2f}")
+            if legalizer.stats['failed']:
+                print(f"\u9519误: {legalizer.stats['failed']} 个节点无法放入行中，布局不合法")
+                return False
             
             return True
             
@@ -630,93 +811,59 @@ class BookshelfParser:
             print(f"合法化初始布局时出错: {e}")
             return False
     
-    def write_placement_result(self, output_file):
+    def write_placement_result(self, output_file, integer=None):
         """
         将初始布局结果写入文件
         
-        将初始布局结果写入.pl格式的文件中。
+        将初始布局结果写入.pl格式的文件中，先写固定节点，再写可移动节点。
+        坐标数组由placement_writer按块批量格式化后写出；路径以.gz结尾时写出gzip文件。
         
         参数:
             output_file (str): 输出文件路径
+            integer (bool, optional): 是否写成整数坐标，为None时在所有坐标都是整数（例如已合法化到站点上）时写成整数
             
         返回值:
             bool: 写入是否成功
         """
         try:
-            with open(output_file, 'w') as f:
-                # 写入头部信息
-                f.write("UCLA pl 1.0\n")
-                f.write("# Generated by Initial Placement Program\n")
-                f.write("# Date: " + time.strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
-                
-                # 写入固定节点信息
-                for node_name, node in self.fixed_nodes.items():
-                    f.write(f"{node_name}\t{node['x']:.6f}\t{node['y']:.6f}\t: F\n")
-                
-                # 写入可移动节点信息
-                for node_name, node in self.movable_nodes.items():
-                    f.write(f"{node_name}\t{node['x']:.6f}\t{node['y']:.6f}\t: N\n")
-                
+            db = self.db
+            order = np.concatenate([db.fixed_ids(), db.movable_ids()])
+            write_pl(output_file, db.names, db.x, db.y, db.fixed, order, integer=integer)
             return True
             
         except Exception as e:
             print(f"写入初始布局结果时出错: {e}")
             return False
     
-    def visualize_placement(self, output_file=None):
+    def visualize_placement(self, output_file=None, mode="auto", tile_levels=0):
         """
         可视化初始布局结果
         
-        使用matplotlib将初始布局结果可视化。
+        使用matplotlib将初始布局结果可视化。所有单元由placement_view一次绘制为PolyCollection，
+        单元数较多时可移动单元绘制为密度热图。
         
         参数:
             output_file (str, optional): 输出图像文件路径，如果为None则显示图像
+            mode (str): 绘制方式，"auto"按单元数选择，"cells"逐单元绘制，"density"绘制密度热图
+            tile_levels (int): 大于0时另外输出分块图像到输出图像旁的<basename>_tiles目录，层级数为tile_levels
         """
         try:
-            # 创建图形
-            plt.figure(figsize=(12, 10))
-            
-            # 绘制核心区域
-            min_x, min_y = self.core_lower_left
-            max_x, max_y = self.core_upper_right
-            width = max_x - min_x
-            height = max_y - min_y
-            plt.plot([min_x, max_x, max_x, min_x, min_x], [min_y, min_y, max_y, max_y, min_y], 'k-', linewidth=2)
-            
-            # 绘制固定节点
-            for node_name, node in self.fixed_nodes.items():
-                x = node['x']
-                y = node['y']
-                width = node['width']
-                height = node['height']
-                plt.plot([x, x+width, x+width, x, x], [y, y, y+height, y+height, y], 'r-')
-                plt.text(x + width/2, y + height/2, node_name, fontsize=8, ha='center', va='center')
-            
-            # 绘制可移动节点
-            for node_name, node in self.movable_nodes.items():
-                x = node['x']
-                y = node['y']
-                width = node['width']
-                height = node['height']
-                plt.plot([x, x+width, x+width, x, x], [y, y, y+height, y+height, y], 'b-')
-                
-                # 对于大型节点显示名称
-                if width * height > 100:
-                    plt.text(x + width/2, y + height/2, node_name, fontsize=6, ha='center', va='center')
-            
-            # 设置图形属性
-            plt.title(f'Initial Placement Result for {self.basename}')
-            plt.xlabel('X Coordinate')
-            plt.ylabel('Y Coordinate')
-            plt.grid(True)
-            
-            # 保存或显示图形
+            db = self.db
+            title = f'Initial Placement Result for {self.basename}'
+            used = render_placement(output_file, title, self.core_lower_left, self.core_upper_right,
+                                    db.x, db.y, db.width, db.height, db.fixed, db.names, mode,
+                                    min_bin_size=self.row_height)
             if output_file:
-                plt.savefig(output_file, dpi=300, bbox_inches='tight')
-                plt.close()
-                print(f"已将可视化结果保存到 {output_file}")
-            else:
-                plt.show()
+                print(f"已将可视化结果保存到 {output_file}（{'密度热图' if used == 'density' else '逐单元绘制'}）")
+            
+            # 输出分块图像
+            if tile_levels > 0 and output_file:
+                tile_dir = os.path.join(os.path.dirname(output_file), f"{self.basename}_tiles")
+                os.makedirs(tile_dir, exist_ok=True)
+                files = render_tiles(tile_dir, self.basename, self.core_lower_left, self.core_upper_right,
+                                     db.x, db.y, db.width, db.height, db.fixed, db.names, tile_levels,
+                                     min_bin_size=self.row_height)
+                print(f"已将{len(files)}张分块图像保存到 {tile_dir}")
                 
             return True
             
@@ -724,67 +871,175 @@ class BookshelfParser:
             print(f"可视化初始布局结果时出错: {e}")
             return False
     
+    def density_grid(self):
+        """
+        按 self.bin_dimension 建立核心区域的Bin网格，Bin的边长不小于行高（小设计的网格相应缩小），
+        并更新 self.bin_step
+        
+        返回值:
+            DensityGrid: Bin网格
+        """
+        bin_dimension = fit_bin_dimension(self.core_lower_left, self.core_upper_right, self.row_height,
+                                          self.bin_dimension)
+        grid = DensityGrid(self.core_lower_left, self.core_upper_right, bin_dimension)
+        self.bin_step = list(grid.bin_step)
+        return grid
+    
+    def compute_overflow(self, target_density=1.0):
+        """
+        计算当前布局在Bin网格上的总溢出率
+        
+        参数:
+            target_density (float): 目标密度
+        
+        返回值:
+            float: 溢出率
+        """
+        db = self.db
+        grid = self.density_grid()
+        movable = db.movable_ids()
+        fixed = db.fixed_ids()
+        movable_usage = grid.rasterize(db.x[movable], db.y[movable], db.width[movable], db.height[movable])
+        fixed_usage = grid.rasterize(db.x[fixed], db.y[fixed], db.width[fixed], db.height[fixed])
+        return grid.overflow(movable_usage, fixed_usage, target_density)
+    
+    def global_place(self, net_model="clique", hybrid_threshold=HYBRID_THRESHOLD, solver=None,
+                     target_overflow=TARGET_OVERFLOW, max_iterations=MAX_ITERATIONS, target_density=1.0):
+        """
+        密度驱动的全局布局
+        
+        在二次规划的解上迭代：按Bin容量扩散单元得到目标位置，为每个可移动单元添加指向目标位置的
+        锚点伪网表后重新求解二次规划，锚点权重随迭代次数线性增加，直到溢出率不超过target_overflow
+        或达到最大迭代次数。每次迭代的线长和溢出率保存在 self.global_history 中。
+        
+        参数:
+            net_model (str): 网表模型
+            hybrid_threshold (int): 混合模型中使用团模型的最大网表度数
+            solver (QPSolver, optional): 线性方程组求解器，为None时使用稀疏直接法
+            target_overflow (float): 目标溢出率
+            max_iterations (int): 最大迭代次数
+            target_density (float): 目标密度，Bin容量为目标密度乘以未被固定单元占据的面积
+        
+        返回值:
+            bool: 求解是否成功
+        """
+        if solver is None:
+            solver = QPSolver()
+        db = self.db
+        grid = self.density_grid()
+        movable = db.movable_ids()
+        fixed = db.fixed_ids()
+        width = db.width[movable]
+        height = db.height[movable]
+        fixed_usage = grid.rasterize(db.x[fixed], db.y[fixed], db.width[fixed], db.height[fixed])
+        capacity = target_density * np.maximum(grid.bin_area - fixed_usage, 0)
+        self.global_history = []
+        
+        # 团、星和混合模型的矩阵与布局无关，只组装一次；Bound2Bound模型每次迭代按当前布局重新组装
+        matrix = None
+        for iteration in range(max_iterations + 1):
+            x = db.x[movable]
+            y = db.y[movable]
+            overflow = grid.overflow(grid.rasterize(x, y, width, height), fixed_usage, target_density)
+            hpwl = float(db.hpwl())
+            self.global_history.append({"iteration": iteration, "hpwl": hpwl, "overflow": overflow})
+            print(f"  \u5168局布局迭代 {iteration}: 线长 {hpwl:.2f}，溢出率 {overflow:.4f}")
+            if overflow <= target_overflow or iteration == max_iterations:
+                return True
+            
+            target_x, target_y = spread_targets(grid, x, y, width, height, capacity)
+            if matrix is None or net_model == "b2b":
+                matrix = self.build_quadratic_matrix(net_model=net_model, hybrid_threshold=hybrid_threshold)
+                if matrix[0] is None:
+                    return False
+            A_x, b_x, A_y, b_y = matrix
+            # 两个方向的锚点权重相同，矩阵为同一对象时仍共用，直接法只需分解一次
+            weight = ANCHOR_RATIO * (iteration + 1) * float(A_x.diagonal()[:len(movable)].mean())
+            anchored = add_anchor_springs(A_x, weight, len(movable))
+            A_y = anchored if A_y is A_x else add_anchor_springs(A_y, weight, len(movable))
+            A_x = anchored
+            b_x = anchor_rhs(b_x, weight, target_x)
+            b_y = anchor_rhs(b_y, weight, target_y)
+            try:
+                x, y = solver.solve(A_x, b_x, A_y, b_y)
+            except Exception as e:
+                print(f"\u6c42解全局布局的线性方程组时出错: {e}")
+                return False
+            db.x[movable] = x[:len(movable)]
+            db.y[movable] = y[:len(movable)]
+        return True
+    
+    def nesterov_place(self, target_overflow=TARGET_OVERFLOW, max_iterations=NESTEROV_ITERATIONS,
+                       target_density=1.0):
+        """
+        基于静电场密度模型的全局布局（加权平均线长 + Nesterov加速梯度法）
+        
+        从当前布局（通常为二次规划的解）开始迭代，直到溢出率不超过target_overflow或达到最大迭代次数。
+        线长和溢出率的记录保存在 self.global_history 中。
+        
+        参数:
+            target_overflow (float): 目标溢出率
+            max_iterations (int): 最大迭代次数
+            target_density (float): 目标密度，用于计算溢出率
+        
+        返回值:
+            bool: 优化是否成功
+        """
+        db = self.db
+        grid = self.density_grid()
+        fixed = db.fixed_ids()
+        fixed_usage = grid.rasterize(db.x[fixed], db.y[fixed], db.width[fixed], db.height[fixed])
+        placer = NesterovPlacer(db, grid, fixed_usage, target_density)
+        
+        def report(iteration, hpwl, overflow):
+            print(f"  \u5168局布局迭代 {iteration}: 线长 {hpwl:.2f}，溢出率 {overflow:.4f}")
+        
+        placer.place(target_overflow, max_iterations, report)
+        self.global_history = placer.history
+        return bool(np.all(np.isfinite(db.x)) and np.all(np.isfinite(db.y)))
+    
     def print_placement_statistics(self):
         """
         打印初始布局统计信息
         
-        计算并打印初始布局的各种统计信息。
+        计算并打印初始布局的各种统计信息，结果同时保存在 self.placement_stats 中。
         """
         try:
-            # 计算布局统计信息
-            total_wirelength = 0
-            total_overlap = 0
-            out_of_bounds = 0
-            
-            # 计算总布线长度
-            for net in self.nets:
-                pins = net['pins']
-                if len(pins) <= 1:
-                    continue
-                    
-                # 计算半周长布线长度
-                min_x = float('inf')
-                max_x = float('-inf')
-                min_y = float('inf')
-                max_y = float('-inf')
-                
-                for pin in pins:
-                    node_name = pin['node']
-                    if node_name in self.nodes:
-                        node = self.nodes[node_name]
-                        x = node['x'] + node['width'] / 2  # 使用节点中心
-                        y = node['y'] + node['height'] / 2
-                        
-                        min_x = min(min_x, x)
-                        max_x = max(max_x, x)
-                        min_y = min(min_y, y)
-                        max_y = max(max_y, y)
-                
-                # 半周长布线长度
-                wirelength = (max_x - min_x) + (max_y - min_y)
-                total_wirelength += wirelength
+            db = self.db
             
-            # 检查超出边界的节点
+            # 计算总布线长度（半周长布线长度，引脚位置为节点中心加引脚偏移）
+            total_wirelength = db.hpwl()
+            
+            # 检查超出边界的节点（核心区域右上角为最后一个站点和最上面一行内的坐标，节点可以贴着行的右端和上端）
             min_x, min_y = self.core_lower_left
             max_x, max_y = self.core_upper_right
+            max_x += 1
+            max_y += 1
             
-            for node_name, node in self.movable_nodes.items():
-                x = node['x']
-                y = node['y']
-                width = node['width']
-                height = node['height']
-                
-                if x < min_x or y < min_y or x + width > max_x or y + height > max_y:
-                    out_of_bounds += 1
+            movable = db.movable_ids()
+            x = db.x[movable]
+            y = db.y[movable]
+            out_of_bounds = int(np.count_nonzero((x < min_x) | (y < min_y) |
+                                                 (x + db.width[movable] > max_x) |
+                                                 (y + db.height[movable] > max_y)))
+            
+            # 计算Bin网格上的溢出率
+            overflow = self.compute_overflow()
+            
+            self.placement_stats = {"node_count": db.node_count, "movable_count": len(movable),
+                                    "fixed_count": db.node_count - len(movable), "net_count": db.net_count,
+                                    "hpwl": float(total_wirelength), "out_of_bounds": out_of_bounds,
+                                    "overflow": overflow}
             
             # 打印统计信息
             print("\n初始布局统计信息:")
-            print(f"\u603b节点数: {len(self.nodes)}")
-            print(f"\u53ef移动节点数: {len(self.movable_nodes)}")
-            print(f"\u56fa定节点数: {len(self.fixed_nodes)}")
-            print(f"\u7f51表数: {len(self.nets)}")
+            print(f"\u603b节点数: {db.node_count}")
+            print(f"\u53ef移动节点数: {len(movable)}")
+            print(f"\u56fa定节点数: {db.node_count - len(movable)}")
+            print(f"\u7f51表数: {db.net_count}")
             print(f"\u603b布线长度: {total_wirelength:.2f}")
             print(f"\u8d85出边界节点数: {out_of_bounds}")
+            print(f"\u6ea2出率: {overflow:.4f}")
             print(f"\u6838心区域: ({self.core_lower_left[0]}, {self.core_lower_left[1]}) - ({self.core_upper_right[0]}, {self.core_upper_right[1]})")
             
         except Exception as e:
@@ -808,7 +1063,12 @@ class InitialPlacement:
         self.basename = os.path.basename(directory)
         self.parser = BookshelfParser(directory)
         
-    def run(self, output_dir=None, visualize=True):
+    def run(self, output_dir=None, visualize=True, net_model="clique", hybrid_threshold=HYBRID_THRESHOLD,
+            solver="direct", preconditioner="jacobi", tol=DEFAULT_TOL, maxiter=DEFAULT_MAXITER,
+            estimate_condition=False, use_cache=True, parallel_parse=False, nets_workers=1, header_only=False,
+            metrics_file=None, compress_output=False, plot_mode="auto", tile_levels=0, global_place=False,
+            target_overflow=TARGET_OVERFLOW, max_iterations=MAX_ITERATIONS, target_density=1.0, nesterov=False,
+            nesterov_iterations=NESTEROV_ITERATIONS, abacus=True, legalize_workers=1):
         """
         运行初始布局算法
         
@@ -817,61 +1077,150 @@ class InitialPlacement:
         参数:
             output_dir (str, optional): 输出目录路径，如果为None则使用输入目录
             visualize (bool): 是否可视化结果
+            net_model (str): 二次规划使用的网表模型，可选 clique、star、b2b、hybrid
+            hybrid_threshold (int): 混合模型中使用团模型的最大网表度数
+            solver (str): 线性方程组求解后端，可选 direct、cg
+            preconditioner (str): 共轭梯度法的预条件方式，可选 jacobi、ichol、none
+            tol (float): 共轭梯度法的相对残差容差
+            maxiter (int): 共轭梯度法的最大迭代次数
+            estimate_condition (bool): 是否估计二次规划矩阵的条件数
+            use_cache (bool): 是否使用设计目录下的二进制缓存
+            parallel_parse (bool): 是否在进程池中并行读取各个输入文件
+            nets_workers (int): 分块并行读取.nets文件的进程数，1表示不分块
+            header_only (bool): 只输出从文件开头读取的设计规模信息，不解析文件也不进行布局
+            metrics_file (str, optional): 运行指标（解析统计、各阶段耗时、线长、溢出率、内存峰值）的输出文件，
+                                          .csv后缀为CSV格式，其他后缀为JSON Lines格式，为None时不输出
+            compress_output (bool): 是否把布局结果写成gzip压缩的.pl.gz文件
+            plot_mode (str): 可视化的绘制方式，可选 auto、cells、density
+            tile_levels (int): 可视化时另外输出的分块图像层级数，0表示不输出
+            global_place (bool): 是否在二次规划之后进行密度驱动的全局布局
+            target_overflow (float): 全局布局的目标溢出率
+            max_iterations (int): 全局布局的最大迭代次数
+            target_density (float): 全局布局的目标密度
+            nesterov (bool): 是否在二次规划之后改用静电场密度模型和Nesterov加速梯度法进行全局布局
+            nesterov_iterations (int): Nesterov全局布局的最大迭代次数
+            abacus (bool): 合法化时是否在Tetris之后进行Abacus优化
+            legalize_workers (int): 按行带并行合法化的进程数，1表示串行
             
         返回值:
             bool: 初始布局是否成功
         """
+        self.metrics = RunMetrics("initial_placement", self.basename)
+        completed = False
         try:
             # 设置输出目录
             if output_dir is None:
                 output_dir = self.directory
             
+            # 设计规模信息只需扫描文件开头
+            self.parser.parse_aux()
+            header = self.parser.read_header()
+            if header:
+                print("\u8bbe计规模: " + "，".join(f"{key} {value}" for key, value in header.items()))
+                self.metrics.add_parse_stats(header)
+            if header_only:
+                completed = True
+                return True
+            
             # 解析数据
             print(f"\u6b63在解析 {self.basename} 的BookShelf格式文件...")
-            parse_time = self.parser.parse_all()
-            print(f"\u6570据解析完成，耗时 {parse_time:.4f} 秒")
+            parse_time = self.parser.parse_all(use_cache, parallel_parse, nets_workers)
+            source = "（从缓存加载）" if self.parser.cache_hit else ""
+            print(f"\u6570据解析完成{source}，耗时 {parse_time:.4f} 秒")
+            if self.parser.parse_times:
+                print(f"  {self.parser.format_parse_times()}")
+            self.metrics.add_parse_stats(self.parser.parse_stats())
+            self.metrics.add_parse_stats({"cache_hit": self.parser.cache_hit})
+            self.metrics.add_timing("parse", parse_time)
+            for key, elapsed in self.parser.parse_times.items():
+                self.metrics.add_timing(f"parse_{key}", elapsed)
+            for key, elapsed in self.parser.decompress_times.items():
+                self.metrics.add_timing(f"decompress_{key}", elapsed)
             
             # 求解二次解析器
-            print("\u6b63在使用二次解析器计算初始布局...")
+            print(f"\u6b63在使用二次解析器计算初始布局（网表模型: {net_model}，求解器: {solver}）...")
             start_time = time.time()
-            success = self.parser.solve_quadratic_placement()
+            qp_solver = QPSolver(solver, preconditioner, tol, maxiter)
+            self.parser.estimate_condition = estimate_condition
+            success = self.parser.solve_quadratic_placement(net_model, hybrid_threshold, solver=qp_solver)
             if not success:
                 print("\u4e8c次解析器求解失败")
                 return False
             qp_time = time.time() - start_time
             print(f"\u4e8c次解析器求解完成，耗时 {qp_time:.4f} 秒")
+            self.metrics.add_timing("qp", qp_time)
+            
+            # 密度驱动的全局布局
+            if global_place or nesterov:
+                method = "Nesterov" if nesterov else "锚点伪网表"
+                print(f"\u6b63在进行全局布局（方法: {method}，目标溢出率: {target_overflow}，目标密度: {target_density}）...")
+                start_time = time.time()
+                if nesterov:
+                    success = self.parser.nesterov_place(target_overflow, nesterov_iterations, target_density)
+                else:
+                    success = self.parser.global_place(net_model, hybrid_threshold, qp_solver, target_overflow,
+                                                       max_iterations, target_density)
+                if not success:
+                    print("\u5168局布局失败")
+                    return False
+                global_time = time.time() - start_time
+                print(f"\u5168局布局完成，迭代 {self.parser.global_history[-1]['iteration']} 次，耗时 {global_time:.4f} 秒")
+                self.metrics.add_timing("global", global_time)
+                self.metrics.set(global_history=self.parser.global_history)
             
             # 合法化初始布局
             print("\u6b63在合法化初始布局...")
             start_time = time.time()
-            success = self.parser.legalize_placement()
+            success = self.parser.legalize_placement(abacus, legalize_workers)
+            # 合法化失败时也记录统计，失败数可以从指标文件中查到
+            if self.parser.legalize_stats:
+                self.metrics.set(legalization=self.parser.legalize_stats)
             if not success:
                 print("\u521d始布局合法化失败")
                 return False
             legalize_time = time.time() - start_time
             print(f"\u521d始布局合法化完成，耗时 {legalize_time:.4f} 秒")
+            self.metrics.add_timing("legalize", legalize_time)
             
             # 输出结果
-            output_pl_file = os.path.join(output_dir, f"{self.basename}_initial.pl")
+            suffix = ".pl.gz" if compress_output else ".pl"
+            output_pl_file = os.path.join(output_dir, f"{self.basename}_initial{suffix}")
+            start_time = time.time()
             success = self.parser.write_placement_result(output_pl_file)
             if not success:
                 print(f"\u5199入初始布局结果到 {output_pl_file} 失败")
                 return False
             print(f"\u521d始布局结果已写入到 {output_pl_file}")
+            self.metrics.add_timing("write", time.time() - start_time)
             
             # 打印统计信息
+            start_time = time.time()
             self.parser.print_placement_statistics()
+            self.metrics.set(**self.parser.placement_stats)
+            self.metrics.add_timing("statistics", time.time() - start_time)
             
             # 可视化结果
             if visualize:
                 output_img_file = os.path.join(output_dir, f"{self.basename}_initial.png")
-                self.parser.visualize_placement(output_img_file)
+                start_time = time.time()
+                self.parser.visualize_placement(output_img_file, plot_mode, tile_levels)
+                self.metrics.add_timing("visualize", time.time() - start_time)
             
+            completed = True
             return True
             
         except Exception as e:
             print(f"\u8fd0行初始布局算法时出错: {e}")
             return False
+        
+        finally:
+            self.metrics.finish("ok" if completed else "failed")
+            if metrics_file:
+                try:
+                    self.metrics.write(metrics_file)
+                    print(f"\u8fd0行指标已写入到 {metrics_file}")
+                except OSError as e:
+                    print(f"\u5199入运行指标失败: {e}")
 
 
 def main():
@@ -884,11 +1233,74 @@ def main():
     parser.add_argument("directory", help="BookShelf格式文件所在的目录路径")
     parser.add_argument("-o", "--output", help="输出目录路径，默认为输入目录")
     parser.add_argument("-v", "--visualize", action="store_true", help="是否可视化结果")
+    parser.add_argument("--net-model", choices=NET_MODELS, default="clique",
+                        help="二次规划使用的网表模型，默认为clique")
+    parser.add_argument("--hybrid-threshold", type=int, default=HYBRID_THRESHOLD,
+                        help=f"hybrid模型中使用团模型的最大网表度数，默认为{HYBRID_THRESHOLD}")
+    parser.add_argument("--solver", choices=SOLVERS, default="direct",
+                        help="线性方程组求解后端：direct为稀疏直接法，cg为预条件共轭梯度法，默认为direct")
+    parser.add_argument("--preconditioner", choices=PRECONDITIONERS, default="jacobi",
+                        help="共轭梯度法的预条件方式，默认为jacobi")
+    parser.add_argument("--tol", type=float, default=DEFAULT_TOL,
+                        help=f"共轭梯度法的相对残差容差，默认为{DEFAULT_TOL}")
+    parser.add_argument("--maxiter", type=int, default=DEFAULT_MAXITER,
+                        help=f"共轭梯度法的最大迭代次数，默认为{DEFAULT_MAXITER}")
+    parser.add_argument("--condition", action="store_true",
+                        help="估计二次规划矩阵的条件数（需要额外的LU分解）")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不读取也不写入设计目录下的二进制缓存，始终解析文本文件")
+    parser.add_argument("--parallel-parse", action="store_true",
+                        help="在进程池中并行读取.nodes、.nets、.scl和.pl文件")
+    parser.add_argument("--header-only", action="store_true",
+                        help="只扫描输入文件的开头，输出设计规模（NumNodes、NumNets、NumPins、NumRows等）后退出")
+    parser.add_argument("--nets-workers", type=int, default=1,
+                        help="在NetDegree行处分块、并行读取.nets文件的进程数，0表示使用所有CPU核，默认为1（不分块）")
+    parser.add_argument("--plot-mode", choices=PLOT_MODES, default="auto",
+                        help="可视化的绘制方式：cells逐单元绘制，density绘制可移动单元的密度热图，"
+                             "auto在单元数较多时使用密度热图，默认为auto")
+    parser.add_argument("--tile-levels", type=int, default=0,
+                        help="可视化时另外输出N层分块图像（第k层为2^k×2^k块），默认为0（不输出）")
+    flow = parser.add_mutually_exclusive_group()
+    flow.add_argument("--global-place", action="store_true",
+                      help="在二次规划之后进行密度驱动的全局布局（扩散单元并用锚点伪网表迭代求解）")
+    flow.add_argument("--nesterov", action="store_true",
+                      help="在二次规划之后进行基于静电场密度模型的全局布局（加权平均线长 + Nesterov加速梯度法）")
+    parser.add_argument("--target-overflow", type=float, default=TARGET_OVERFLOW,
+                        help=f"全局布局的目标溢出率，默认为{TARGET_OVERFLOW}")
+    parser.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS,
+                        help=f"全局布局的最大迭代次数，默认为{MAX_ITERATIONS}")
+    parser.add_argument("--nesterov-iterations", type=int, default=NESTEROV_ITERATIONS,
+                        help=f"Nesterov全局布局的最大迭代次数，默认为{NESTEROV_ITERATIONS}")
+    parser.add_argument("--target-density", type=float, default=1.0,
+                        help="全局布局的目标密度（Bin中可移动单元面积与可用面积之比的上限），默认为1.0")
+    parser.add_argument("--no-abacus", action="store_true",
+                        help="合法化时只进行Tetris贪心放置，不进行Abacus优化")
+    parser.add_argument("--legalize-workers", type=int, default=1,
+                        help="按空闲面积划分行带、并行合法化的进程数，0表示使用所有CPU核，默认为1（串行）")
+    parser.add_argument("--gzip", action="store_true",
+                        help="把布局结果写成gzip压缩的<basename>_initial.pl.gz")
+    parser.add_argument("--metrics",
+                        help="把运行指标（解析统计、各阶段耗时、线长、溢出率、内存峰值）追加到该文件，"
+                             ".csv后缀为CSV格式，其他后缀为JSON Lines格式")
     args = parser.parse_args()
+    if args.nets_workers <= 0:
+        args.nets_workers = os.cpu_count() or 1
+    if args.legalize_workers <= 0:
+        args.legalize_workers = os.cpu_count() or 1
     
     # 创建初始布局对象并运行
     placement = InitialPlacement(args.directory)
-    success = placement.run(args.output, args.visualize)
+    success = placement.run(output_dir=args.output, visualize=args.visualize, net_model=args.net_model,
+                            hybrid_threshold=args.hybrid_threshold, solver=args.solver,
+                            preconditioner=args.preconditioner, tol=args.tol, maxiter=args.maxiter,
+                            estimate_condition=args.condition, use_cache=not args.no_cache,
+                            parallel_parse=args.parallel_parse, nets_workers=args.nets_workers,
+                            header_only=args.header_only, metrics_file=args.metrics, compress_output=args.gzip,
+                            plot_mode=args.plot_mode, tile_levels=args.tile_levels, global_place=args.global_place,
+                            target_overflow=args.target_overflow, max_iterations=args.max_iterations,
+                            target_density=args.target_density, nesterov=args.nesterov,
+                            nesterov_iterations=args.nesterov_iterations, abacus=not args.no_abacus,
+                            legalize_workers=args.legalize_workers)
     
     if success:
         print("\n初始布局程序执行成功!")
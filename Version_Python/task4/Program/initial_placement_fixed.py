@@ -13,10 +13,17 @@ import os
 import sys
 import time
 import math
+from array import array
 import numpy as np
 from scipy import sparse
 from scipy.sparse.linalg import spsolve
-import matplotlib.pyplot as plt
+
+from compressed_input import open_input, resolve_input
+from row_segments import RowSegments
+from row_legalizer import RowLegalizer
+from placement_writer import write_pl
+from qp_assembly import anchor_floating_components
+from placement_view import render_placement
 
 class BookshelfParser:
     """
@@ -57,6 +64,7 @@ class BookshelfParser:
         self.row_height = 0            # Row height
         self.row_number = 0            # Number of rows
         self.site_step = 0             # Site step
+        self.rows = []                 # (SubrowOrigin, Coordinate, Height, Sitewidth, NumSites) of each row
         
         # Area related information
         self.core_area = 0          # Core region area
@@ -89,7 +97,9 @@ class BookshelfParser:
         
         # Initial placement related data structures
         self.nodes = {}  # Store all node information, key is node name, value is node object
-        self.nets = []   # Store all net information
+        self.node_list = []  # Node objects indexed by integer node id (order of the .nodes file)
+        self.node_ids = {}   # Interned name table shared by .nodes/.nets/.pl: node name -> node id
+        self.nets = []   # Store all net information, pins refer to nodes by integer id
         self.fixed_nodes = {}  # Store fixed node information
         self.movable_nodes = {}  # Store movable node information
         
@@ -98,9 +108,11 @@ class BookshelfParser:
         Parse .aux file to get names of other files
         
         The .aux file is the entry file of BookShelf format, which specifies the names of other related files.
+        Files that only exist in compressed form (.gz/.bz2/.xz/.zst) are resolved to the compressed path.
         """
+        self.aux_file = resolve_input(self.aux_file)
         try:
-            with open(self.aux_file, 'r') as f:
+            with open_input(self.aux_file) as f:
                 line = f.readline().strip()  # Read the first line
                 if "RowBasedPlacement" in line:  # Check if it contains the keyword
                     files = line.split(':')[1].strip().split()  # Split and get the file name list
@@ -113,6 +125,8 @@ class BookshelfParser:
                         self.scl_file = os.path.join(self.directory, files[4])    # Row structure file
         except Exception as e:
             print(f"Error parsing .aux file: {e}")
+        for key in ("nodes", "nets", "wts", "pl", "scl"):
+            setattr(self, f"{key}_file", resolve_input(getattr(self, f"{key}_file")))
     
     def parse_nodes(self):
         """
@@ -121,7 +135,7 @@ class BookshelfParser:
         The .nodes file defines the cells and terminals in the circuit, including their dimensions.
         """
         try:
-            with open(self.nodes_file, 'r') as f:
+            with open_input(self.nodes_file) as f:
                 lines = f.readlines()
                 
                 # Parse header information
@@ -154,12 +168,13 @@ class BookshelfParser:
                     if node_start:
                         parts = line.split()
                         if len(parts) >= 3:
-                            node_name = parts[0]
+                            node_name = sys.intern(parts[0])
                             width = int(parts[1])
                             height = int(parts[2])
                             
                             # Create node object
                             node = {
+                                'id': len(self.node_list),
                                 'name': node_name,
                                 'width': width,
                                 'height': height,
@@ -177,6 +192,8 @@ class BookshelfParser:
                                 self.movable_nodes[node_name] = node
                                 
                             self.nodes[node_name] = node
+                            self.node_ids[node_name] = node['id']
+                            self.node_list.append(node)
                 
                 # Calculate total cell area
                 self.cell_area = sum(node['area'] for node in self.movable_nodes.values())
@@ -190,9 +207,11 @@ class BookshelfParser:
         Parse .nets file to get net information
         
         The .nets file defines the net connections in the circuit, including the degree of each net and the connected pins.
+        Each pin's node name is resolved to its integer node id once here, so later passes index node_list
+        instead of hashing name strings.
         """
         try:
-            with open(self.nets_file, 'r') as f:
+            with open_input(self.nets_file) as f:
                 lines = f.readlines()
                 
                 # Parse header information
@@ -211,6 +230,7 @@ class BookshelfParser:
                 # Parse information for each net
                 current_net = None
                 net_pins = []
+                net_offsets = array('d')  # Pin offsets from the node center, stored as dx0, dy0, dx1, dy1, ...
                 net_degrees = []
                 
                 for line in lines:
@@ -227,6 +247,7 @@ class BookshelfParser:
                             self.nets.append({
                                 'name': current_net,
                                 'pins': net_pins,
+                                'offsets': net_offsets,
                                 'degree': len(net_pins)
                             })
                             net_degrees.append(len(net_pins))
@@ -237,6 +258,7 @@ class BookshelfParser:
                         net_name = parts[1].strip().split()[1] if len(parts[1].strip().split()) > 1 else f"net_{len(self.nets)}"
                         current_net = net_name
                         net_pins = []
+                        net_offsets = array('d')
                     else:
                         # Parse pin information
                         parts = line.split()
@@ -245,17 +267,26 @@ class BookshelfParser:
                             pin_type = parts[1] if len(parts) > 1 else "I"  # Default to input pin
                             
                             # Check if the node exists
-                            if node_name in self.nodes:
+                            node_id = self.node_ids.get(node_name)
+                            if node_id is not None:
                                 net_pins.append({
-                                    'node': node_name,
+                                    'node_id': node_id,
                                     'type': pin_type
                                 })
+                                
+                                # Pin offset format: <node> <I/O> : <dx> <dy>
+                                if len(parts) >= 5 and parts[2] == ':':
+                                    net_offsets.append(float(parts[3]))
+                                    net_offsets.append(float(parts[4]))
+                                else:
+                                    net_offsets.extend((0.0, 0.0))
                 
                 # Save the last net
                 if current_net is not None and net_pins:
                     self.nets.append({
                         'name': current_net,
                         'pins': net_pins,
+                        'offsets': net_offsets,
                         'degree': len(net_pins)
                     })
                     net_degrees.append(len(net_pins))
@@ -278,7 +309,7 @@ class BookshelfParser:
         The .scl file defines the row structure information in the layout, including the number of rows, row height, and site width.
         """
         try:
-            with open(self.scl_file, 'r') as f:
+            with open_input(self.scl_file) as f:
                 lines = f.readlines()
                 
                 # Initialize variables
@@ -330,7 +361,7 @@ class BookshelfParser:
                                     parts = row_line.split(':')
                                     if len(parts) >= 3:
                                         x_origin = int(parts[1].strip().split()[0])
-                                        num_sites = int(parts[2].strip().split()[1])
+                                        num_sites = int(parts[2].strip().split()[0])
                                         
                                         row_info['x'] = x_origin
                                         row_info['num_sites'] = num_sites
@@ -345,6 +376,11 @@ class BookshelfParser:
                                     pass
                             
                             j += 1
+                        
+                        if 'x' in row_info and 'y' in row_info:
+                            self.rows.append((row_info['x'], row_info['y'], row_info.get('height', self.row_height),
+                                              row_info.get('site_width', self.site_step or 1),
+                                              row_info['num_sites']))
                 
                 # Set core region coordinates
                 if min_x != float('inf') and min_y != float('inf') and max_x != float('-inf') and max_y != float('-inf'):
@@ -370,7 +406,7 @@ class BookshelfParser:
         The .pl file defines the placement positions of cells, including coordinates and orientation.
         """
         try:
-            with open(self.pl_file, 'r') as f:
+            with open_input(self.pl_file) as f:
                 lines = f.readlines()
                 
                 # Skip header information
@@ -397,16 +433,17 @@ class BookshelfParser:
                         orientation = parts[3]
                         
                         # Check if the node exists
-                        if node_name in self.nodes:
-                            node = self.nodes[node_name]
+                        node_id = self.node_ids.get(node_name)
+                        if node_id is not None:
+                            node = self.node_list[node_id]
                             node['x'] = x
                             node['y'] = y
                             node['orientation'] = orientation
                             
                             # Check if it's a fixed node
-                            if orientation == "F" or node_name in self.fixed_nodes:
+                            if orientation == "F" or node['is_fixed']:
                                 node['is_fixed'] = True
-                                self.fixed_nodes[node_name] = node
+                                self.fixed_nodes[node['name']] = node
                                 
                                 # Calculate fixed area
                                 if 'area' in node:
@@ -458,11 +495,13 @@ class BookshelfParser:
         """
         try:
             # Get the list of movable nodes
-            movable_nodes_list = list(self.movable_nodes.keys())
+            movable_nodes_list = list(self.movable_nodes.values())
             n = len(movable_nodes_list)
             
-            # Create mapping from node name to index
-            node_to_idx = {node: i for i, node in enumerate(movable_nodes_list)}
+            # Create mapping from node id to matrix index (-1 for fixed nodes)
+            node_to_idx = [-1] * len(self.node_list)
+            for i, node in enumerate(movable_nodes_list):
+                node_to_idx[node['id']] = i
             
             # Initialize data structures for sparse matrix
             rows = []
@@ -484,60 +523,61 @@ class BookshelfParser:
                 # Calculate weight between each pair of nodes
                 weight = 1.0 / (degree - 1)
                 
-                # Collect information about fixed nodes
-                fixed_x = 0
-                fixed_y = 0
-                fixed_count = 0
-                
-                # Process fixed nodes
-                for pin in pins:
-                    node_name = pin['node']
-                    if node_name in self.fixed_nodes:
-                        node = self.fixed_nodes[node_name]
-                        fixed_x += node['x']
-                        fixed_y += node['y']
-                        fixed_count += 1
+                # Pin shifts: offset from the lower-left corner for movable nodes,
+                # absolute pin position for fixed nodes
+                offsets = net['offsets']
+                shift_x = []
+                shift_y = []
+                pin_idx = []
+                for k, pin in enumerate(pins):
+                    node = self.node_list[pin['node_id']]
+                    dx = node['width'] / 2 + offsets[2 * k]
+                    dy = node['height'] / 2 + offsets[2 * k + 1]
+                    if node['is_fixed']:
+                        dx += node['x']
+                        dy += node['y']
+                    shift_x.append(dx)
+                    shift_y.append(dy)
+                    pin_idx.append(node_to_idx[pin['node_id']])
                 
                 # Add connections for each pair of movable nodes
-                for i, pin_i in enumerate(pins):
-                    node_i = pin_i['node']
-                    
+                for i, idx_i in enumerate(pin_idx):
                     # Skip fixed nodes
-                    if node_i not in self.movable_nodes:
+                    if idx_i < 0:
                         continue
                     
-                    idx_i = node_to_idx[node_i]
-                    
                     # Process connections between movable nodes
-                    for j, pin_j in enumerate(pins):
+                    for j, idx_j in enumerate(pin_idx):
                         if i == j:
                             continue
-                            
-                        node_j = pin_j['node']
                         
-                        if node_j in self.movable_nodes:
-                            # Connection between movable nodes
-                            idx_j = node_to_idx[node_j]
-                            
-                            # Add diagonal element
-                            rows.append(idx_i)
-                            cols.append(idx_i)
-                            data.append(weight)
-                            
-                            # Add off-diagonal element
+                        # Every connection adds to the diagonal, including one to a fixed node
+                        rows.append(idx_i)
+                        cols.append(idx_i)
+                        data.append(weight)
+                        
+                        if idx_j >= 0:
+                            # Connection between movable nodes: add off-diagonal element
                             rows.append(idx_i)
                             cols.append(idx_j)
                             data.append(-weight)
-                    
-                    # Process influence of fixed nodes on movable nodes
-                    if fixed_count > 0:
-                        b_x[idx_i] += weight * fixed_x
-                        b_y[idx_i] += weight * fixed_y
+                        
+                        # Process influence of pin offsets and fixed nodes on movable nodes
+                        b_x[idx_i] += weight * (shift_x[j] - shift_x[i])
+                        b_y[idx_i] += weight * (shift_y[j] - shift_y[i])
             
             # Create sparse matrix
             A = sparse.coo_matrix((data, (rows, cols)), shape=(n, n))
             A = A.tocsr()  # Convert to CSR format for computational efficiency
             
+            # Components without a connection to a fixed node make the matrix singular;
+            # pull them towards the core center with weak pseudo anchors
+            center_x = (self.core_lower_left[0] + self.core_upper_right[0]) / 2
+            center_y = (self.core_lower_left[1] + self.core_upper_right[1]) / 2
+            A, (b_x, b_y), floating = anchor_floating_components(A, [b_x, b_y], [center_x, center_y])
+            if floating:
+                print(f"Anchored {floating} floating components to the core center")
+            
             return A, b_x, A, b_y
             
         except Exception as e:
@@ -561,7 +601,7 @@ class BookshelfParser:
                 return False
             
             # Get the list of movable nodes
-            movable_nodes_list = list(self.movable_nodes.keys())
+            movable_nodes_list = list(self.movable_nodes.values())
             
             # Solve linear equation system
             try:
@@ -570,10 +610,12 @@ class BookshelfParser:
             except Exception as e:
                 print(f"Error solving linear equation system: {e}")
                 return False
+            if not (np.all(np.isfinite(x)) and np.all(np.isfinite(y))):
+                print("Error solving linear equation system: the solution is not finite")
+                return False
             
             # Update node coordinates
-            for i, node_name in enumerate(movable_nodes_list):
-                node = self.movable_nodes[node_name]
+            for i, node in enumerate(movable_nodes_list):
                 node['x'] = float(x[i])
                 node['y'] = float(y[i])
             
@@ -583,35 +625,52 @@ class BookshelfParser:
             print(f"Error solving quadratic placement: {e}")
             return False
     
-    def legalize_placement(self):
+    def legalize_placement(self, abacus=True):
         """
         Legalize initial placement
         
-        Adjust the initial placement results to be within the core region, avoiding nodes exceeding boundaries.
-        This is a simplified legalization process that only performs boundary checking.
+        Place the movable nodes into the rows and sites of the .scl file (Tetris), optionally followed by
+        Abacus within each row, so that nodes no longer overlap. The parts of the rows covered by fixed
+        nodes are left empty. Without row information the nodes are
+        only moved into the core region. Fails when some nodes do not fit into the rows.
+        
+        Parameters:
+            abacus (bool): Whether to refine the Tetris result with Abacus
         """
         try:
-            # Get core region boundaries
-            min_x, min_y = self.core_lower_left
-            max_x, max_y = self.core_upper_right
-            
-            # Legalize each movable node
-            for node_name, node in self.movable_nodes.items():
-                # Consider node dimensions
-                width = node['width']
-                height = node['height']
-                
-                # Adjust X coordinate
-                if node['x'] < min_x:
-                    node['x'] = min_x
-                elif node['x'] + width > max_x:
-                    node['x'] = max_x - width
-                
-                # Adjust Y coordinate
-                if node['y'] < min_y:
-                    node['y'] = min_y
-                elif node['y'] + height > max_y:
-                    node['y'] = max_y - height
+            nodes = list(self.movable_nodes.values())
+            
+            if not self.rows:
+                # Get core region boundaries
+                min_x, min_y = self.core_lower_left
+                max_x, max_y = self.core_upper_right
+                
+                # Legalize each movable node
+                for node in nodes:
+                    node['x'] = min(max(node['x'], min_x), max_x - node['width'])
+                    node['y'] = min(max(node['y'], min_y), max_y - node['height'])
+                return True
+            
+            # Fixed nodes are carved out of the rows
+            fixed = list(self.fixed_nodes.values())
+            row_x, row_y, row_height, row_site_width, row_num_sites = zip(*self.rows)
+            segments = RowSegments(row_x, row_y, row_height, row_site_width, row_num_sites,
+                                   ([node['x'] for node in fixed], [node['y'] for node in fixed],
+                                    [node['width'] for node in fixed], [node['height'] for node in fixed]))
+            legalizer = RowLegalizer(segments)
+            new_x, new_y = legalizer.legalize([node['x'] for node in nodes], [node['y'] for node in nodes],
+                                              [node['width'] for node in nodes], [node['height'] for node in nodes],
+                                              abacus)
+            for node, x, y in zip(nodes, new_x, new_y):
+                node['x'] = x
+                node['y'] = y
+            
+            stats = legalizer.stats
+            print(f"Legalization displacement: total {stats['total_displacement']:.2f}, "
+                  f"max {stats['max_displacement']:.2f}")
+            if stats['failed']:
+                print(f"Error: {stats['failed']} nodes do not fit into the rows, the placement is not legal")
+                return False
             
             return True
             
@@ -619,32 +678,27 @@ class BookshelfParser:
             print(f"Error legalizing initial placement: {e}")
             return False
     
-    def write_placement_result(self, output_file):
+    def write_placement_result(self, output_file, integer=None):
         """
         Write initial placement results to file
         
-        Write the initial placement results to a .pl format file.
+        Write the initial placement results to a .pl format file, fixed nodes first.
+        Coordinates are formatted in bulk by placement_writer; a path ending in .gz is written gzip-compressed.
         
         Parameters:
             output_file (str): Output file path
+            integer (bool, optional): Write integer coordinates; None writes integers only when all coordinates are integral
             
         Returns:
             bool: Whether the write is successful
         """
         try:
-            with open(output_file, 'w') as f:
-                # Write header information
-                f.write("UCLA pl 1.0\n")
-                f.write("# Generated by Initial Placement Program\n")
-                f.write("# Date: " + time.strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
-                
-                # Write fixed node information
-                for node_name, node in self.fixed_nodes.items():
-                    f.write(f"{node_name}\t{node['x']:.6f}\t{node['y']:.6f}\t: F\n")
-                
-                # Write movable node information
-                for node_name, node in self.movable_nodes.items():
-                    f.write(f"{node_name}\t{node['x']:.6f}\t{node['y']:.6f}\t: N\n")
+            nodes = list(self.fixed_nodes.items()) + list(self.movable_nodes.items())
+            names = [node_name for node_name, _ in nodes]
+            x = np.fromiter((node['x'] for _, node in nodes), dtype=np.float64, count=len(nodes))
+            y = np.fromiter((node['y'] for _, node in nodes), dtype=np.float64, count=len(nodes))
+            fixed = np.arange(len(nodes)) < len(self.fixed_nodes)
+            write_pl(output_file, names, x, y, fixed, integer=integer)
                 
             return True
             
@@ -652,60 +706,28 @@ class BookshelfParser:
             print(f"Error writing initial placement results: {e}")
             return False
     
-    def visualize_placement(self, output_file=None):
+    def visualize_placement(self, output_file=None, mode="auto"):
         """
         Visualize initial placement results
         
-        Use matplotlib to visualize the initial placement results.
+        Use matplotlib to visualize the initial placement results. All cells are drawn by placement_view in one
+        PolyCollection; large designs switch to a density heatmap of the movable cells.
         
         Parameters:
             output_file (str, optional): Output image file path, if None then display the image
+            mode (str): "auto", "cells" or "density"
         """
         try:
-            # Create figure
-            plt.figure(figsize=(12, 10))
-            
-            # Draw core region
-            min_x, min_y = self.core_lower_left
-            max_x, max_y = self.core_upper_right
-            width = max_x - min_x
-            height = max_y - min_y
-            plt.plot([min_x, max_x, max_x, min_x, min_x], [min_y, min_y, max_y, max_y, min_y], 'k-', linewidth=2)
-            
-            # Draw fixed nodes
-            for node_name, node in self.fixed_nodes.items():
-                x = node['x']
-                y = node['y']
-                width = node['width']
-                height = node['height']
-                plt.plot([x, x+width, x+width, x, x], [y, y, y+height, y+height, y], 'r-')
-                plt.text(x + width/2, y + height/2, node_name, fontsize=8, ha='center', va='center')
-            
-            # Draw movable nodes
-            for node_name, node in self.movable_nodes.items():
-                x = node['x']
-                y = node['y']
-                width = node['width']
-                height = node['height']
-                plt.plot([x, x+width, x+width, x, x], [y, y, y+height, y+height, y], 'b-')
-                
-                # Show name for large nodes
-                if width * height > 100:
-                    plt.text(x + width/2, y + height/2, node_name, fontsize=6, ha='center', va='center')
-            
-            # Set figure properties
-            plt.title(f'Initial Placement Result for {self.basename}')
-            plt.xlabel('X Coordinate')
-            plt.ylabel('Y Coordinate')
-            plt.grid(True)
-            
-            # Save or display figure
+            nodes = list(self.fixed_nodes.items()) + list(self.movable_nodes.items())
+            columns = {key: np.fromiter((node[key] for _, node in nodes), dtype=np.float64, count=len(nodes))
+                       for key in ('x', 'y', 'width', 'height')}
+            fixed = np.arange(len(nodes)) < len(self.fixed_nodes)
+            render_placement(output_file, f'Initial Placement Result for {self.basename}',
+                             self.core_lower_left, self.core_upper_right, columns['x'], columns['y'],
+                             columns['width'], columns['height'], fixed, [node_name for node_name, _ in nodes],
+                             mode, min_bin_size=self.row_height)
             if output_file:
-                plt.savefig(output_file, dpi=300, bbox_inches='tight')
-                plt.close()
                 print(f"Visualization result saved to {output_file}")
-            else:
-                plt.show()
                 
             return True
             
@@ -737,25 +759,27 @@ class BookshelfParser:
                 min_y = float('inf')
                 max_y = float('-inf')
                 
-                for pin in pins:
-                    node_name = pin['node']
-                    if node_name in self.nodes:
-                        node = self.nodes[node_name]
-                        x = node['x'] + node['width'] / 2  # Use node center
-                        y = node['y'] + node['height'] / 2
-                        
-                        min_x = min(min_x, x)
-                        max_x = max(max_x, x)
-                        min_y = min(min_y, y)
-                        max_y = max(max_y, y)
+                offsets = net['offsets']
+                for k, pin in enumerate(pins):
+                    node = self.node_list[pin['node_id']]
+                    x = node['x'] + node['width'] / 2 + offsets[2 * k]  # Node center plus pin offset
+                    y = node['y'] + node['height'] / 2 + offsets[2 * k + 1]
+                    
+                    min_x = min(min_x, x)
+                    max_x = max(max_x, x)
+                    min_y = min(min_y, y)
+                    max_y = max(max_y, y)
                 
                 # Half-perimeter wirelength
                 wirelength = (max_x - min_x) + (max_y - min_y)
                 total_wirelength += wirelength
             
-            # Check nodes out of bounds
+            # Check nodes out of bounds (the upper right corner is the last coordinate inside the last
+            # site and the top row, so nodes may touch the right and top edges of the rows)
             min_x, min_y = self.core_lower_left
             max_x, max_y = self.core_upper_right
+            max_x += 1
+            max_y += 1
             
             for node_name, node in self.movable_nodes.items():
                 x = node['x']
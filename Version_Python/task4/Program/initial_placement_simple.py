@@ -12,8 +12,17 @@ This version doesn't rely on external libraries like numpy, scipy, and matplotli
 import os
 import sys
 import time
+import gzip
 import math
 import random
+from array import array
+
+from compressed_input import open_input, resolve_input
+from row_segments import RowSegments
+from row_legalizer import RowLegalizer
+
+# Number of nodes formatted per write call in write_placement_result
+WRITE_CHUNK = 1 << 16
 
 class BookshelfParser:
     """
@@ -54,6 +63,7 @@ class BookshelfParser:
         self.row_height = 0            # Row height
         self.row_number = 0            # Number of rows
         self.site_step = 0             # Site step
+        self.rows = []                 # (SubrowOrigin, Coordinate, Height, Sitewidth, NumSites) of each row
         
         # Area related information
         self.core_area = 0          # Core region area
@@ -82,7 +92,9 @@ class BookshelfParser:
         
         # Initial placement related data structures
         self.nodes = {}  # Store all node information, key is node name, value is node object
-        self.nets = []   # Store all net information
+        self.node_list = []  # Node objects indexed by integer node id (order of the .nodes file)
+        self.node_ids = {}   # Interned name table shared by .nodes/.nets/.pl: node name -> node id
+        self.nets = []   # Store all net information, pins refer to nodes by integer id
         self.fixed_nodes = {}  # Store fixed node information
         self.movable_nodes = {}  # Store movable node information
         
@@ -91,9 +103,11 @@ class BookshelfParser:
         Parse .aux file to get names of other files
         
         The .aux file is the entry file of BookShelf format, which specifies the names of other related files.
+        Files that only exist in compressed form (.gz/.bz2/.xz/.zst) are resolved to the compressed path.
         """
+        self.aux_file = resolve_input(self.aux_file)
         try:
-            with open(self.aux_file, 'r') as f:
+            with open_input(self.aux_file) as f:
                 line = f.readline().strip()  # Read the first line
                 if "RowBasedPlacement" in line:  # Check if it contains the keyword
                     files = line.split(':')[1].strip().split()  # Split and get the file name list
@@ -106,6 +120,8 @@ class BookshelfParser:
                         self.scl_file = os.path.join(self.directory, files[4])    # Row structure file
         except Exception as e:
             print(f"Error parsing .aux file: {e}")
+        for key in ("nodes", "nets", "wts", "pl", "scl"):
+            setattr(self, f"{key}_file", resolve_input(getattr(self, f"{key}_file")))
     
     def parse_nodes(self):
         """
@@ -114,7 +130,7 @@ class BookshelfParser:
         The .nodes file defines the cells and terminals in the circuit, including their dimensions.
         """
         try:
-            with open(self.nodes_file, 'r') as f:
+            with open_input(self.nodes_file) as f:
                 lines = f.readlines()
                 
                 # Parse header information
@@ -147,12 +163,13 @@ class BookshelfParser:
                     if node_start:
                         parts = line.split()
                         if len(parts) >= 3:
-                            node_name = parts[0]
+                            node_name = sys.intern(parts[0])
                             width = int(parts[1])
                             height = int(parts[2])
                             
                             # Create node object
                             node = {
+                                'id': len(self.node_list),
                                 'name': node_name,
                                 'width': width,
                                 'height': height,
@@ -170,6 +187,8 @@ class BookshelfParser:
                                 self.movable_nodes[node_name] = node
                                 
                             self.nodes[node_name] = node
+                            self.node_ids[node_name] = node['id']
+                            self.node_list.append(node)
                 
                 # Calculate total cell area
                 self.cell_area = sum(node['area'] for node in self.movable_nodes.values())
@@ -183,9 +202,11 @@ class BookshelfParser:
         Parse .nets file to get net information
         
         The .nets file defines the net connections in the circuit, including the degree of each net and the connected pins.
+        Each pin's node name is resolved to its integer node id once here, so later passes index node_list
+        instead of hashing name strings.
         """
         try:
-            with open(self.nets_file, 'r') as f:
+            with open_input(self.nets_file) as f:
                 lines = f.readlines()
                 
                 # Parse header information
@@ -204,6 +225,7 @@ class BookshelfParser:
                 # Parse information for each net
                 current_net = None
                 net_pins = []
+                net_offsets = array('d')  # Pin offsets from the node center, stored as dx0, dy0, dx1, dy1, ...
                 net_degrees = []
                 
                 for line in lines:
@@ -220,6 +242,7 @@ class BookshelfParser:
                             self.nets.append({
                                 'name': current_net,
                                 'pins': net_pins,
+                                'offsets': net_offsets,
                                 'degree': len(net_pins)
                             })
                             net_degrees.append(len(net_pins))
@@ -230,6 +253,7 @@ class BookshelfParser:
                         net_name = parts[1].strip().split()[1] if len(parts[1].strip().split()) > 1 else f"net_{len(self.nets)}"
                         current_net = net_name
                         net_pins = []
+                        net_offsets = array('d')
                     else:
                         # Parse pin information
                         parts = line.split()
@@ -238,17 +262,26 @@ class BookshelfParser:
                             pin_type = parts[1] if len(parts) > 1 else "I"  # Default to input pin
                             
                             # Check if the node exists
-                            if node_name in self.nodes:
+                            node_id = self.node_ids.get(node_name)
+                            if node_id is not None:
                                 net_pins.append({
-                                    'node': node_name,
+                                    'node_id': node_id,
                                     'type': pin_type
                                 })
+                                
+                                # Pin offset format: <node> <I/O> : <dx> <dy>
+                                if len(parts) >= 5 and parts[2] == ':':
+                                    net_offsets.append(float(parts[3]))
+                                    net_offsets.append(float(parts[4]))
+                                else:
+                                    net_offsets.extend((0.0, 0.0))
                 
                 # Save the last net
                 if current_net is not None and net_pins:
                     self.nets.append({
                         'name': current_net,
                         'pins': net_pins,
+                        'offsets': net_offsets,
                         'degree': len(net_pins)
                     })
                     net_degrees.append(len(net_pins))
@@ -271,7 +304,7 @@ class BookshelfParser:
         The .scl file defines the row structure information in the layout, including the number of rows, row height, and site width.
         """
         try:
-            with open(self.scl_file, 'r') as f:
+            with open_input(self.scl_file) as f:
                 lines = f.readlines()
                 
                 # Initialize variables
@@ -323,7 +356,7 @@ class BookshelfParser:
                                     parts = row_line.split(':')
                                     if len(parts) >= 3:
                                         x_origin = int(parts[1].strip().split()[0])
-                                        num_sites = int(parts[2].strip().split()[1])
+                                        num_sites = int(parts[2].strip().split()[0])
                                         
                                         row_info['x'] = x_origin
                                         row_info['num_sites'] = num_sites
@@ -338,6 +371,11 @@ class BookshelfParser:
                                     pass
                             
                             j += 1
+                        
+                        if 'x' in row_info and 'y' in row_info:
+                            self.rows.append((row_info['x'], row_info['y'], row_info.get('height', self.row_height),
+                                              row_info.get('site_width', self.site_step or 1),
+                                              row_info['num_sites']))
                 
                 # Set core region coordinates
                 if min_x != float('inf') and min_y != float('inf') and max_x != float('-inf') and max_y != float('-inf'):
@@ -363,7 +401,7 @@ class BookshelfParser:
         The .pl file defines the placement positions of cells, including coordinates and orientation.
         """
         try:
-            with open(self.pl_file, 'r') as f:
+            with open_input(self.pl_file) as f:
                 lines = f.readlines()
                 
                 # Skip header information
@@ -390,16 +428,17 @@ class BookshelfParser:
                         orientation = parts[3]
                         
                         # Check if the node exists
-                        if node_name in self.nodes:
-                            node = self.nodes[node_name]
+                        node_id = self.node_ids.get(node_name)
+                        if node_id is not None:
+                            node = self.node_list[node_id]
                             node['x'] = x
                             node['y'] = y
                             node['orientation'] = orientation
                             
                             # Check if it's a fixed node
-                            if orientation == "F" or node_name in self.fixed_nodes:
+                            if orientation == "F" or node['is_fixed']:
                                 node['is_fixed'] = True
-                                self.fixed_nodes[node_name] = node
+                                self.fixed_nodes[node['name']] = node
                                 
                                 # Calculate fixed area
                                 if 'area' in node:
@@ -472,35 +511,52 @@ class BookshelfParser:
             print(f"Error calculating simple placement: {e}")
             return False
     
-    def legalize_placement(self):
+    def legalize_placement(self, abacus=True):
         """
         Legalize initial placement
         
-        Adjust the initial placement results to be within the core region, avoiding nodes exceeding boundaries.
-        This is a simplified legalization process that only performs boundary checking.
+        Place the movable nodes into the rows and sites of the .scl file (Tetris), optionally followed by
+        Abacus within each row, so that nodes no longer overlap. The parts of the rows covered by fixed
+        nodes are left empty. Without row information the nodes are
+        only moved into the core region. Fails when some nodes do not fit into the rows.
+        
+        Parameters:
+            abacus (bool): Whether to refine the Tetris result with Abacus
         """
         try:
-            # Get core region boundaries
-            min_x, min_y = self.core_lower_left
-            max_x, max_y = self.core_upper_right
+            nodes = list(self.movable_nodes.values())
             
-            # Legalize each movable node
-            for node_name, node in self.movable_nodes.items():
-                # Consider node dimensions
-                width = node['width']
-                height = node['height']
-                
-                # Adjust X coordinate
-                if node['x'] < min_x:
-                    node['x'] = min_x
-                elif node['x'] + width > max_x:
-                    node['x'] = max_x - width
-                
-                # Adjust Y coordinate
-                if node['y'] < min_y:
-                    node['y'] = min_y
-                elif node['y'] + height > max_y:
-                    node['y'] = max_y - height
+            if not self.rows:
+                # Get core region boundaries
+                min_x, min_y = self.core_lower_left
+                max_x, max_y = self.core_upper_right
+                
+                # Legalize each movable node
+                for node in nodes:
+                    node['x'] = min(max(node['x'], min_x), max_x - node['width'])
+                    node['y'] = min(max(node['y'], min_y), max_y - node['height'])
+                return True
+            
+            # Fixed nodes are carved out of the rows
+            fixed = list(self.fixed_nodes.values())
+            row_x, row_y, row_height, row_site_width, row_num_sites = zip(*self.rows)
+            segments = RowSegments(row_x, row_y, row_height, row_site_width, row_num_sites,
+                                   ([node['x'] for node in fixed], [node['y'] for node in fixed],
+                                    [node['width'] for node in fixed], [node['height'] for node in fixed]))
+            legalizer = RowLegalizer(segments)
+            new_x, new_y = legalizer.legalize([node['x'] for node in nodes], [node['y'] for node in nodes],
+                                              [node['width'] for node in nodes], [node['height'] for node in nodes],
+                                              abacus)
+            for node, x, y in zip(nodes, new_x, new_y):
+                node['x'] = x
+                node['y'] = y
+            
+            stats = legalizer.stats
+            print(f"Legalization displacement: total {stats['total_displacement']:.2f}, "
+                  f"max {stats['max_displacement']:.2f}")
+            if stats['failed']:
+                print(f"Error: {stats['failed']} nodes do not fit into the rows, the placement is not legal")
+                return False
             
             return True
             
@@ -508,32 +564,39 @@ class BookshelfParser:
             print(f"Error legalizing initial placement: {e}")
             return False
     
-    def write_placement_result(self, output_file):
+    def write_placement_result(self, output_file, integer=None):
         """
         Write initial placement results to file
         
-        Write the initial placement results to a .pl format file.
+        Write the initial placement results to a .pl format file, fixed nodes first.
+        Lines are formatted in chunks of WRITE_CHUNK nodes and written with one call per chunk;
+        a path ending in .gz is written gzip-compressed.
         
         Parameters:
             output_file (str): Output file path
+            integer (bool, optional): Write integer coordinates; None writes integers only when all coordinates are integral
             
         Returns:
             bool: Whether the write is successful
         """
         try:
-            with open(output_file, 'w') as f:
+            nodes = [(node_name, node, "F") for node_name, node in self.fixed_nodes.items()]
+            nodes += [(node_name, node, "N") for node_name, node in self.movable_nodes.items()]
+            if integer is None:
+                integer = all(float(node['x']).is_integer() and float(node['y']).is_integer() for _, node, _ in nodes)
+            line_format = "%s\t%d\t%d\t: %s\n" if integer else "%s\t%.6f\t%.6f\t: %s\n"
+            
+            opener = gzip.open if output_file.endswith(".gz") else open
+            with opener(output_file, 'wt') as f:
                 # Write header information
                 f.write("UCLA pl 1.0\n")
                 f.write("# Generated by Simple Initial Placement Program\n")
                 f.write("# Date: " + time.strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
                 
-                # Write fixed node information
-                for node_name, node in self.fixed_nodes.items():
-                    f.write(f"{node_name}\t{node['x']:.6f}\t{node['y']:.6f}\t: F\n")
-                
-                # Write movable node information
-                for node_name, node in self.movable_nodes.items():
-                    f.write(f"{node_name}\t{node['x']:.6f}\t{node['y']:.6f}\t: N\n")
+                # Write fixed nodes, then movable nodes
+                for start in range(0, len(nodes), WRITE_CHUNK):
+                    f.write("".join([line_format % (node_name, node['x'], node['y'], kind)
+                                     for node_name, node, kind in nodes[start:start + WRITE_CHUNK]]))
                 
             return True
             
@@ -564,25 +627,27 @@ class BookshelfParser:
                 min_y = float('inf')
                 max_y = float('-inf')
                 
-                for pin in pins:
-                    node_name = pin['node']
-                    if node_name in self.nodes:
-                        node = self.nodes[node_name]
-                        x = node['x'] + node['width'] / 2  # Use node center
-                        y = node['y'] + node['height'] / 2
-                        
-                        min_x = min(min_x, x)
-                        max_x = max(max_x, x)
-                        min_y = min(min_y, y)
-                        max_y = max(max_y, y)
+                offsets = net['offsets']
+                for k, pin in enumerate(pins):
+                    node = self.node_list[pin['node_id']]
+                    x = node['x'] + node['width'] / 2 + offsets[2 * k]  # Node center plus pin offset
+                    y = node['y'] + node['height'] / 2 + offsets[2 * k + 1]
+                    
+                    min_x = min(min_x, x)
+                    max_x = max(max_x, x)
+                    min_y = min(min_y, y)
+                    max_y = max(max_y, y)
                 
                 # Half-perimeter wirelength
                 wirelength = (max_x - min_x) + (max_y - min_y)
                 total_wirelength += wirelength
             
-            # Check nodes out of bounds
+            # Check nodes out of bounds (the upper right corner is the last coordinate inside the last
+            # site and the top row, so nodes may touch the right and top edges of the rows)
             min_x, min_y = self.core_lower_left
             max_x, max_y = self.core_upper_right
+            max_x += 1
+            max_y += 1
             
             for node_name, node in self.movable_nodes.items():
                 x = node['x']
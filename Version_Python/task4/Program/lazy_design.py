@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按需加载的BookShelf设计
+
+LazyDesign的每个属性（nodes、nets、rows、placement、weights）对应一个输入文件，第一次访问时才调用
+bookshelf_reader中的读取函数解析该文件，之后直接返回缓存的结果；没有访问过的文件不会被读取。
+header属性只扫描.nodes、.nets和.scl文件开头的几KB，得到NumNodes、NumTerminals、NumNets、NumPins、
+NumRows等规模信息，不解析文件的其余部分。
+"""
+
+from bookshelf_reader import timed_call, read_header, read_nodes, read_nets, read_scl, read_pl, read_wts
+
+# 各类文件的默认读取函数
+READERS = {'nodes': read_nodes, 'nets': read_nets, 'scl': read_scl, 'pl': read_pl, 'wts': read_wts}
+
+# 头部信息所在的文件
+HEADER_FILES = ("nodes", "nets", "scl")
+
+
+class LazyDesign:
+    """
+    按需加载的设计类
+
+    每个文件的读取结果（bookshelf_reader中读取函数的返回值）和读取耗时分别缓存在内部字典和load_times中。
+    """
+    def __init__(self, paths, readers=None):
+        """
+        初始化设计对象，不读取任何文件
+
+        参数:
+            paths (dict): 文件类型（nodes、nets、scl、pl、wts）到文件路径的映射
+            readers (dict, optional): 替换默认读取函数的映射，例如分块并行读取.nets文件的函数
+        """
+        self.paths = dict(paths)
+        self.readers = dict(READERS)
+        if readers:
+            self.readers.update(readers)
+        self.load_times = {}
+        self._data = {}
+        self._header = None
+
+    def load(self, key):
+        """
+        返回一个文件的读取结果，第一次调用时读取文件
+
+        参数:
+            key (str): 文件类型
+
+        返回值:
+            dict: 读取函数的返回值
+        """
+        if key not in self._data:
+            self._data[key], self.load_times[key] = timed_call(self.readers[key], self.paths[key])
+        return self._data[key]
+
+    def store(self, key, data, elapsed):
+        """
+        放入在其他地方（例如进程池中）读取的结果
+
+        参数:
+            key (str): 文件类型
+            data (dict): 读取函数的返回值
+            elapsed (float): 读取耗时（秒）
+        """
+        self._data[key] = data
+        self.load_times[key] = elapsed
+
+    def is_loaded(self, key):
+        """文件是否已经读取"""
+        return key in self._data
+
+    def release(self, key):
+        """
+        丢弃一个文件的读取结果（例如结果已经转存到网表数据库中），再次访问时重新读取
+
+        参数:
+            key (str): 文件类型
+        """
+        self._data.pop(key, None)
+
+    @property
+    def nodes(self):
+        """.nodes文件的读取结果"""
+        return self.load("nodes")
+
+    @property
+    def nets(self):
+        """.nets文件的读取结果"""
+        return self.load("nets")
+
+    @property
+    def rows(self):
+        """.scl文件的读取结果"""
+        return self.load("scl")
+
+    @property
+    def placement(self):
+        """.pl文件的读取结果"""
+        return self.load("pl")
+
+    @property
+    def weights(self):
+        """.wts文件的读取结果"""
+        return self.load("wts")
+
+    @property
+    def header(self):
+        """
+        设计的规模信息，只扫描.nodes、.nets和.scl文件的开头
+
+        返回值:
+            dict: 头部关键字（NumNodes、NumTerminals、NumNets、NumPins、NumRows）到整数值的映射，
+                  文件不存在或缺少的关键字不出现在结果中
+        """
+        if self._header is None:
+            header = {}
+            for key in HEADER_FILES:
+                try:
+                    header.update(read_header(self.paths[key]))
+                except OSError:
+                    pass
+            self._header = header
+        return self._header
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+加权平均线长与Nesterov加速梯度法的全局布局（ePlace）
+
+目标函数为 f = W(x, y) + λ N(x, y)：
+    W: 加权平均（WA）线长，每个网表在x方向上为
+           Σ x_i e^{x_i/γ} / Σ e^{x_i/γ} - Σ x_i e^{-x_i/γ} / Σ e^{-x_i/γ}
+       是HPWL的光滑近似，γ越小越接近HPWL。所有网表的引脚在CSR数组上用reduceat分段求和，
+       梯度按引脚所属单元用np.bincount累加。
+    N: electrostatic_density中的静电场密度能量，其梯度为单元受到的电场力的相反数。
+每次迭代用Nesterov加速梯度法更新可移动单元的位置，步长按相邻两次迭代的位置差与梯度差之比
+（Lipschitz常数的估计）自适应选取；梯度按单元的引脚数与λ乘以单元面积之和预条件。
+λ的初值使线长梯度与密度梯度的1-范数相等，之后每次迭代乘以LAMBDA_GROWTH；γ随溢出率减小而减小。
+"""
+
+import numpy as np
+
+from electrostatic_density import ElectrostaticDensity
+
+# 默认的最大迭代次数
+NESTEROV_ITERATIONS = 1000
+
+# 密度权重λ每次迭代的增长倍数
+LAMBDA_GROWTH = 1.05
+
+# 第一次迭代的步长（以Bin边长为单位的最大位移）
+INITIAL_STEP = 0.1
+
+# 每隔多少次迭代记录一次线长和溢出率
+REPORT_INTERVAL = 10
+
+
+def wa_wirelength(px, starts, pin_net, gamma):
+    """
+    计算一个方向上的加权平均线长及其对引脚坐标的梯度
+
+    参数:
+        px (ndarray): 引脚坐标（只包含度数不小于2的网表）
+        starts (ndarray): 每个网表第一个引脚的下标
+        pin_net (ndarray): 每个引脚所属网表在starts中的下标
+        gamma (float): 光滑参数
+
+    返回值:
+        tuple: (线长, 引脚梯度)
+    """
+    # 减去每个网表的最大（最小）值后再取指数，避免溢出
+    high = np.maximum.reduceat(px, starts)[pin_net]
+    low = np.minimum.reduceat(px, starts)[pin_net]
+    a = np.exp((px - high) / gamma)
+    b = np.exp((low - px) / gamma)
+    sum_a = np.add.reduceat(a, starts)
+    sum_b = np.add.reduceat(b, starts)
+    wa_max = np.add.reduceat(px * a, starts) / sum_a
+    wa_min = np.add.reduceat(px * b, starts) / sum_b
+    grad = (a / sum_a[pin_net] * (1 + (px - wa_max[pin_net]) / gamma) -
+            b / sum_b[pin_net] * (1 - (px - wa_min[pin_net]) / gamma))
+    return float((wa_max - wa_min).sum()), grad
+
+
+class NesterovPlacer:
+    """
+    Nesterov加速梯度法全局布局类
+
+    属性:
+        db (NetlistDB): 网表数据库，place结束时写回可移动单元的坐标
+        grid (DensityGrid): Bin网格
+        density (ElectrostaticDensity): 静电场密度模型
+        history (list): 每隔REPORT_INTERVAL次迭代的 {"iteration", "hpwl", "overflow"} 记录
+    """
+    def __init__(self, db, grid, fixed_usage, target_density=1.0):
+        """
+        初始化优化器
+
+        参数:
+            db (NetlistDB): 网表数据库
+            grid (DensityGrid): Bin网格
+            fixed_usage (ndarray): 固定单元的Bin面积
+            target_density (float): 目标密度，用于计算溢出率
+        """
+        self.db = db
+        self.grid = grid
+        self.fixed_usage = fixed_usage
+        self.target_density = target_density
+        self.density = ElectrostaticDensity(grid, fixed_usage)
+        self.history = []
+
+        self.movable = db.movable_ids()
+        self.width = db.width[self.movable]
+        self.height = db.height[self.movable]
+        self.area = self.width * self.height
+
+        # 只保留度数不小于2的网表的引脚
+        degree = db.net_degree
+        keep = np.repeat(degree >= 2, degree)
+        self.pin_node = db.pin_node[keep]
+        self.pin_dx = db.pin_dx[keep]
+        self.pin_dy = db.pin_dy[keep]
+        kept_degree = degree[degree >= 2]
+        self.starts = np.concatenate([[0], np.cumsum(kept_degree)[:-1]]).astype(np.int64)
+        self.pin_net = np.repeat(np.arange(len(kept_degree)), kept_degree)
+
+        # 可移动单元的变量下标（固定单元为-1），以及每个可移动单元的引脚数
+        self.variable = np.full(db.node_count, -1, dtype=np.int64)
+        self.variable[self.movable] = np.arange(len(self.movable))
+        self.pin_count = np.bincount(self.variable[self.pin_node][self.variable[self.pin_node] >= 0],
+                                     minlength=len(self.movable)).astype(np.float64)
+
+        # 单元左下角坐标的取值范围（整个单元位于核心区域内）
+        (llx, lly), (urx, ury) = grid.lower_left, grid.upper_right
+        self.lower = (np.full(len(self.movable), llx), np.full(len(self.movable), lly))
+        self.upper = (np.maximum(urx - self.width, llx), np.maximum(ury - self.height, lly))
+
+    def _pin_positions(self, x, y):
+        """可移动单元位于(x, y)时所有引脚的坐标"""
+        cx = self.db.x + self.db.width / 2
+        cy = self.db.y + self.db.height / 2
+        cx[self.movable] = x + self.width / 2
+        cy[self.movable] = y + self.height / 2
+        return cx[self.pin_node] + self.pin_dx, cy[self.pin_node] + self.pin_dy
+
+    def wirelength_gradient(self, x, y, gamma):
+        """
+        加权平均线长及其对可移动单元坐标的梯度
+
+        参数:
+            x, y (ndarray): 可移动单元左下角坐标
+            gamma (float): 光滑参数
+
+        返回值:
+            tuple: (线长, x方向梯度, y方向梯度)
+        """
+        if len(self.starts) == 0:
+            return 0.0, np.zeros_like(x), np.zeros_like(y)
+        px, py = self._pin_positions(x, y)
+        wl_x, grad_px = wa_wirelength(px, self.starts, self.pin_net, gamma)
+        wl_y, grad_py = wa_wirelength(py, self.starts, self.pin_net, gamma)
+        owner = self.variable[self.pin_node]
+        movable_pin = owner >= 0
+        count = len(self.movable)
+        grad_x = np.bincount(owner[movable_pin], weights=grad_px[movable_pin], minlength=count)
+        grad_y = np.bincount(owner[movable_pin], weights=grad_py[movable_pin], minlength=count)
+        return wl_x + wl_y, grad_x, grad_y
+
+    def overflow(self, x, y):
+        """可移动单元位于(x, y)时的溢出率"""
+        usage = self.grid.rasterize(x, y, self.width, self.height)
+        return self.grid.overflow(usage, self.fixed_usage, self.target_density)
+
+    def gamma(self, overflow):
+        """按溢出率选择WA线长的光滑参数（RePlAce的经验公式）"""
+        step = 0.5 * (self.grid.bin_step[0] + self.grid.bin_step[1])
+        return 8.0 * step * 10 ** (20.0 / 9.0 * overflow - 11.0 / 9.0)
+
+    def _gradient(self, x, y, lam, gamma):
+        """目标函数的预条件梯度"""
+        self.density.update(x, y, self.width, self.height)
+        _, grad_x, grad_y = self.wirelength_gradient(x, y, gamma)
+        force_x, force_y = self.density.forces(x, y, self.width, self.height)
+        scale = np.maximum(self.pin_count + lam * self.area, 1.0)
+        return (grad_x - lam * force_x) / scale, (grad_y - lam * force_y) / scale
+
+    def _project(self, x, y):
+        """把单元限制在核心区域内"""
+        return np.clip(x, self.lower[0], self.upper[0]), np.clip(y, self.lower[1], self.upper[1])
+
+    def place(self, target_overflow, max_iterations=NESTEROV_ITERATIONS, report=None):
+        """
+        从数据库中的当前位置开始迭代，直到溢出率不超过target_overflow或达到最大迭代次数
+
+        参数:
+            target_overflow (float): 目标溢出率
+            max_iterations (int): 最大迭代次数
+            report (callable, optional): 每隔REPORT_INTERVAL次迭代以 (迭代次数, 线长, 溢出率) 调用
+
+        返回值:
+            int: 实际迭代次数
+        """
+        db = self.db
+        u_x, u_y = self._project(db.x[self.movable], db.y[self.movable])
+        if len(self.movable) == 0:
+            return 0
+
+        # λ的初值使线长梯度与密度梯度的1-范数相等
+        self.density.update(u_x, u_y, self.width, self.height)
+        overflow = self.overflow(u_x, u_y)
+        gamma = self.gamma(overflow)
+        _, wl_x, wl_y = self.wirelength_gradient(u_x, u_y, gamma)
+        force_x, force_y = self.density.forces(u_x, u_y, self.width, self.height)
+        lam = (np.abs(wl_x).sum() + np.abs(wl_y).sum()) / max(np.abs(force_x).sum() + np.abs(force_y).sum(), 1e-30)
+
+        v_x, v_y = u_x, u_y
+        prev = None
+        a = 1.0
+        self.history = []
+        iteration = 0
+        while True:
+            if iteration % REPORT_INTERVAL == 0 or overflow <= target_overflow or iteration == max_iterations:
+                db.x[self.movable] = u_x
+                db.y[self.movable] = u_y
+                record = {"iteration": iteration, "hpwl": float(db.hpwl()), "overflow": overflow}
+                self.history.append(record)
+                if report is not None:
+                    report(iteration, record["hpwl"], overflow)
+            if overflow <= target_overflow or iteration == max_iterations:
+                break
+
+            grad_x, grad_y = self._gradient(v_x, v_y, lam, gamma)
+            if prev is None:
+                # 第一次迭代：最大位移为INITIAL_STEP个Bin
+                largest = max(np.abs(grad_x).max(), np.abs(grad_y).max(), 1e-30)
+                step = INITIAL_STEP * min(self.grid.bin_step) / largest
+            else:
+                # 步长取Lipschitz常数估计的倒数
+                delta_v = np.sqrt(((v_x - prev[0]) ** 2).sum() + ((v_y - prev[1]) ** 2).sum())
+                delta_g = np.sqrt(((grad_x - prev[2]) ** 2).sum() + ((grad_y - prev[3]) ** 2).sum())
+                step = delta_v / delta_g if delta_g > 0 else step
+            prev = (v_x, v_y, grad_x, grad_y)
+
+            new_u_x, new_u_y = self._project(v_x - step * grad_x, v_y - step * grad_y)
+            new_a = (1 + np.sqrt(4 * a * a + 1)) / 2
+            momentum = (a - 1) / new_a
+            v_x, v_y = self._project(new_u_x + momentum * (new_u_x - u_x), new_u_y + momentum * (new_u_y - u_y))
+            u_x, u_y, a = new_u_x, new_u_y, new_a
+
+            iteration += 1
+            lam *= LAMBDA_GROWTH
+            overflow = self.overflow(u_x, u_y)
+            gamma = self.gamma(overflow)
+
+        db.x[self.movable] = u_x
+        db.y[self.movable] = u_y
+        return iteration
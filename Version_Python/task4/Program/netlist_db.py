@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+紧凑的网表数据库
+
+以结构数组（struct-of-arrays）的形式保存BookShelf设计中的单元和网表：
+单元用整数编号表示，尺寸、坐标和固定标记保存在连续的NumPy数组中，
+网表以CSR形式保存（net_ptr、pin_node、pin_dx、pin_dy、pin_dir），
+布局行以每行一个元素的数组保存。
+名称到编号的映射只在读写文件时使用，布局的各个阶段都直接使用数组。
+"""
+
+import numpy as np
+
+# 引脚方向编码
+PIN_INPUT = 0   # I
+PIN_OUTPUT = 1  # O
+PIN_BIDIR = 2   # B
+
+PIN_DIR_CODES = {'I': PIN_INPUT, 'O': PIN_OUTPUT, 'B': PIN_BIDIR}
+
+
+class NetlistDB:
+    """
+    网表数据库类
+
+    单元数组（长度为单元总数）:
+        width, height (float64): 单元尺寸
+        x, y (float64): 单元左下角坐标
+        fixed (bool): 是否为固定单元
+
+    网表CSR数组:
+        net_ptr (int64, 长度为网表数+1): 第i个网表的引脚为 pin_*[net_ptr[i]:net_ptr[i+1]]
+        pin_node (int32): 引脚所属单元的编号
+        pin_dx, pin_dy (float64): 引脚相对单元中心的偏移
+        pin_dir (int8): 引脚方向，取值见 PIN_DIR_CODES
+
+    行数组（长度为行数）:
+        row_x, row_y (float64): 行（子行）的起点坐标
+        row_height, row_site_width (float64): 行高和站点宽度
+        row_num_sites (int64): 站点数量
+    """
+    def __init__(self):
+        """
+        初始化空的数据库
+        """
+        # 名称表，仅在文件读写时使用
+        self.names = []          # 单元编号 -> 名称
+        self.name_to_id = {}     # 名称 -> 单元编号
+        self.net_names = []      # 网表编号 -> 名称
+
+        # 单元数组
+        self.width = np.zeros(0)
+        self.height = np.zeros(0)
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.fixed = np.zeros(0, dtype=bool)
+
+        # 网表CSR数组
+        self.net_ptr = np.zeros(1, dtype=np.int64)
+        self.pin_node = np.zeros(0, dtype=np.int32)
+        self.pin_dx = np.zeros(0)
+        self.pin_dy = np.zeros(0)
+        self.pin_dir = np.zeros(0, dtype=np.int8)
+
+        # 行数组
+        self.row_x = np.zeros(0)
+        self.row_y = np.zeros(0)
+        self.row_height = np.zeros(0)
+        self.row_site_width = np.zeros(0)
+        self.row_num_sites = np.zeros(0, dtype=np.int64)
+
+    @property
+    def node_count(self):
+        """单元总数"""
+        return len(self.names)
+
+    @property
+    def net_count(self):
+        """网表总数"""
+        return len(self.net_ptr) - 1
+
+    @property
+    def pin_count(self):
+        """引脚总数"""
+        return len(self.pin_node)
+
+    @property
+    def row_count(self):
+        """行数"""
+        return len(self.row_y)
+
+    @property
+    def net_degree(self):
+        """每个网表的度数"""
+        return np.diff(self.net_ptr)
+
+    @property
+    def area(self):
+        """每个单元的面积"""
+        return self.width * self.height
+
+    def movable_ids(self):
+        """
+        可移动单元的编号（按文件中的顺序）
+
+        返回值:
+            numpy.ndarray: 可移动单元编号数组
+        """
+        return np.flatnonzero(~self.fixed)
+
+    def fixed_ids(self):
+        """
+        固定单元的编号（按文件中的顺序）
+
+        返回值:
+            numpy.ndarray: 固定单元编号数组
+        """
+        return np.flatnonzero(self.fixed)
+
+    def set_nodes(self, names, widths, heights, fixed):
+        """
+        设置单元数据，坐标初始化为0
+
+        参数:
+            names (list): 单元名称列表
+            widths, heights: 单元尺寸序列
+            fixed: 固定标记序列
+        """
+        self.names = names
+        self.name_to_id = {name: i for i, name in enumerate(names)}
+        self.width = np.asarray(widths, dtype=np.float64)
+        self.height = np.asarray(heights, dtype=np.float64)
+        self.fixed = np.asarray(fixed, dtype=bool)
+        self.x = np.zeros(len(names))
+        self.y = np.zeros(len(names))
+
+    def lookup_ids(self, names):
+        """
+        在名称表中查找单元编号
+
+        .nets、.pl等文件中的单元名称只在读取后经此方法转换一次，之后的各个阶段都使用整数编号。
+
+        参数:
+            names (list): 单元名称列表
+
+        返回值:
+            numpy.ndarray: 单元编号数组（int64），不存在的名称为-1
+        """
+        name_to_id = self.name_to_id
+        return np.fromiter((name_to_id.get(name, -1) for name in names), dtype=np.int64, count=len(names))
+
+    def set_nets(self, net_names, net_ptr, pin_node, pin_dx, pin_dy, pin_dir):
+        """
+        设置网表CSR数据
+
+        参数:
+            net_names (list): 网表名称列表
+            net_ptr, pin_node, pin_dx, pin_dy, pin_dir: CSR数组（list、array.array或NumPy数组）
+        """
+        self.net_names = net_names
+        self.net_ptr = np.asarray(net_ptr, dtype=np.int64)
+        self.pin_node = np.asarray(pin_node, dtype=np.int32)
+        self.pin_dx = np.asarray(pin_dx, dtype=np.float64)
+        self.pin_dy = np.asarray(pin_dy, dtype=np.float64)
+        self.pin_dir = np.asarray(pin_dir, dtype=np.int8)
+
+    def set_rows(self, xs, ys, heights, site_widths, num_sites):
+        """
+        设置行数据
+
+        参数:
+            xs, ys: 行起点坐标序列
+            heights, site_widths: 行高和站点宽度序列
+            num_sites: 站点数量序列
+        """
+        self.row_x = np.asarray(xs, dtype=np.float64)
+        self.row_y = np.asarray(ys, dtype=np.float64)
+        self.row_height = np.asarray(heights, dtype=np.float64)
+        self.row_site_width = np.asarray(site_widths, dtype=np.float64)
+        self.row_num_sites = np.asarray(num_sites, dtype=np.int64)
+
+    def pin_net(self):
+        """
+        每个引脚所属网表的编号
+
+        返回值:
+            numpy.ndarray: 长度为引脚数的网表编号数组
+        """
+        return np.repeat(np.arange(self.net_count), self.net_degree)
+
+    def pin_x(self):
+        """
+        每个引脚的x坐标（单元中心加引脚偏移）
+
+        返回值:
+            numpy.ndarray: 长度为引脚数的坐标数组
+        """
+        return (self.x + self.width / 2)[self.pin_node] + self.pin_dx
+
+    def pin_y(self):
+        """
+        每个引脚的y坐标（单元中心加引脚偏移）
+
+        返回值:
+            numpy.ndarray: 长度为引脚数的坐标数组
+        """
+        return (self.y + self.height / 2)[self.pin_node] + self.pin_dy
+
+    def hpwl(self, pin_offsets=True):
+        """
+        计算半周长线长（HPWL）
+
+        参数:
+            pin_offsets (bool): 是否计入.nets文件中的引脚偏移，为False时引脚位置取单元中心
+
+        返回值:
+            float: 所有网表的半周长线长之和
+        """
+        if self.pin_count == 0:
+            return 0.0
+        starts = self.net_ptr[:-1][self.net_degree > 0]  # 空网表不参与reduceat分段
+        px = self.pin_x()
+        py = self.pin_y()
+        if not pin_offsets:
+            px -= self.pin_dx
+            py -= self.pin_dy
+        wl_x = np.maximum.reduceat(px, starts) - np.minimum.reduceat(px, starts)
+        wl_y = np.maximum.reduceat(py, starts) - np.minimum.reduceat(py, starts)
+        return float(wl_x.sum() + wl_y.sum())
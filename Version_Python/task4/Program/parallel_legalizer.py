@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按行带并行合法化
+
+百万单元级别的设计上，逐单元执行的Tetris是二次规划之后最耗时的阶段。并行合法化把核心区域
+按.scl中的行划分为若干水平行带:
+    1. 多行单元：与RowLegalizer相同，高度超过一行的单元（通常很少）先在所有行上串行放置，
+       再从行区间索引中扣除（RowSegments.without），因此不会跨越行带边界；
+    2. 划分：在按行累积的空闲面积的等分点处切分行，单行单元分配到离期望位置最近的行所在的行带，
+       行带的单元面积超过其空闲面积的BAND_FILL倍时，超出的部分（靠近行带边界的单元）移到相邻的行带；
+    3. 并行：每个行带只使用自己的行（RowSegments.band），在进程池中各自执行Tetris + Abacus。
+       期望坐标、尺寸和结果坐标保存在共享内存中，工作进程按单元下标直接读写，不需要传递位置数组；
+    4. 边界修复：行带内放不下的单元最后串行处理：从行区间索引中扣除已放置的单元，在所有行上再合法化一次。
+       这类单元超过BOUNDARY_SHARE时，先在扣除已放置单元后的行上重新划分行带并行合法化一次，
+       避免串行阶段处理大部分单元。
+各行带写入互不相交的单元，结果按行带顺序收集，串行阶段按单元下标顺序处理剩余单元，合法化过程也不使用随机数，
+因此结果只取决于输入和行带数，与进程的调度顺序无关。行带数等于工作进程数，相同的输入和工作进程数总得到相同的结果。
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from row_legalizer import RowLegalizer
+from row_segments import EPS
+
+# 共享内存中的数组：期望x、期望y、宽度、高度、结果x、结果y
+FIELDS = 6
+# 行带内放不下的单元超过这个比例时重新划分行带并行处理，而不是全部交给串行的边界修复
+BOUNDARY_SHARE = 0.05
+# 行带的单元面积不超过其空闲面积的这个比例（整体利用率更高时为整体利用率），超出的部分移到相邻的行带
+BAND_FILL = 0.9
+
+
+def band_bounds(segments, y, area, bands):
+    """
+    按空闲面积把行划分为行带，每个单元分配到离期望位置最近的行所在的行带，超出行带容量的部分移到相邻的行带
+
+    每个行带的单元面积不超过其空闲面积的BAND_FILL倍（整体利用率更高时为整体利用率）。单元按期望y坐标排序后，
+    各行带的单元是连续的一段，超出容量时移动行带之间的分界：只有靠近分界的单元移到相邻的行带，相邻的行带也放不下时
+    继续向外传递。先向上、先向下传递的两种结果取平均，超出的部分分到上下两侧。
+    没有超出容量的行带时，结果与按最近的行划分相同，合法化的位移与串行合法化接近；二次规划的解集中在少数几行时，
+    大部分单元在中间的行带里，这些行带的工作量更大，并行的加速比相应降低。
+
+    参数:
+        segments (RowSegments): 行区间索引
+        y (ndarray): 单元期望y坐标
+        area (ndarray): 单元面积
+        bands (int): 行带数
+
+    返回值:
+        tuple: (每个单元所在的行带下标, 行带边界数组)，第k个行带包含第bounds[k]到bounds[k+1]（不含）行
+    """
+    count = segments.level_count
+    capacity = np.array([sum(hi) - sum(lo) for lo, hi in zip(segments.seg_lo, segments.seg_hi)])
+    capacity = capacity * np.asarray(segments.level_height)
+    if capacity.sum() <= 0:
+        capacity = np.ones(count)
+    # 在累积空闲面积的等分点处切分行，去掉重复的边界（空行带）
+    cumulative = np.cumsum(capacity)
+    quantiles = cumulative[-1] * np.arange(1, bands) / bands
+    cuts = np.minimum(np.searchsorted(cumulative, quantiles, side='left') + 1, count)
+    bounds = np.unique(np.concatenate([[0], cuts, [count]]))
+
+    # 单元按期望y坐标排序，各行带的单元面积的分界（排序后的累积面积）
+    order = np.argsort(y, kind='stable')
+    sorted_area = area[order]
+    nearest = np.searchsorted(bounds, _nearest_level(segments, y[order]), side='right') - 1
+    natural = np.concatenate([[0.0], np.cumsum(np.bincount(nearest, sorted_area, len(bounds) - 1))])
+    total = natural[-1]
+    band_capacity = np.diff(np.concatenate([[0.0], cumulative[bounds[1:] - 1]]))
+    limit = band_capacity * max(BAND_FILL, total / cumulative[-1])
+    upward = _spread(natural, limit)
+    downward = total - _spread(total - natural[::-1], limit[::-1])[::-1]
+    split = (upward + downward) / 2
+
+    # 按面积的中点落在哪个行带的分界之间分配
+    middle = np.cumsum(sorted_area) - sorted_area / 2
+    band = np.empty(len(y), dtype=np.int64)
+    band[order] = np.searchsorted(split[1:-1], middle, side='right')
+    return band, bounds
+
+
+def _spread(split, limit):
+    """
+    优先向上传递超出容量的单元面积：从下到上，行带超出limit时降低它的上分界，最上面的单元移到上方的行带；
+    最上面的行带仍超出时，再从上到下提高下分界，把单元移到下方的行带
+
+    参数:
+        split (ndarray): 各行带的分界（排序后的累积面积，首尾为0和总面积）
+        limit (ndarray): 各行带的容量
+
+    返回值:
+        ndarray: 调整后的分界
+    """
+    split = split.copy()
+    bands = len(limit)
+    for k in range(bands - 1):
+        split[k + 1] = min(split[k + 1], split[k] + limit[k])
+    for k in range(bands - 1, 0, -1):
+        split[k] = min(max(split[k], split[k + 1] - limit[k]), split[k + 1])
+    return split
+
+
+def _nearest_level(segments, y):
+    """离期望y坐标最近的行的下标（与RowSegments.nearest_level相同的规则）"""
+    level_y = np.asarray(segments.level_y)
+    count = len(level_y)
+    index = np.searchsorted(level_y, y, side='left')
+    below = np.maximum(index - 1, 0)
+    above = np.minimum(index, count - 1)
+    take_below = (index == count) | ((index > 0) & (y - level_y[below] < level_y[above] - y))
+    return np.where(take_below, below, above)
+
+
+def _cell_levels(segments, y, height):
+    """
+    单元占用的行数，按离期望位置最近的行的高度计算
+
+    参数:
+        segments (RowSegments): 行区间索引
+        y, height (ndarray): 单元期望y坐标和高度
+
+    返回值:
+        ndarray: 每个单元占用的行数
+    """
+    level = _nearest_level(segments, y)
+    return np.maximum(1, np.ceil(height / np.asarray(segments.level_height)[level] - EPS)).astype(np.int64)
+
+
+def _obstacles(x, y, width, height, cells):
+    """把cells中已放置的单元转换为RowSegments.without使用的矩形列表"""
+    return x[cells].tolist(), y[cells].tolist(), width[cells].tolist(), height[cells].tolist()
+
+
+def _legalize_band(name, count, segments, cells, abacus):
+    """
+    在工作进程中合法化一个行带的单元，结果写入共享内存
+
+    参数:
+        name (str): 共享内存名称
+        count (int): 单元总数
+        segments (RowSegments): 行带的行区间索引
+        cells (ndarray): 行带中的单元下标
+        abacus (bool): 是否进行Abacus优化
+
+    返回值:
+        tuple: (合法化统计, 无法放置的单元下标)
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        data = np.ndarray((FIELDS, count), dtype=np.float64, buffer=shm.buf)
+        legalizer = RowLegalizer(segments)
+        new_x, new_y = legalizer.legalize(data[0, cells], data[1, cells], data[2, cells], data[3, cells], abacus)
+        data[4, cells] = new_x
+        data[5, cells] = new_y
+        del data  # 关闭共享内存之前释放对缓冲区的引用
+        return legalizer.stats, cells[np.asarray(legalizer.unplaced, dtype=np.int64)]
+    finally:
+        shm.close()
+
+
+class ParallelLegalizer:
+    """
+    按行带并行的合法化器类，接口与RowLegalizer相同
+
+    属性:
+        segments (RowSegments): 行区间索引
+        workers (int): 工作进程数（即行带数）
+        stats (dict): 最近一次legalize的统计，除RowLegalizer的各项外还有行带数bands、
+                      重新划分行带处理的单元数rebanded和串行边界修复处理的单元数boundary
+        unplaced (list): 最近一次legalize中无法放置的单元下标
+    """
+    def __init__(self, segments, workers):
+        """
+        初始化合法化器
+
+        参数:
+            segments (RowSegments): 扣除固定单元后的行区间索引
+            workers (int): 工作进程数
+        """
+        self.segments = segments
+        self.workers = max(1, workers)
+        self.stats = {}
+        self.unplaced = []
+
+    def legalize(self, x, y, width, height, abacus=True):
+        """
+        合法化一组单元
+
+        参数:
+            x, y (sequence): 单元左下角的期望坐标
+            width, height (sequence): 单元尺寸
+            abacus (bool): 是否在Tetris之后用Abacus重新求每个区间内的x坐标
+
+        返回值:
+            tuple: (x坐标数组, y坐标数组)，无法放置的单元保持期望坐标
+        """
+        segments = self.segments
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        width = np.asarray(width, dtype=np.float64)
+        height = np.asarray(height, dtype=np.float64)
+        count = len(x)
+        if self.workers == 1 or segments.level_count < 2 or count == 0:
+            legalizer = RowLegalizer(segments)
+            new_x, new_y = legalizer.legalize(x, y, width, height, abacus)
+            self.stats = dict(legalizer.stats, bands=1, rebanded=0, boundary=0)
+            self.unplaced = legalizer.unplaced
+            return np.asarray(new_x), np.asarray(new_y)
+
+        # 与RowLegalizer相同，期望坐标不是有限值的单元以所有行的中心为期望位置；
+        # 在划分行带之前替换，使这些单元的期望位置不随行带变化
+        lows = [lo[0] for lo in segments.seg_lo if lo]
+        highs = [hi[-1] for hi in segments.seg_hi if hi]
+        center_x = (min(lows) + max(highs)) / 2 if lows else 0.0
+        center_y = (segments.level_y[0] + segments.level_y[-1]) / 2
+        x = np.where(np.isfinite(x), x, center_x)
+        y = np.where(np.isfinite(y), y, center_y)
+
+        new_x, new_y = x.copy(), y.copy()
+        total = largest = 0.0
+        levels = _cell_levels(segments, y, height)
+        tall = np.flatnonzero(levels > 1)
+        failed = tall[:0]
+        if len(tall):
+            legalizer = RowLegalizer(segments)
+            new_x[tall], new_y[tall] = legalizer.legalize(x[tall], y[tall], width[tall], height[tall], abacus)
+            total, largest = legalizer.stats["total_displacement"], legalizer.stats["max_displacement"]
+            failed = tall[np.asarray(legalizer.unplaced, dtype=np.int64)]
+            segments = segments.without(_obstacles(new_x, new_y, width, height, np.setdiff1d(tall, failed)))
+
+        single = np.flatnonzero(levels == 1)
+        bands = rebanded = 0
+        leftover = placed = single[:0]
+        if len(single):
+            extra, extra_largest, bands, leftover = self._legalize_bands(segments, x, y, width, height, single,
+                                                                         abacus, new_x, new_y)
+            total += extra
+            largest = max(largest, extra_largest)
+            placed = np.setdiff1d(single, leftover)
+        if len(leftover) > BOUNDARY_SHARE * count:
+            # 行带内放不下的单元过多时，在扣除已放置单元后的行上重新划分行带，再并行合法化一次
+            rebanded = len(leftover)
+            segments = segments.without(_obstacles(new_x, new_y, width, height, placed))
+            extra, extra_largest, _, rest = self._legalize_bands(segments, x, y, width, height, leftover, abacus,
+                                                                 new_x, new_y)
+            total += extra
+            largest = max(largest, extra_largest)
+            placed = np.setdiff1d(leftover, rest)
+            leftover = rest
+        if len(leftover):
+            # 边界修复：扣除已放置的单元后，在所有行上串行合法化剩余单元
+            legalizer = RowLegalizer(segments.without(_obstacles(new_x, new_y, width, height, placed)))
+            fixed_x, fixed_y = legalizer.legalize(x[leftover], y[leftover], width[leftover], height[leftover], abacus)
+            new_x[leftover] = fixed_x
+            new_y[leftover] = fixed_y
+            total += legalizer.stats["total_displacement"]
+            largest = max(largest, legalizer.stats["max_displacement"])
+            failed = np.concatenate([failed, leftover[np.asarray(legalizer.unplaced, dtype=np.int64)]])
+
+        self.unplaced = np.sort(failed).tolist()
+        self.stats = {"placed": count - len(failed), "failed": len(failed),
+                      "total_displacement": float(total), "max_displacement": float(largest),
+                      "bands": bands, "rebanded": rebanded, "boundary": len(leftover)}
+        return new_x, new_y
+
+    def _legalize_bands(self, segments, x, y, width, height, cells, abacus, new_x, new_y):
+        """
+        把cells划分到行带中并行合法化，结果写入new_x、new_y
+
+        返回值:
+            tuple: (总位移, 最大位移, 行带数, 行带内放不下的单元下标)
+        """
+        count = len(x)
+        band, bounds = band_bounds(segments, y[cells], width[cells] * height[cells], self.workers)
+        order = np.argsort(band, kind='stable')
+        splits = np.searchsorted(band[order], np.arange(1, len(bounds) - 1))
+        # 单元按y坐标的顺序分配，单元很少时（例如重新划分行带时）可能有行带分不到单元
+        band_cells = [(k, cells[part]) for k, part in enumerate(np.split(order, splits)) if len(part)]
+
+        shm = shared_memory.SharedMemory(create=True, size=FIELDS * max(count, 1) * 8)
+        try:
+            data = np.ndarray((FIELDS, count), dtype=np.float64, buffer=shm.buf)
+            data[0], data[1], data[2], data[3] = x, y, width, height
+            data[4], data[5] = new_x, new_y
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(band_cells))) as pool:
+                futures = [pool.submit(_legalize_band, shm.name, count, segments.band(bounds[k], bounds[k + 1]),
+                                       part, abacus)
+                           for k, part in band_cells]
+                results = [future.result() for future in futures]
+            new_x[:] = data[4]
+            new_y[:] = data[5]
+            del data
+        finally:
+            shm.close()
+            shm.unlink()
+
+        total = sum(stats["total_displacement"] for stats, _ in results)
+        largest = max(stats["max_displacement"] for stats, _ in results)
+        leftover = np.sort(np.concatenate([unplaced for _, unplaced in results]))
+        return total, largest, len(band_cells), leftover
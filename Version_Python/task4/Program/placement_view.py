@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+布局结果的可视化
+
+单元矩形由坐标和尺寸数组一次生成顶点数组，用一个PolyCollection绘制；单元数超过DENSITY_THRESHOLD时
+可移动单元改为绘制Bin网格上的密度热图（density_grid栅格化后一次imshow），固定单元仍按矩形绘制。
+render_tiles按层级输出分块图像：第k层把核心区域划分为2^k × 2^k块，每块只绘制与之相交的单元，
+层级越深单元越少，自动从热图切换为逐单元绘制。
+"""
+
+import os
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+
+from density_grid import DensityGrid, fit_bin_dimension
+
+# 单元数超过该值时可移动单元绘制为密度热图
+DENSITY_THRESHOLD = 50000
+
+# 热图的Bin网格尺寸上限
+HEATMAP_DIMENSION = (512, 512)
+
+# 最多标注名称的单元数，超过时不标注
+LABEL_LIMIT = 200
+
+# 标注名称的可移动单元的最小面积
+LABEL_MIN_AREA = 100
+
+PLOT_MODES = ("auto", "cells", "density")
+
+
+def cell_polygons(x, y, width, height):
+    """
+    由单元左下角坐标和尺寸生成矩形顶点数组
+
+    参数:
+        x, y (ndarray): 单元左下角坐标
+        width, height (ndarray): 单元尺寸
+
+    返回值:
+        ndarray: 形状为(单元数, 4, 2)的顶点数组
+    """
+    verts = np.empty((len(x), 4, 2))
+    verts[:, 0, 0] = verts[:, 3, 0] = x
+    verts[:, 1, 0] = verts[:, 2, 0] = x + width
+    verts[:, 0, 1] = verts[:, 1, 1] = y
+    verts[:, 2, 1] = verts[:, 3, 1] = y + height
+    return verts
+
+
+def draw_placement(ax, lower_left, upper_right, x, y, width, height, fixed, names=None, mode="auto",
+                   view=None, min_bin_size=0):
+    """
+    在坐标轴上绘制布局
+
+    参数:
+        ax (Axes): matplotlib坐标轴
+        lower_left, upper_right (tuple): 核心区域
+        x, y, width, height (ndarray): 单元左下角坐标和尺寸
+        fixed (ndarray): 是否为固定单元
+        names (list, optional): 单元名称，单元数不超过LABEL_LIMIT时用于标注
+        mode (str): "cells"逐单元绘制，"density"绘制可移动单元的密度热图，"auto"按单元数选择
+        view (tuple, optional): 绘制范围 ((x0, y0), (x1, y1))，为None时为整个核心区域
+        min_bin_size (float): 热图Bin的最小边长（通常取行高）
+
+    返回值:
+        str: 实际使用的绘制方式
+    """
+    (x0, y0), (x1, y1) = view if view is not None else (lower_left, upper_right)
+    # 只保留与绘制范围相交的单元
+    visible = (x < x1) & (x + width > x0) & (y < y1) & (y + height > y0)
+    ids = np.flatnonzero(visible)
+    fixed_ids = ids[fixed[ids]]
+    movable_ids = ids[~fixed[ids]]
+    if mode == "auto":
+        mode = "density" if len(ids) > DENSITY_THRESHOLD else "cells"
+
+    if mode == "density" and len(movable_ids):
+        grid = DensityGrid((x0, y0), (x1, y1),
+                           fit_bin_dimension((x0, y0), (x1, y1), min_bin_size, HEATMAP_DIMENSION))
+        usage = grid.rasterize(x[movable_ids], y[movable_ids], width[movable_ids], height[movable_ids])
+        image = ax.imshow(usage.T / grid.bin_area, origin='lower', extent=(x0, x1, y0, y1),
+                          cmap='Blues', interpolation='nearest', aspect='auto')
+        plt.colorbar(image, ax=ax, label='Cell density')
+    elif len(movable_ids):
+        ax.add_collection(PolyCollection(cell_polygons(x[movable_ids], y[movable_ids], width[movable_ids],
+                                                       height[movable_ids]),
+                                         facecolors='none', edgecolors='b', linewidths=0.3))
+
+    if len(fixed_ids):
+        ax.add_collection(PolyCollection(cell_polygons(x[fixed_ids], y[fixed_ids], width[fixed_ids],
+                                                       height[fixed_ids]),
+                                         facecolors='none', edgecolors='r', linewidths=0.8))
+
+    # 核心区域边界
+    (llx, lly), (urx, ury) = lower_left, upper_right
+    ax.plot([llx, urx, urx, llx, llx], [lly, lly, ury, ury, lly], 'k-', linewidth=2)
+
+    # 单元较少时标注固定单元和较大的可移动单元
+    if names is not None and mode == "cells":
+        labeled = np.concatenate([fixed_ids, movable_ids[width[movable_ids] * height[movable_ids] > LABEL_MIN_AREA]])
+        if len(labeled) <= LABEL_LIMIT:
+            for i in labeled:
+                ax.text(x[i] + width[i] / 2, y[i] + height[i] / 2, names[i],
+                        fontsize=8 if fixed[i] else 6, ha='center', va='center')
+
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    return mode
+
+
+def render_placement(output_file, title, lower_left, upper_right, x, y, width, height, fixed, names=None,
+                     mode="auto", view=None, min_bin_size=0, dpi=300):
+    """
+    绘制布局并保存为图像，output_file为None时显示图像
+
+    参数:
+        output_file (str): 输出图像文件路径
+        title (str): 图像标题
+        dpi (int): 输出图像的分辨率
+        其余参数同draw_placement
+
+    返回值:
+        str: 实际使用的绘制方式
+    """
+    fig, ax = plt.subplots(figsize=(12, 10))
+    mode = draw_placement(ax, lower_left, upper_right, x, y, width, height, fixed, names, mode, view, min_bin_size)
+    ax.set_title(title)
+    ax.set_xlabel('X Coordinate')
+    ax.set_ylabel('Y Coordinate')
+    ax.grid(True)
+    if output_file:
+        fig.savefig(output_file, dpi=dpi, bbox_inches='tight')
+        plt.close(fig)
+    else:
+        plt.show()
+    return mode
+
+
+def render_tiles(output_dir, prefix, lower_left, upper_right, x, y, width, height, fixed, names=None,
+                 levels=2, min_bin_size=0, dpi=100):
+    """
+    按层级输出分块图像 <prefix>_L<层级>_<列>_<行>.png
+
+    第k层把核心区域划分为2^k × 2^k块，每块按其中的单元数自动选择热图或逐单元绘制。
+
+    参数:
+        output_dir (str): 输出目录
+        prefix (str): 文件名前缀
+        levels (int): 层级数（第0层为整个核心区域）
+        dpi (int): 每块图像的分辨率
+        其余参数同draw_placement
+
+    返回值:
+        list: 输出的文件路径
+    """
+    (llx, lly), (urx, ury) = lower_left, upper_right
+    files = []
+    for level in range(levels):
+        count = 1 << level
+        step_x = (urx - llx) / count
+        step_y = (ury - lly) / count
+        for i in range(count):
+            for j in range(count):
+                view = ((llx + i * step_x, lly + j * step_y), (llx + (i + 1) * step_x, lly + (j + 1) * step_y))
+                path = os.path.join(output_dir, f"{prefix}_L{level}_{i}_{j}.png")
+                render_placement(path, f"{prefix} L{level} ({i},{j})", lower_left, upper_right, x, y, width,
+                                 height, fixed, names, "auto", view, min_bin_size, dpi)
+                files.append(path)
+    return files
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+.pl文件的批量写出
+
+write_pl按块把单元名称和坐标数组直接格式化为字节：名称转换为定长字节数组，坐标转换为定点整数后
+用NumPy逐位求出十进制数字，所有字段拼成一个字节矩阵，去掉填充字节后一次写入，不再为每个单元调用一次
+格式化和write。坐标全部是整数（例如合法化到站点上的布局）时可以写成整数坐标；路径以.gz结尾时写出gzip文件。
+"""
+
+import gzip
+import time
+
+import numpy as np
+
+# 每次格式化的行数
+CHUNK_ROWS = 1 << 18
+
+# 浮点坐标保留的小数位数（与原来的 :.6f 格式一致）
+DECIMALS = 6
+
+# 判断坐标是否为整数的容差
+INTEGER_TOL = 1e-6
+
+# gzip压缩级别，.pl文件重复度高，低级别已有较好的压缩率
+GZIP_LEVEL = 1
+
+_TAB = ord('\t')
+_DOT = ord('.')
+_MINUS = ord('-')
+_ZERO = ord('0')
+
+
+def is_integral(*arrays, tol=INTEGER_TOL):
+    """
+    判断数组中的值是否都是整数（容差内）
+
+    参数:
+        arrays (ndarray): 坐标数组
+        tol (float): 容差
+
+    返回值:
+        bool: 是否都是整数
+    """
+    return all(np.all(np.abs(values - np.rint(values)) <= tol) for values in arrays)
+
+
+def _number_columns(values, decimals):
+    """
+    把坐标数组格式化为字节矩阵（符号、整数部分，以及decimals位小数）
+
+    数字从最低位开始逐列求出，每列只做一次整数除法；整数部分的前导零位置填0，之后作为填充字节删除。
+
+    参数:
+        values (ndarray): 坐标
+        decimals (int): 小数位数，0表示写成整数
+
+    返回值:
+        ndarray: uint8矩阵，填充位置为0
+    """
+    scaled = np.rint(values * 10 ** decimals).astype(np.int64)
+    negative = scaled < 0
+    scaled = np.abs(scaled)
+    integer_width = len(str(int(scaled.max()) // 10 ** decimals)) if len(scaled) else 1
+    width = 1 + integer_width + (decimals + 1 if decimals else 0)
+    matrix = np.zeros((len(values), width), dtype=np.uint8)
+    matrix[negative, 0] = _MINUS
+
+    column = width - 1
+    for _ in range(decimals):
+        scaled, digit = np.divmod(scaled, 10)
+        matrix[:, column] = digit + _ZERO
+        column -= 1
+    if decimals:
+        matrix[:, column] = _DOT
+        column -= 1
+    for position in range(integer_width):
+        # 个位总是写出，更高位只在剩余值不为0时写出
+        significant = scaled > 0 if position else slice(None)
+        scaled, digit = np.divmod(scaled, 10)
+        matrix[significant, column] = digit[significant] + _ZERO
+        column -= 1
+    return matrix
+
+
+def _name_columns(names):
+    """
+    把名称列表转换为定长字节矩阵，较短的名称以0填充
+
+    参数:
+        names (list): 名称
+
+    返回值:
+        ndarray: uint8矩阵
+    """
+    try:
+        encoded = np.array(names, dtype=bytes)
+    except UnicodeEncodeError:
+        encoded = np.array([name.encode('utf-8') for name in names], dtype=bytes)
+    width = max(encoded.dtype.itemsize, 1)
+    return encoded.view(np.uint8).reshape(len(names), width) if len(names) else np.zeros((0, 1), np.uint8)
+
+
+def format_pl_lines(names, x, y, fixed, decimals=DECIMALS):
+    """
+    把一块单元格式化为.pl文件的行
+
+    每行格式为 "<名称>\\t<x>\\t<y>\\t: N"，固定单元为 ": F"。
+
+    参数:
+        names (ndarray): _name_columns得到的名称字节矩阵
+        x, y (ndarray): 单元左下角坐标
+        fixed (ndarray): 是否为固定单元
+        decimals (int): 小数位数，0表示写成整数
+
+    返回值:
+        bytes: 格式化后的行
+    """
+    count = len(names)
+    if not (np.all(np.isfinite(x)) and np.all(np.isfinite(y))):
+        # 含有nan或inf（例如求解失败）时逐行格式化
+        line_format = "%s\t%.*f\t%.*f\t: %s\n"
+        return "".join([line_format % (bytes(name).rstrip(b"\0").decode('utf-8'), decimals, a, decimals, b,
+                                       "F" if f else "N")
+                        for name, a, b, f in zip(names, x.tolist(), y.tolist(), fixed.tolist())]).encode()
+    tab = np.full((count, 1), _TAB, dtype=np.uint8)
+    suffix = np.frombuffer(b"\t: N\n", dtype=np.uint8)
+    suffix = np.repeat(suffix[None, :], count, axis=0)
+    suffix[fixed, 3] = ord('F')
+    matrix = np.hstack([names, tab, _number_columns(x, decimals), tab,
+                        _number_columns(y, decimals), suffix])
+    flat = matrix.ravel()
+    return flat[flat != 0].tobytes()
+
+
+def write_pl(path, names, x, y, fixed, order=None, comment="Generated by Initial Placement Program",
+             integer=None, compress=None):
+    """
+    把布局写入.pl文件
+
+    参数:
+        path (str): 输出文件路径
+        names (list): 单元编号到名称的映射
+        x, y (ndarray): 单元左下角坐标
+        fixed (ndarray): 是否为固定单元
+        order (ndarray, optional): 写出单元的顺序（单元编号数组），为None时按编号顺序
+        comment (str): 写在文件头部的注释
+        integer (bool, optional): 是否写成整数坐标；为None时在所有坐标都是整数时写成整数
+        compress (bool, optional): 是否写成gzip文件；为None时按路径是否以.gz结尾决定
+    """
+    if order is None:
+        order = np.arange(len(names))
+    if integer is None:
+        integer = is_integral(x[order], y[order])
+    if compress is None:
+        compress = path.endswith(".gz")
+    decimals = 0 if integer else DECIMALS
+
+    header = ("UCLA pl 1.0\n"
+              f"# {comment}\n"
+              "# Date: " + time.strftime("%Y-%m-%d %H:%M:%S") + "\n\n").encode()
+    opener = (lambda: gzip.open(path, 'wb', compresslevel=GZIP_LEVEL)) if compress else (lambda: open(path, 'wb'))
+    name_columns = _name_columns(names)
+    with opener() as f:
+        f.write(header)
+        for start in range(0, len(order), CHUNK_ROWS):
+            ids = order[start:start + CHUNK_ROWS]
+            f.write(format_pl_lines(name_columns[ids], x[ids], y[ids], fixed[ids], decimals))
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+二次规划矩阵的向量化组装
+
+直接从网表数据库的CSR引脚数组一次性生成所有网表的COO三元组。
+网表按度数分组，同一度数的网表组成一个 (网表数, 度数) 的引脚矩阵，
+团模型展开即为该矩阵上的广播运算，不再逐个网表、逐对引脚地执行Python循环。
+
+支持的网表模型:
+    clique: 团模型，每对引脚之间连接权重为1/(d-1)的弹簧
+    star:   星模型，每个网表引入一个辅助变量（星心），所有引脚连接到星心
+    b2b:    Bound2Bound模型，只连接到当前位置的两个端点引脚，权重与距离相关
+    hybrid: 度数不超过阈值的网表使用团模型，其余使用星模型
+后三种模型的非零元数量与引脚数成线性关系。
+
+弹簧连接的是引脚而不是单元：变量为可移动单元的左下角坐标，引脚位置等于变量加上
+半个单元尺寸和.nets文件中的引脚偏移，这些偏移以右侧向量平移量的形式进入方程组。
+可移动节点与固定节点之间的每条连接都同时计入矩阵对角线和右侧向量。
+没有连接到任何固定节点的连通分量（浮动分量）会使矩阵奇异，
+anchor_floating_components 为这些分量添加指向核心区域中心的弱伪锚点。
+"""
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import splu, onenormest, LinearOperator
+
+# 单个分块中引脚对数量的上限，用于限制高度数网表展开时的临时内存
+MAX_BLOCK_PAIRS = 1 << 22
+
+# 可选的网表模型
+NET_MODELS = ("clique", "star", "b2b", "hybrid")
+
+# 混合模型中使用团模型的最大网表度数
+HYBRID_THRESHOLD = 3
+
+# Bound2Bound模型中引脚间距离的下限，避免权重过大
+B2B_MIN_DISTANCE = 1.0
+
+# 伪锚点权重与矩阵平均对角线元素之比
+PSEUDO_ANCHOR_RATIO = 1e-3
+
+
+def iter_degree_blocks(net_ptr, min_degree=2, max_block_pairs=MAX_BLOCK_PAIRS, max_degree=None):
+    """
+    按度数对网表分组，逐块产出引脚位置矩阵
+
+    参数:
+        net_ptr (numpy.ndarray): 网表CSR指针数组
+        min_degree (int): 参与分组的最小度数
+        max_block_pairs (int): 每块中 网表数×度数×度数 的上限
+        max_degree (int, optional): 参与分组的最大度数，为None时不限制
+
+    产出:
+        tuple: (degree, nets, pin_pos)，其中nets为该块的网表编号，
+               pin_pos为形如 (len(nets), degree) 的引脚下标矩阵
+    """
+    degrees = np.diff(net_ptr)
+    order = np.argsort(degrees, kind='stable')
+    sorted_degrees = degrees[order]
+    bounds = np.flatnonzero(np.diff(sorted_degrees)) + 1
+    for group in np.split(order, bounds):
+        if len(group) == 0:
+            continue
+        degree = int(degrees[group[0]])
+        if degree < min_degree or (max_degree is not None and degree > max_degree):
+            continue
+        block = max(1, max_block_pairs // (degree * degree))
+        offsets = np.arange(degree)
+        for start in range(0, len(group), block):
+            nets = group[start:start + block]
+            yield degree, nets, net_ptr[nets][:, None] + offsets
+
+
+def edge_matrix(var_a, var_b, weight, size):
+    """
+    由两端点弹簧组装二次规划矩阵
+
+    端点为变量编号，-1表示该端点固定。两端都可移动的弹簧贡献对角线和非对角线元素，
+    一端固定的弹簧只贡献可移动端的对角线元素。
+
+    参数:
+        var_a, var_b (numpy.ndarray): 弹簧两端的变量编号
+        weight (numpy.ndarray): 弹簧权重
+        size (int): 变量数量
+
+    返回值:
+        scipy.sparse.csr_matrix: 二次规划矩阵
+    """
+    mov_a = var_a >= 0
+    mov_b = var_b >= 0
+    both = mov_a & mov_b
+    rows = np.concatenate([var_a[both], var_b[both], var_a[mov_a], var_b[mov_b]])
+    cols = np.concatenate([var_b[both], var_a[both], var_a[mov_a], var_b[mov_b]])
+    data = np.concatenate([-weight[both], -weight[both], weight[mov_a], weight[mov_b]])
+    return sparse.coo_matrix((data, (rows, cols)), shape=(size, size)).tocsr()
+
+
+def edge_rhs(var_a, var_b, weight, shift_a, shift_b, size):
+    """
+    组装右侧向量
+
+    端点位置为 变量 + 平移量（可移动端点）或 平移量（固定端点），
+    弹簧 w*(p_a - p_b)^2 对可移动端点a的右侧向量贡献 w*(shift_b - shift_a)，对b的贡献符号相反。
+
+    参数:
+        var_a, var_b (numpy.ndarray): 弹簧两端的变量编号，-1表示固定端点
+        weight (numpy.ndarray): 弹簧权重
+        shift_a, shift_b (numpy.ndarray): 两端点的平移量，可移动端点为引脚相对单元左下角的偏移，
+                                         固定端点为引脚的绝对坐标
+        size (int): 变量数量
+
+    返回值:
+        numpy.ndarray: 右侧向量
+    """
+    mov_a = var_a >= 0
+    mov_b = var_b >= 0
+    delta = weight * (shift_b - shift_a)
+    return (np.bincount(var_a[mov_a], weights=delta[mov_a], minlength=size) -
+            np.bincount(var_b[mov_b], weights=delta[mov_b], minlength=size))
+
+
+def pin_shifts(db, node_to_idx):
+    """
+    每个引脚在x、y方向上的平移量
+
+    可移动单元的引脚为相对单元左下角的偏移（半个单元尺寸加引脚偏移），
+    固定单元的引脚为绝对坐标。
+
+    参数:
+        db (NetlistDB): 网表数据库
+        node_to_idx (numpy.ndarray): 单元编号到矩阵行号的映射，固定节点为-1
+
+    返回值:
+        tuple: (shift_x, shift_y)
+    """
+    fixed = node_to_idx[db.pin_node] < 0
+    shift_x = db.width[db.pin_node] / 2 + db.pin_dx
+    shift_y = db.height[db.pin_node] / 2 + db.pin_dy
+    shift_x[fixed] += db.x[db.pin_node[fixed]]
+    shift_y[fixed] += db.y[db.pin_node[fixed]]
+    return shift_x, shift_y
+
+
+def clique_edges(net_ptr, min_degree=2, max_degree=None):
+    """
+    团模型展开后的无序引脚对
+
+    参数:
+        net_ptr (numpy.ndarray): 网表CSR指针数组
+        min_degree, max_degree (int): 参与展开的网表度数范围
+
+    返回值:
+        tuple: (pin_a, pin_b, weight)，引脚对的引脚下标及权重1/(d-1)
+    """
+    pin_a, pin_b, weight = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0)]
+    for degree, nets, pin_pos in iter_degree_blocks(net_ptr, min_degree, max_degree=max_degree):
+        a, b = np.triu_indices(degree, 1)
+        pin_a.append(pin_pos[:, a].ravel())
+        pin_b.append(pin_pos[:, b].ravel())
+        weight.append(np.full(len(nets) * len(a), 1.0 / (degree - 1)))
+    return np.concatenate(pin_a), np.concatenate(pin_b), np.concatenate(weight)
+
+
+def assemble_hybrid(db, node_to_idx, n, threshold=None):
+    """
+    组装团模型与星模型混合的二次规划矩阵
+
+    度数不超过threshold的网表展开为团；其余网表各引入一个星心辅助变量，
+    编号从n开始，每个引脚以权重d/(d-1)连接到星心（与权重为1/(d-1)的团等价）。
+    星心变量直接表示引脚位置，平移量为0。
+
+    参数:
+        db (NetlistDB): 网表数据库
+        node_to_idx (numpy.ndarray): 单元编号到矩阵行号的映射，固定节点为-1
+        n (int): 可移动节点数量
+        threshold (int, optional): 使用团模型的最大网表度数，为None时所有网表都使用团模型
+
+    返回值:
+        tuple: (A, b_x, b_y)，矩阵维数为 n + 星心数量
+    """
+    pin_var = node_to_idx[db.pin_node]
+    pin_x, pin_y = pin_shifts(db, node_to_idx)
+
+    # 小度数网表：团模型
+    pin_a, pin_b, clique_w = clique_edges(db.net_ptr, 2, threshold)
+
+    # 大度数网表：星模型，每个网表一个星心变量
+    degrees = db.net_degree
+    if threshold is None:
+        star_nets = np.zeros(0, dtype=np.int64)
+    else:
+        star_nets = np.flatnonzero(degrees > max(threshold, 1))
+    star_var = np.full(db.net_count, -1, dtype=np.int64)
+    star_var[star_nets] = n + np.arange(len(star_nets))
+    pin_net = db.pin_net()
+    star_pins = np.flatnonzero(star_var[pin_net] >= 0)
+    star_deg = degrees[pin_net[star_pins]]
+    size = n + len(star_nets)
+
+    var_a = np.concatenate([pin_var[pin_a], pin_var[star_pins]])
+    var_b = np.concatenate([pin_var[pin_b], star_var[pin_net[star_pins]]])
+    weight = np.concatenate([clique_w, star_deg / (star_deg - 1.0)])
+    zeros = np.zeros(len(star_pins))
+
+    A = edge_matrix(var_a, var_b, weight, size)
+    b_x = edge_rhs(var_a, var_b, weight, np.concatenate([pin_x[pin_a], pin_x[star_pins]]),
+                   np.concatenate([pin_x[pin_b], zeros]), size)
+    b_y = edge_rhs(var_a, var_b, weight, np.concatenate([pin_y[pin_a], pin_y[star_pins]]),
+                   np.concatenate([pin_y[pin_b], zeros]), size)
+    return A, b_x, b_y
+
+
+def b2b_edges(net_ptr, pin_net, coord, min_distance=B2B_MIN_DISTANCE):
+    """
+    Bound2Bound模型在一个方向上的引脚对
+
+    每个网表中坐标最小和最大的引脚为边界引脚，边界引脚之间相连，
+    其余引脚分别与两个边界引脚相连，权重为 2 / ((d-1) * 距离)。
+
+    参数:
+        net_ptr (numpy.ndarray): 网表CSR指针数组
+        pin_net (numpy.ndarray): 每个引脚所属的网表编号
+        coord (numpy.ndarray): 每个引脚在该方向上的当前坐标
+        min_distance (float): 距离下限
+
+    返回值:
+        tuple: (pin_a, pin_b, weight)
+    """
+    degrees = np.diff(net_ptr)
+    # 网表内按坐标排序，排序后每个网表的引脚仍位于 [net_ptr[k], net_ptr[k+1]) 区间
+    order = np.lexsort((coord, pin_net))
+    active = degrees >= 2
+    lower = order[net_ptr[:-1][active]]
+    upper = order[net_ptr[1:][active] - 1]
+
+    positions = np.arange(len(order))
+    inner = ((positions != net_ptr[:-1][pin_net]) & (positions != net_ptr[1:][pin_net] - 1) &
+             (degrees[pin_net] >= 3))
+    inner_pins = order[inner]
+    inner_net = pin_net[inner]
+
+    net_lower = np.zeros(len(degrees), dtype=np.int64)
+    net_upper = np.zeros(len(degrees), dtype=np.int64)
+    net_lower[active] = lower
+    net_upper[active] = upper
+
+    pin_a = np.concatenate([lower, inner_pins, inner_pins])
+    pin_b = np.concatenate([upper, net_lower[inner_net], net_upper[inner_net]])
+    edge_degree = degrees[pin_net[pin_a]]
+    distance = np.maximum(np.abs(coord[pin_a] - coord[pin_b]), min_distance)
+    return pin_a, pin_b, 2.0 / ((edge_degree - 1) * distance)
+
+
+def assemble_b2b(db, node_to_idx, n, min_distance=B2B_MIN_DISTANCE):
+    """
+    按当前布局组装Bound2Bound模型的二次规划矩阵
+
+    边界引脚由当前的引脚坐标（含引脚偏移）决定，因此x和y方向的矩阵不同。
+
+    参数:
+        db (NetlistDB): 网表数据库
+        node_to_idx (numpy.ndarray): 单元编号到矩阵行号的映射，固定节点为-1
+        n (int): 可移动节点数量
+        min_distance (float): 引脚间距离下限
+
+    返回值:
+        tuple: (A_x, b_x, A_y, b_y)
+    """
+    pin_var = node_to_idx[db.pin_node]
+    pin_net = db.pin_net()
+    systems = []
+    for coord, shift in zip((db.pin_x(), db.pin_y()), pin_shifts(db, node_to_idx)):
+        pin_a, pin_b, weight = b2b_edges(db.net_ptr, pin_net, coord, min_distance)
+        var_a, var_b = pin_var[pin_a], pin_var[pin_b]
+        systems.append(edge_matrix(var_a, var_b, weight, n))
+        systems.append(edge_rhs(var_a, var_b, weight, shift[pin_a], shift[pin_b], n))
+    return tuple(systems)
+
+
+def assemble_net_model(db, node_to_idx, n, net_model="clique", hybrid_threshold=HYBRID_THRESHOLD,
+                       min_distance=B2B_MIN_DISTANCE):
+    """
+    按指定的网表模型组装二次规划矩阵
+
+    参数:
+        db (NetlistDB): 网表数据库
+        node_to_idx (numpy.ndarray): 单元编号到矩阵行号的映射，固定节点为-1
+        n (int): 可移动节点数量
+        net_model (str): 网表模型，取值见 NET_MODELS
+        hybrid_threshold (int): 混合模型中使用团模型的最大网表度数
+        min_distance (float): Bound2Bound模型的距离下限
+
+    返回值:
+        tuple: (A_x, b_x, A_y, b_y)，星模型和混合模型的矩阵维数大于n，
+               前n个变量对应可移动节点
+    """
+    if net_model == "b2b":
+        return assemble_b2b(db, node_to_idx, n, min_distance)
+    if net_model == "clique":
+        hybrid_threshold = None
+    elif net_model == "star":
+        hybrid_threshold = 2  # 两引脚网表的星模型与单根弹簧等价，不必引入星心
+    elif net_model != "hybrid":
+        raise ValueError(f"未知的网表模型: {net_model}")
+    A, b_x, b_y = assemble_hybrid(db, node_to_idx, n, hybrid_threshold)
+    return A, b_x, A, b_y
+
+
+def anchor_floating_components(A, rhs, centers, ratio=PSEUDO_ANCHOR_RATIO):
+    """
+    为浮动连通分量添加弱伪锚点
+
+    行和为正的行与固定节点相连（已锚定）。不含已锚定行的连通分量，其矩阵块为奇异的拉普拉斯矩阵，
+    为其中每个变量添加一根指向给定中心的弱弹簧，权重为矩阵平均对角线元素的ratio倍。
+
+    参数:
+        A (scipy.sparse.csr_matrix): 二次规划矩阵
+        rhs (list): 需要同步修改的右侧向量列表
+        centers (list): 与rhs一一对应的锚点坐标
+        ratio (float): 伪锚点权重与平均对角线元素之比
+
+    返回值:
+        tuple: (A, rhs, 浮动分量数量)，没有浮动分量时返回原对象
+    """
+    size = A.shape[0]
+    if size == 0:
+        return A, rhs, 0
+
+    diag = A.diagonal()
+    row_sum = np.asarray(A.sum(axis=1)).ravel()
+    anchored = row_sum > 1e-9 * np.maximum(diag, 1.0)
+
+    num_components, labels = connected_components(A, directed=False)
+    component_anchored = np.zeros(num_components, dtype=bool)
+    component_anchored[labels[anchored]] = True
+    num_floating = int(np.count_nonzero(~component_anchored))
+    if num_floating == 0:
+        return A, rhs, 0
+
+    positive = diag[diag > 0]
+    weight = ratio * (positive.mean() if len(positive) else 1.0)
+    extra = np.where(component_anchored[labels], 0.0, weight)
+    A = (A + sparse.diags(extra)).tocsr()
+    rhs = [b + extra * center for b, center in zip(rhs, centers)]
+    return A, rhs, num_floating
+
+
+def matrix_stats(A, estimate_condition=False):
+    """
+    统计二次规划矩阵的求解友好程度
+
+    参数:
+        A (scipy.sparse.spmatrix): 二次规划矩阵
+        estimate_condition (bool): 是否估计1-范数条件数（需要做一次LU分解）
+
+    返回值:
+        dict: 维数size、非零元nnz、对角线范围diag_min/diag_max、对角占优行比例dominant_ratio、
+              严格对角占优（即与固定节点相连）的行数strictly_dominant，以及可选的条件数估计condition
+    """
+    A = sparse.csr_matrix(A)
+    diag = A.diagonal()
+    off_diag = np.asarray(abs(A).sum(axis=1)).ravel() - np.abs(diag)
+    stats = {
+        'size': A.shape[0],
+        'nnz': A.nnz,
+        'diag_min': float(diag.min()) if len(diag) else 0.0,
+        'diag_max': float(diag.max()) if len(diag) else 0.0,
+        'dominant_ratio': float(np.mean(diag >= off_diag * (1 - 1e-12))) if len(diag) else 1.0,
+        'strictly_dominant': int(np.count_nonzero(diag > off_diag * (1 + 1e-12))),
+    }
+    if estimate_condition and A.shape[0]:
+        lu = splu(A.tocsc())
+        inverse = LinearOperator(A.shape, matvec=lu.solve, rmatvec=lambda v: lu.solve(v, trans='T'))
+        stats['condition'] = float(onenormest(A) * onenormest(inverse))
+    return stats
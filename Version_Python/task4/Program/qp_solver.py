@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+二次规划线性方程组求解器
+
+提供两种求解后端:
+    direct: 稀疏直接法（SuperLU）。x和y方向使用同一矩阵时只分解一次，
+            两个右侧向量一起回代求解
+    cg:     预条件共轭梯度法（PCG），可选Jacobi或不完全Cholesky分解预条件，
+            支持设置收敛容差和最大迭代次数，并以上一次的解作为初始值（热启动）
+其余情况下x和y两个方向在两个线程中并行求解（SciPy的计算内核会释放GIL）。
+"""
+
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu, cg, spilu, spsolve_triangular, LinearOperator
+
+# 可选的求解后端和预条件方式
+SOLVERS = ("direct", "cg")
+PRECONDITIONERS = ("jacobi", "ichol", "none")
+
+# 共轭梯度法的默认相对容差和最大迭代次数
+DEFAULT_TOL = 1e-6
+DEFAULT_MAXITER = 1000
+
+# 不完全分解的丢弃阈值
+ICHOL_DROP_TOL = 1e-3
+
+# SciPy 1.12 起将cg的相对容差参数由tol更名为rtol
+_CG_TOL_ARG = "rtol" if "rtol" in inspect.signature(cg).parameters else "tol"
+
+
+class QPSolver:
+    """
+    二次规划求解器类
+
+    同一个求解器对象在多次求解之间保存上一次的解，用作下一次迭代求解的初始值。
+    每次求解后，stats中记录各方向的迭代次数和相对残差。
+    """
+    def __init__(self, method="direct", preconditioner="jacobi", tol=DEFAULT_TOL, maxiter=DEFAULT_MAXITER,
+                 parallel=True):
+        """
+        初始化求解器
+
+        参数:
+            method (str): 求解后端，可选 direct、cg
+            preconditioner (str): 共轭梯度法的预条件方式，可选 jacobi、ichol、none
+            tol (float): 共轭梯度法的相对残差容差
+            maxiter (int): 共轭梯度法的最大迭代次数
+            parallel (bool): 是否在两个线程中并行求解x和y方向
+        """
+        if method not in SOLVERS:
+            raise ValueError(f"未知的求解后端: {method}")
+        if preconditioner not in PRECONDITIONERS:
+            raise ValueError(f"未知的预条件方式: {preconditioner}")
+        self.method = method
+        self.preconditioner = preconditioner
+        self.tol = tol
+        self.maxiter = maxiter
+        self.parallel = parallel
+
+        self.last_solution = {}  # 方向 -> 上一次的解，用于热启动
+        self.stats = {}          # 方向 -> {'iterations': 迭代次数, 'residual': 相对残差, 'converged': 是否收敛}
+
+    def solve(self, A_x, b_x, A_y, b_y):
+        """
+        求解x和y两个方向的线性方程组
+
+        两个方向的矩阵为同一对象时，直接法只做一次分解并同时回代两个右侧向量，
+        迭代法共用同一个预条件算子；否则两个方向在两个线程中并行求解。
+
+        参数:
+            A_x, A_y (scipy.sparse.spmatrix): 系数矩阵
+            b_x, b_y (numpy.ndarray): 右侧向量
+
+        返回值:
+            tuple: (x, y)
+        """
+        shared = A_x is A_y
+        if self.method == "direct" and shared:
+            solution = splu(A_x.tocsc()).solve(np.column_stack([b_x, b_y]))
+            x = self._record("x", A_x, b_x, np.ascontiguousarray(solution[:, 0]), 0, True)
+            y = self._record("y", A_y, b_y, np.ascontiguousarray(solution[:, 1]), 0, True)
+            return x, y
+
+        M_x = M_y = None
+        if self.method == "cg":
+            M_x = self._preconditioner(A_x)
+            M_y = M_x if shared else self._preconditioner(A_y)
+
+        if not self.parallel:
+            return self.solve_axis("x", A_x, b_x, M_x), self.solve_axis("y", A_y, b_y, M_y)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            future_x = pool.submit(self.solve_axis, "x", A_x, b_x, M_x)
+            future_y = pool.submit(self.solve_axis, "y", A_y, b_y, M_y)
+            return future_x.result(), future_y.result()
+
+    def solve_axis(self, axis, A, b, M=None):
+        """
+        求解一个方向的线性方程组，并记录求解统计
+
+        参数:
+            axis (str): 方向名称，用于区分热启动的初始值
+            A (scipy.sparse.spmatrix): 系数矩阵
+            b (numpy.ndarray): 右侧向量
+            M (LinearOperator, optional): 共轭梯度法的预条件算子，为None时按配置构造
+
+        返回值:
+            numpy.ndarray: 方程组的解
+        """
+        if self.method == "direct":
+            return self._record(axis, A, b, splu(A.tocsc()).solve(b), 0, True)
+
+        if M is None:
+            M = self._preconditioner(A)
+        solution, iterations, converged = self._solve_cg(A, b, self._initial_guess(axis, len(b)), M)
+        return self._record(axis, A, b, solution, iterations, converged)
+
+    def format_stats(self):
+        """
+        格式化最近一次求解的统计信息
+
+        返回值:
+            str: 每个方向一行的统计信息
+        """
+        lines = []
+        for axis, stat in sorted(self.stats.items()):
+            status = "" if stat['converged'] else "（未收敛）"
+            lines.append(f"{axis}方向: 迭代 {stat['iterations']} 次，相对残差 {stat['residual']:.3e}{status}")
+        return "\n".join(lines)
+
+    def _record(self, axis, A, b, solution, iterations, converged):
+        """
+        保存解用于热启动，并记录求解统计
+
+        返回值:
+            numpy.ndarray: 传入的解
+        """
+        self.last_solution[axis] = solution
+        self.stats[axis] = {
+            'iterations': iterations,
+            'residual': relative_residual(A, solution, b),
+            'converged': converged,
+        }
+        return solution
+
+    def _initial_guess(self, axis, size):
+        """
+        由上一次的解构造初始值
+
+        前n个变量始终对应可移动节点，因此矩阵维数变化时（例如星模型的辅助变量数量不同）
+        复制公共前缀，其余变量取0。
+        """
+        previous = self.last_solution.get(axis)
+        x0 = np.zeros(size)
+        if previous is not None:
+            common = min(size, len(previous))
+            x0[:common] = previous[:common]
+        return x0
+
+    def _solve_cg(self, A, b, x0, M):
+        """
+        预条件共轭梯度法求解
+
+        返回值:
+            tuple: (解, 迭代次数, 是否收敛)
+        """
+        iterations = [0]
+
+        def count(_):
+            iterations[0] += 1
+
+        kwargs = {_CG_TOL_ARG: self.tol, 'atol': 0.0}
+        solution, info = cg(A, b, x0=x0, maxiter=self.maxiter,
+                            M=M, callback=count, **kwargs)
+        return solution, iterations[0], info == 0
+
+    def _preconditioner(self, A):
+        """
+        构造预条件算子
+
+        jacobi为对角线的倒数；ichol为不完全Cholesky分解（LDL^T形式）。
+        """
+        if self.preconditioner == "jacobi":
+            diag = A.diagonal()
+            inv_diag = np.divide(1.0, diag, out=np.ones_like(diag), where=diag != 0)
+            return sparse.diags(inv_diag)
+        if self.preconditioner == "ichol":
+            return incomplete_cholesky(A)
+        return None
+
+
+def incomplete_cholesky(A, drop_tol=ICHOL_DROP_TOL):
+    """
+    构造不完全Cholesky分解预条件算子 M^-1 = P^T L^-T D^-1 L^-1 P
+
+    利用SuperLU的不完全分解（对称排列、不选主元）得到单位下三角因子L和对角线D，
+    只使用L和D组成对称正定的预条件，保证共轭梯度法所需的对称性。
+    直接使用不完全LU的L和U时，由于丢弃的元素不对称，共轭梯度法可能无法收敛。
+
+    参数:
+        A (scipy.sparse.spmatrix): 对称正定矩阵
+        drop_tol (float): 不完全分解的丢弃阈值
+
+    返回值:
+        scipy.sparse.linalg.LinearOperator: 预条件算子
+    """
+    ilu = spilu(A.tocsc(), drop_tol=drop_tol, fill_factor=10, permc_spec="MMD_AT_PLUS_A",
+                diag_pivot_thresh=0.0, options={"SymmetricMode": True})
+    lower = ilu.L.tocsr()
+    upper = ilu.L.T.tocsr()
+    diag = np.abs(ilu.U.diagonal())
+    diag[diag == 0] = 1.0
+    perm = ilu.perm_c
+
+    def apply(v):
+        permuted = np.empty_like(v)
+        permuted[perm] = v
+        w = spsolve_triangular(lower, permuted, lower=True, unit_diagonal=True)
+        w /= diag
+        return spsolve_triangular(upper, w, lower=False, unit_diagonal=True)[perm]
+
+    return LinearOperator(A.shape, apply)
+
+
+def relative_residual(A, x, b):
+    """
+    计算相对残差 ||b - Ax|| / ||b||
+
+    参数:
+        A (scipy.sparse.spmatrix): 系数矩阵
+        x, b (numpy.ndarray): 解和右侧向量
+
+    返回值:
+        float: 相对残差，b为零向量时返回残差的绝对值
+    """
+    residual = np.linalg.norm(b - A @ x)
+    norm_b = np.linalg.norm(b)
+    return float(residual / norm_b) if norm_b > 0 else float(residual)
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基于行的合法化（Tetris + Abacus）
+
+按.scl文件中的行把可移动单元放到行和站点上，消除单元之间的重叠:
+    1. Tetris：单元按x坐标从左到右依次放置，决定每个单元所在的行和区间。每一行（相同Coordinate的行）
+       由若干按x排序的空闲区间（row_segments.RowSegments从.scl子行中扣除固定单元后得到）组成，
+       每个区间记录两个前沿：已放置单元全部靠左排列时的最右端（装箱前沿，决定区间是否还放得下），
+       以及按期望位置放置时的最右端（估计前沿，决定单元的估计位置）。每个区间中的候选位置是估计前沿右侧
+       离期望位置最近的站点，超出区间右端时暂时放在右端，单元放在位移（|dx| + |dy|）最小的候选位置。
+       先用二分查找检查期望行；其他行有可能更近且这样的行较多时，用NumPy一次计算一个行窗口中所有区间的候选位置，
+       窗口只包含位移小于当前最优代价的行，并按各行记录的水平位移下界跳过不可能更近的行。
+       没有NumPy时在期望行附近逐行向外搜索，结果相同。期望位置左侧的空间因此不会浪费：
+       二次规划的解集中在核心区域中央时，单元仍然可以向左铺满整行。
+       高度超过一行的单元同时占用连续多行，在单行单元之前放置，其位置不小于各行的装箱前沿；放置后从行中
+       扣除（RowSegments.without），单行单元在剩余的空闲区间中合法化，Abacus因此只处理单行单元。
+    2. Abacus：行分配不变，按Tetris得到的顺序在每个区间内重新求x坐标，使各单元到期望位置的
+       加权平方位移之和最小。令q_i = p_i - (同一区间内前面单元的宽度之和)，不重叠约束即为q单调不减，
+       问题化为保序回归（Abacus中的单元簇合并），结果截断到区间范围内后取整到站点。
+       SciPy提供isotonic_regression（1.12起）时，所有区间拼接后一次求解，否则逐区间用PAVA求解。
+       不进行Abacus优化时同样求解一次，期望位置换成Tetris的估计位置，只把重叠的单元向左推开。
+
+没有NumPy时Tetris只使用Python列表和bisect，Abacus也使用纯Python实现，
+因此不依赖NumPy的initial_placement_simple.py也可以使用本模块。
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # initial_placement_simple.py 不依赖NumPy
+    np = None
+
+try:
+    from scipy.optimize import isotonic_regression
+except ImportError:  # SciPy 1.12 之前没有保序回归
+    isotonic_regression = None
+
+from row_segments import EPS
+
+# 期望行放不下单元时，NumPy窗口查找的初始窗口（期望行上下各WINDOW_ROWS行）
+WINDOW_ROWS = 8
+# 期望行放得下单元、位移小于其代价的行不超过SCAN_ROWS行时，逐行查找
+SCAN_ROWS = 16
+
+
+class RowLegalizer:
+    """
+    行合法化器类
+
+    属性:
+        segments (RowSegments): 行区间索引
+        level_y, level_height (list): 各行的y坐标和高度（与segments共用）
+        seg_lo, seg_hi, seg_origin, seg_site (list): 每行中按x排序的空闲区间（与segments共用）
+        stats (dict): 最近一次legalize的统计（放置数、失败数、位移）
+        unplaced (list): 最近一次legalize中无法放置的单元下标
+    """
+    def __init__(self, segments):
+        """
+        初始化合法化器
+
+        参数:
+            segments (RowSegments): 扣除固定单元后的行区间索引
+        """
+        self.segments = segments
+        self.level_y = segments.level_y
+        self.level_height = segments.level_height
+        self.seg_lo = segments.seg_lo
+        self.seg_hi = segments.seg_hi
+        self.seg_origin = segments.seg_origin
+        self.seg_site = segments.seg_site
+        self.stats = {}
+        self.unplaced = []
+
+    @property
+    def level_count(self):
+        """行数"""
+        return len(self.level_y)
+
+    def legalize(self, x, y, width, height, abacus=True):
+        """
+        合法化一组单元
+
+        参数:
+            x, y (sequence): 单元左下角的期望坐标
+            width, height (sequence): 单元尺寸
+            abacus (bool): 是否在Tetris之后用Abacus重新求每个区间内的x坐标
+
+        返回值:
+            tuple: (x坐标列表, y坐标列表)，无法放置的单元保持期望坐标，数量记录在stats["failed"]中。
+                   期望坐标不是有限值的单元以所有行的中心为期望位置
+        """
+        # 期望坐标不是有限值（例如二次规划求解失败）的单元以所有行的中心为期望位置
+        lows = [lo[0] for lo in self.seg_lo if lo]
+        highs = [hi[-1] for hi in self.seg_hi if hi]
+        center_x = (min(lows) + max(highs)) / 2 if lows else 0.0
+        center_y = (self.level_y[0] + self.level_y[-1]) / 2 if self.level_y else 0.0
+        xs = [float(v) if math.isfinite(v) else center_x for v in x]
+        ys = [float(v) if math.isfinite(v) else center_y for v in y]
+        ws = [float(v) for v in width]
+        hs = [float(v) for v in height]
+        count = len(xs)
+        if np is not None and count:
+            order = np.argsort(np.asarray(xs), kind='stable').tolist()
+        else:
+            order = sorted(range(count), key=xs.__getitem__)
+
+        new_x = list(xs)
+        new_y = list(ys)
+        self.unplaced = []
+        tall = [i for i in order if self._cell_levels(ys[i], hs[i]) > 1] if self.level_y else []
+        if tall:
+            # 多行单元先放置，再从行中扣除，作为障碍；单行单元在剩余的空闲区间中合法化，
+            # 这样多行单元不会在放置过程中截断区间，使其左侧的空间对后续单元不可用
+            placement = self._tetris(tall, xs, ys, ws, hs)
+            placed = []
+            for i in tall:
+                if placement[i] is None:
+                    self.unplaced.append(i)
+                else:
+                    new_x[i], new_y[i] = placement[i][0], self.level_y[placement[i][1]]
+                    placed.append(i)
+            single = [i for i in range(count) if self._cell_levels(ys[i], hs[i]) == 1]
+            inner = RowLegalizer(self.segments.without(([new_x[i] for i in placed], [new_y[i] for i in placed],
+                                                        [ws[i] for i in placed], [hs[i] for i in placed])))
+            single_x, single_y = inner.legalize([xs[i] for i in single], [ys[i] for i in single],
+                                                [ws[i] for i in single], [hs[i] for i in single], abacus)
+            for j, i in enumerate(single):
+                new_x[i], new_y[i] = single_x[j], single_y[j]
+            self.unplaced.extend(single[j] for j in inner.unplaced)
+            self.unplaced.sort()
+        else:
+            placement = self._tetris(order, xs, ys, ws, hs)
+            for i, placed in enumerate(placement):
+                if placed is None:
+                    self.unplaced.append(i)
+                else:
+                    new_x[i], new_y[i] = placed[0], self.level_y[placed[1]]
+            # Tetris的估计位置在区间右端可能重叠，装箱后才是合法位置
+            self._abacus(xs if abacus else list(new_x), ws, new_x)
+
+        displacement = [abs(new_x[i] - xs[i]) + abs(new_y[i] - ys[i]) for i in range(count)]
+        failed = len(self.unplaced)
+        self.stats = {"placed": count - failed, "failed": failed,
+                      "total_displacement": float(sum(displacement)),
+                      "max_displacement": float(max(displacement, default=0.0))}
+        return new_x, new_y
+
+    def _cell_levels(self, target_y, height):
+        """单元占用的行数，按期望位置最近的行的高度计算"""
+        return max(1, math.ceil(height / self.level_height[self.segments.nearest_level(target_y)] - EPS))
+
+    def _fit_level(self, level, bases, fronts, target_x, width):
+        """
+        在一行中找离target_x最近的可放置位置：从期望位置所在的区间开始向左、右各找到第一个放得下的区间
+
+        参数:
+            bases (list): 每行各区间的装箱前沿，区间放得下当且仅当装箱前沿加上单元宽度不超过右端
+            fronts (list): 每行各区间的估计前沿，单元的估计位置不小于估计前沿，超出右端时取右端
+
+        返回值:
+            tuple: (估计x坐标, 区间下标)，放不下时为None
+        """
+        lo_list = self.seg_lo[level]
+        hi_list = self.seg_hi[level]
+        origin_list = self.seg_origin[level]
+        site_list = self.seg_site[level]
+        base_list = bases[level]
+        front_list = fronts[level]
+        start = max(bisect_right(lo_list, target_x) - 1, 0)
+        # 期望位置落在两个区间之间（例如固定单元内）时，start是左侧的区间，向右从下一个区间开始查找
+        if lo_list and target_x >= hi_list[start]:
+            start += 1
+        best = None
+        for step in (1, -1):
+            k = start if step == 1 else start - 1
+            while 0 <= k < len(lo_list):
+                origin, site, base, hi = origin_list[k], site_list[k], base_list[k], hi_list[k]
+                span = math.ceil(width / site - EPS) * site
+                if base + span <= hi + EPS:
+                    # 期望位置取整到站点，不能越过估计前沿；超出区间右端时暂时放在右端
+                    pos = origin + round((max(target_x, front_list[k]) - origin) / site) * site
+                    pos = max(min(pos, origin + math.floor((hi - span - origin) / site + EPS) * site), base)
+                    if best is None or abs(pos - target_x) < abs(best[0] - target_x):
+                        best = (pos, k)
+                    break
+                k += step
+        return best
+
+    def _fit_span(self, level, levels, bases, target_x, width):
+        """
+        在连续levels行中放置一个多行单元：以最下面一行的位置为起点，向右移动到不小于每一行的装箱前沿为止
+
+        返回值:
+            tuple: (x坐标, 每行的区间下标列表)，放不下时为None
+        """
+        fit = self._fit_level(level, bases, bases, target_x, width)
+        if fit is None:
+            return None
+        pos = fit[0]
+        for _ in range(levels + 1):
+            segments = []
+            moved = False
+            for m in range(level, level + levels):
+                k = bisect_right(self.seg_lo[m], pos + EPS) - 1
+                if k < 0:
+                    return None
+                origin, site = self.seg_origin[m][k], self.seg_site[m][k]
+                span = math.ceil(width / site - EPS) * site
+                base = bases[m][k]
+                if base > pos + EPS:
+                    pos = origin + math.ceil((base - origin) / site - EPS) * site
+                    moved = True
+                if pos + span > self.seg_hi[m][k] + EPS:
+                    return None
+                segments.append(k)
+            if not moved:
+                return pos, segments
+        return None
+
+    def _fit_single(self, level, bases, fronts, target_x, width):
+        """
+        在一行中放置单行单元，返回值与_fit_level相同
+
+        常见情况：单元放在期望位置所在区间的估计前沿处，且左侧的区间不会更近，不需要调用_fit_level
+        """
+        lo_list = self.seg_lo[level]
+        k = bisect_right(lo_list, target_x) - 1
+        if k >= 0:
+            site = self.seg_site[level][k]
+            span = math.ceil(width / site - EPS) * site
+            hi = self.seg_hi[level][k]
+            front = fronts[level][k]
+            if (target_x <= front and front + span <= hi + EPS and bases[level][k] + span <= hi + EPS
+                    and (k == 0 or front - target_x <= target_x - lo_list[k])):
+                return front, k
+        return self._fit_level(level, bases, fronts, target_x, width)
+
+    def _search_rows(self, base, levels, bases, fronts, target_x, target_y, width):
+        """
+        从期望行向上下两侧交替扩展，逐行查找代价（|dx| + |dy|）最小的位置，行的位移超过当前最优代价时停止
+
+        返回值:
+            tuple: (估计x坐标, 最下面一行的下标, 每行的区间下标列表)，放不下时为None
+        """
+        level_y = self.level_y
+        level_count = len(level_y)
+        best = None
+        best_cost = math.inf
+        below, above = base, base + 1
+        while below >= 0 or above < level_count:
+            dy_below = target_y - level_y[below] if below >= 0 else math.inf
+            dy_above = level_y[above] - target_y if above < level_count else math.inf
+            if dy_below <= dy_above:
+                level, dy = below, abs(dy_below)
+                below -= 1
+            else:
+                level, dy = above, abs(dy_above)
+                above += 1
+            if dy >= best_cost:
+                break
+            if level + levels > level_count:
+                continue
+            if levels == 1:
+                fit = self._fit_single(level, bases, fronts, target_x, width)
+                if fit is not None:
+                    fit = (fit[0], [fit[1]])
+            else:
+                fit = self._fit_span(level, levels, bases, target_x, width)
+            if fit is not None:
+                cost = abs(fit[0] - target_x) + dy
+                if cost < best_cost:
+                    best_cost = cost
+                    best = (fit[0], level, fit[1])
+        return best
+
+    def _search_window(self, base, bases, fronts, target_x, target_y, width):
+        """
+        查找单行单元代价最小的位置：先检查期望行，其他行有可能更近时，
+        用NumPy一次计算一个行窗口中每个区间的位置和代价
+
+        同一行中更远的区间代价只会更大，窗口中所有区间的最小值即为逐行调用_fit_level的结果。
+        已有候选位置时，窗口为位移小于其代价的所有行；期望行放不下时，窗口从期望行上下各WINDOW_ROWS行开始，
+        每次扩大为4倍，直到找到位置或覆盖所有行。
+
+        返回值:
+            tuple: (估计x坐标, 行下标, [区间下标])，放不下时为None
+        """
+        level_y = self.level_y
+        level_count = len(level_y)
+        best = None
+        bound = math.inf
+        fit = self._fit_single(base, bases, fronts, target_x, width)
+        if fit is not None:
+            best = (fit[0], base, [fit[1]])
+            bound = abs(fit[0] - target_x) + abs(level_y[base] - target_y)
+            # 相邻的行已经不会更近时，不需要再查找其他行
+            dy_below = target_y - level_y[base - 1] if base > 0 else math.inf
+            dy_above = level_y[base + 1] - target_y if base + 1 < level_count else math.inf
+            if bound <= min(dy_below, dy_above):
+                return best
+
+            # 需要查找的行不多时逐行查找比NumPy更快
+            if bisect_left(level_y, target_y + bound) - bisect_right(level_y, target_y - bound) <= SCAN_ROWS:
+                return self._search_rows(base, 1, bases, fronts, target_x, target_y, width)
+
+        rows = WINDOW_ROWS
+        while True:
+            if bound < math.inf:
+                first = bisect_right(level_y, target_y - bound)
+                last = bisect_left(level_y, target_y + bound)
+            else:
+                first, last = max(base - rows, 0), min(base + rows + 1, level_count)
+            fit = self._fit_window(first, last, target_x, target_y, width, bound)
+            if fit is not None:
+                bound, best = fit
+            # 窗口外的行的位移都不小于当前最优代价时结果是精确的
+            if ((first == 0 or target_y - level_y[first - 1] >= bound) and
+                    (last == level_count or level_y[last] - target_y >= bound)):
+                return best
+            rows *= 4
+
+    def _flatten(self, bases, fronts, width):
+        """
+        把各行的区间展开为按行排列的NumPy数组，供_fit_window使用
+
+        所有区间的站点宽度相同、站点起点和区间左端都是整数且在同一站点网格上时（BookShelf格式的常见情况），
+        _fit_window直接用标量计算取整后的期望位置和单元宽度
+
+        参数:
+            width (float): 待放置单元的最大宽度，用于计算各行水平位移的下界
+        """
+        counts = [len(lo) for lo in self.seg_lo]
+        self._row_start = [0]
+        for length in counts:
+            self._row_start.append(self._row_start[-1] + length)
+        self._row_count = np.array(counts)
+        self._row_first = np.array(self._row_start[:-1])
+        self._flat_level = np.repeat(np.arange(len(counts)), counts)
+        self._flat_y = np.asarray(self.level_y, dtype=np.float64)[self._flat_level]
+        self._flat_origin = np.array([v for row in self.seg_origin for v in row], dtype=np.float64)
+        self._flat_site = np.array([v for row in self.seg_site for v in row], dtype=np.float64)
+        self._flat_hi = np.array([v for row in self.seg_hi for v in row], dtype=np.float64)
+        self._flat_base = np.array([v for row in bases for v in row], dtype=np.float64)
+        self._flat_front = np.array([v for row in fronts for v in row], dtype=np.float64)
+        # 区间中最右侧的站点边界（估计位置的右端不超过它），以及装箱前沿右侧的空闲宽度
+        self._flat_right = self._flat_origin + np.floor((self._flat_hi - self._flat_origin) / self._flat_site
+                                                        + EPS) * self._flat_site
+        self._flat_free = self._flat_hi - self._flat_base
+        self._grid = None
+        if len(self._flat_site):
+            site = float(self._flat_site[0])
+            lo = self._flat_base
+            if (site >= 1 and site.is_integer() and np.all(self._flat_site == site)
+                    and np.all(self._flat_origin == np.round(self._flat_origin)) and np.all(lo == np.round(lo))
+                    and np.all((self._flat_origin - self._flat_origin[0]) % site == 0)
+                    and np.all((lo - self._flat_origin[0]) % site == 0)):
+                self._grid = (float(self._flat_origin[0]), site)
+        # 各行水平位移的下界：估计位置不小于min(估计前沿, 最右侧站点边界 - 单元宽度)，不大于最右侧站点边界，
+        # 且区间的空闲宽度放得下单元（不在站点网格上时估计前沿取整最多向左半个站点）。单元按宽度（最小站点宽度的倍数）
+        # 分为[2^c, 2^(c+1))的若干类，每类分别记录各行计算下界时的期望x坐标和区间下界的最小值。
+        # 前沿只会增大，下界随时间仍然成立，期望位置移动dx时下界最多减小|dx|
+        self._unit = float(self._flat_site.min()) if len(self._flat_site) else 1.0
+        classes = self._width_class(width) + 1
+        self._flat_shift = None if self._grid is not None else self._flat_site / 2
+        self._flat_cap = [self._flat_right - (self._unit * 2 ** (c + 1) + self._flat_site) for c in range(classes)]
+        # 没有区间的行的下界为nan，不会被选中
+        self._row_bound = np.tile(np.where(self._row_count > 0, 0.0, np.nan), (classes, 1))
+        self._row_x = np.zeros((classes, len(counts)))
+        self._row_y = np.asarray(self.level_y, dtype=np.float64)
+
+    def _width_class(self, width):
+        """单元宽度所属的类c，宽度在最小站点宽度的[2^c, 2^(c+1))倍之间（小于2倍的都属于第0类）"""
+        c = max(int(math.log2(width / self._unit)), 0) if width >= 2 * self._unit else 0
+        while c > 0 and self._unit * 2 ** c > width:
+            c -= 1
+        while width >= self._unit * 2 ** (c + 1):
+            c += 1
+        return c
+
+    def _fit_window(self, first, last, target_x, target_y, width, bound):
+        """
+        计算第first到last（不含）行中每个区间放置单行单元的位置和代价，规则与_fit_level相同
+
+        位移下界加上行的位移大于bound的行不可能更近，直接跳过；计算过的行更新位移下界
+
+        返回值:
+            tuple: (代价, (估计x坐标, 行下标, [区间下标]))，都放不下时为None
+        """
+        c = self._width_class(width)
+        row_bound, row_x = self._row_bound[c], self._row_x[c]
+        lower = row_x[first:last] - target_x
+        np.abs(lower, out=lower)
+        np.subtract(row_bound[first:last], lower, out=lower)
+        dy = self._row_y[first:last] - target_y
+        np.abs(dy, out=dy)
+        lower += dy
+        rows = (lower <= bound).nonzero()[0]
+        if not len(rows):
+            return None
+        rows += first
+        if rows[-1] - rows[0] + 1 == len(rows):
+            # 选中的行连续时直接切片
+            start = self._row_start[rows[0]]
+            index = slice(start, self._row_start[rows[-1] + 1])
+            offsets = self._row_first[rows[0]:rows[-1] + 1] - start
+        else:
+            counts = self._row_count[rows]
+            offsets = counts.cumsum() - counts
+            index = np.arange(offsets[-1] + counts[-1]) + np.repeat(self._row_first[rows] - offsets, counts)
+        front = self._flat_front[index]
+        right = self._flat_right[index]
+        if self._grid is not None:
+            # 整数站点网格上的前沿都在站点上，取整后的期望位置与前沿取较大值即可
+            origin, site = self._grid
+            span = math.ceil(width / site - EPS) * site
+            pos = np.maximum(front, origin + round((target_x - origin) / site) * site)
+        else:
+            origin = self._flat_origin[index]
+            site = self._flat_site[index]
+            span = np.ceil(width / site - EPS) * site
+            pos = origin + np.round((np.maximum(front, target_x) - origin) / site) * site
+        np.minimum(pos, right - span, out=pos)
+        if self._grid is None:
+            np.maximum(pos, self._flat_base[index], out=pos)
+        cost = pos - target_x
+        np.abs(cost, out=cost)
+        dy = self._flat_y[index] - target_y
+        np.abs(dy, out=dy)
+        cost += dy
+        free = self._flat_free[index]
+        cost[free < span - EPS] = np.inf
+
+        # 更新计算过的行的位移下界
+        lower = np.minimum(front if self._grid is not None else front - self._flat_shift[index],
+                           self._flat_cap[c][index])
+        lower -= target_x
+        np.maximum(lower, target_x - right, out=lower)
+        np.maximum(lower, 0.0, out=lower)
+        if c:
+            lower[free < self._unit * (2 ** c - 0.5)] = np.inf
+        row_bound[rows] = np.minimum.reduceat(lower, offsets)
+        row_x[rows] = target_x
+
+        j = cost.argmin()
+        best = cost[j]
+        if best == np.inf:
+            return None
+        ties = cost == best
+        ties[j] = False
+        if ties.any():
+            ties[j] = True
+            ties = ties.nonzero()[0]
+            # 与_search_rows的访问顺序相同：位移小的行优先，位移相同时下方的行优先，同一行中右侧的区间优先
+            level = self._flat_level[index][ties]
+            j = ties[np.lexsort((-ties, level, dy[ties]))[0]]
+        flat = int(index.start + j if isinstance(index, slice) else index[j])
+        level = int(self._flat_level[flat])
+        return float(best), (float(pos[j]), level, [flat - self._row_start[level]])
+
+    def _tetris(self, order, xs, ys, ws, hs):
+        """
+        按order依次放置单元
+
+        返回值:
+            list: 每个单元的 (估计x坐标, 最下面一行的下标)，放不下时为None
+        """
+        level_count = len(self.level_y)
+        bases = [list(lo) for lo in self.seg_lo]
+        fronts = [list(lo) for lo in self.seg_lo]
+        # 每个区间中按放置顺序（即x坐标顺序）排列的单元，供Abacus使用
+        self.segment_cells = [[[] for _ in lo] for lo in self.seg_lo]
+        placement = [None] * len(xs)
+        if level_count == 0:
+            return placement
+        if np is not None:
+            self._flatten(bases, fronts, max((ws[i] for i in order), default=0.0))
+
+        for i in order:
+            target_x, target_y, width = xs[i], ys[i], ws[i]
+            base = self.segments.nearest_level(target_y)
+            levels = max(1, math.ceil(hs[i] / self.level_height[base] - EPS))
+            if levels == 1 and np is not None:
+                best = self._search_window(base, bases, fronts, target_x, target_y, width)
+            else:
+                best = self._search_rows(base, levels, bases, fronts, target_x, target_y, width)
+            if best is None:
+                continue
+
+            pos, level, segments = best
+            placement[i] = (pos, level)
+            for m, k in zip(range(level, level + levels), segments):
+                span = math.ceil(width / self.seg_site[m][k] - EPS) * self.seg_site[m][k]
+                if levels == 1:
+                    bases[m][k] += span
+                    fronts[m][k] = pos + span
+                else:
+                    # 多行单元之间不装箱，后续单元从它的右端开始
+                    bases[m][k] = fronts[m][k] = pos + span
+                if np is not None:
+                    flat = self._row_start[m] + k
+                    self._flat_base[flat] = bases[m][k]
+                    self._flat_front[flat] = fronts[m][k]
+                    self._flat_free[flat] = self._flat_hi[flat] - bases[m][k]
+                self.segment_cells[m][k].append(i)
+        return placement
+
+    def _abacus_groups(self):
+        """
+        列出每个非空区间中的单元（多行单元已在Tetris之前扣除，区间中只有单行单元）
+
+        产出:
+            tuple: (单元列表, 站点起点, 站点宽度, 左边界站点, 右边界站点)，边界相对于站点起点
+        """
+        for level, cells_by_segment in enumerate(self.segment_cells):
+            for k, cells in enumerate(cells_by_segment):
+                if cells:
+                    origin, site = self.seg_origin[level][k], self.seg_site[level][k]
+                    yield (cells, origin, site, round((self.seg_lo[level][k] - origin) / site),
+                           round((self.seg_hi[level][k] - origin) / site))
+
+    def _abacus(self, xs, ws, new_x):
+        """
+        在每个区间内按期望x坐标xs重新放置单行单元（保序回归），结果写入new_x
+        """
+        targets = []
+        weights = []
+        prefixes = []
+        bounds = []
+        cells = []
+        sites = []
+        origins = []
+        sizes = []
+        for group, origin, site, left, right in self._abacus_groups():
+            prefix = 0
+            group_prefix = []
+            for i in group:
+                size = math.ceil(ws[i] / site - EPS)
+                group_prefix.append(prefix)
+                targets.append((xs[i] - origin) / site - prefix)
+                weights.append(max(size, 1))
+                prefix += size
+            prefixes.extend(group_prefix)
+            bounds.append((left, right - prefix, len(group)))
+            cells.extend(group)
+            sites.extend([site] * len(group))
+            origins.extend([origin] * len(group))
+            sizes.append(len(group))
+        if not cells:
+            return
+
+        fitted = self._isotonic(targets, weights, sizes)
+        position = 0
+        for low, high, size in bounds:
+            for j in range(position, position + size):
+                q = min(max(round(fitted[j]), low), high)
+                new_x[cells[j]] = origins[j] + (q + prefixes[j]) * sites[j]
+            position += size
+
+    @staticmethod
+    def _isotonic(targets, weights, sizes):
+        """
+        对每组分别做加权保序回归（单调不减）
+
+        参数:
+            targets (list): 所有组拼接的目标值
+            weights (list): 权重
+            sizes (list): 每组的长度
+
+        返回值:
+            list: 拼接的拟合值
+        """
+        if isotonic_regression is not None and np is not None:
+            # 各组依次加上足够大的偏移量后拼接，组与组之间不会合并，一次调用即可求解
+            values = np.asarray(targets, dtype=np.float64)
+            group = np.repeat(np.arange(len(sizes)), sizes)
+            gap = float(values.max() - values.min()) + 1.0
+            offset = group * gap
+            result = isotonic_regression(values + offset, weights=np.asarray(weights, dtype=np.float64))
+            return (result.x - offset).tolist()
+
+        fitted = []
+        position = 0
+        for size in sizes:
+            fitted.extend(_pava(targets[position:position + size], weights[position:position + size]))
+            position += size
+        return fitted
+
+
+def _pava(targets, weights):
+    """
+    加权保序回归的PAVA算法（Abacus的单元簇合并）
+
+    参数:
+        targets (list): 目标值
+        weights (list): 权重
+
+    返回值:
+        list: 单调不减的拟合值
+    """
+    values = []
+    totals = []
+    counts = []
+    for target, weight in zip(targets, weights):
+        values.append(target)
+        totals.append(weight)
+        counts.append(1)
+        # 与左侧的簇违反顺序时合并，簇的取值为加权平均
+        while len(values) > 1 and values[-2] > values[-1]:
+            weight = totals[-2] + totals[-1]
+            value = (values[-2] * totals[-2] + values[-1] * totals[-1]) / weight
+            count = counts[-2] + counts[-1]
+            del values[-1], totals[-1], counts[-1]
+            values[-1], totals[-1], counts[-1] = value, weight, count
+    fitted = []
+    for value, count in zip(values, counts):
+        fitted.extend([value] * count)
+    return fitted
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+扣除固定单元后的行区间索引
+
+ISPD设计中的固定单元（terminal）大多是位于核心区域内的宏单元，放置可移动单元时必须避开。
+RowSegments在建立时把每个固定单元的矩形从它覆盖的各行中扣除：先按y坐标用二分查找找到矩形覆盖的行，
+把x区间收集到这些行上，再逐行排序、合并，并从.scl子行中扣除，区间端点向内对齐到站点。
+结果是每行一组按x排序、互不相交的空闲区间（seg_lo、seg_hi，以及每个区间的站点起点和站点宽度），
+之后的查询都是二分查找：
+    find_segment:   x所在的空闲区间
+    free_length:    一行中[x0, x1)内的空闲长度（按区间长度的前缀和，O(log S)）
+    free_area:      矩形内的空闲面积
+合法化和其他空闲空间查询因此不需要逐单元地扫描固定单元的几何形状。
+band取出连续若干行组成的子索引，without在此基础上再扣除一组障碍（例如已经放置的单元），
+供parallel_legalizer按行带并行合法化后处理剩余单元。
+
+只使用Python列表和bisect，不依赖NumPy。
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+
+# 坐标比较的容差
+EPS = 1e-6
+
+
+class RowSegments:
+    """
+    行区间索引类
+
+    属性:
+        level_y (list): 按y排序的各行（相同Coordinate的子行合并为一行）的y坐标
+        level_height (list): 各行的高度
+        seg_lo, seg_hi (list): 每行中按x排序的空闲区间左右端点（列表的列表）
+        seg_origin, seg_site (list): 每个空闲区间所属子行的站点起点和站点宽度
+        blocked_length (float): 被固定单元（以及without扣除的障碍）占据的行长度之和
+    """
+    def __init__(self, row_x, row_y, row_height, row_site_width, row_num_sites, obstacles=None):
+        """
+        由.scl文件中的行建立空闲区间索引
+
+        参数:
+            row_x, row_y (sequence): 每个子行的SubrowOrigin和Coordinate
+            row_height (sequence): 每个子行的高度
+            row_site_width (sequence): 每个子行的站点宽度
+            row_num_sites (sequence): 每个子行的站点数
+            obstacles (tuple, optional): 固定单元的 (x, y, width, height) 四个序列，为None时不扣除
+        """
+        rows = sorted(zip(map(float, row_y), map(float, row_x), map(float, row_height),
+                          map(float, row_site_width), map(int, row_num_sites)))
+        self.level_y = []
+        self.level_height = []
+        subrows = []  # 每行的 (起点, 终点, 站点起点, 站点宽度) 列表
+        for y, x, height, site, num_sites in rows:
+            if num_sites <= 0:
+                continue
+            if not self.level_y or y != self.level_y[-1]:
+                self.level_y.append(y)
+                self.level_height.append(height)
+                subrows.append([])
+            subrows[-1].append((x, x + num_sites * site, x, site))
+
+        self._build(subrows, obstacles)
+
+    def _build(self, subrows, obstacles):
+        """
+        从每行的子行中扣除障碍，建立空闲区间和前缀和
+
+        参数:
+            subrows (list): 每行的 (起点, 终点, 站点起点, 站点宽度) 列表
+            obstacles (tuple): 障碍的 (x, y, width, height) 四个序列，为None时不扣除
+        """
+        # 把每个障碍的x区间收集到它在y方向上覆盖的行
+        blockers = [[] for _ in self.level_y]
+        if obstacles is not None:
+            for ox, oy, width, height in zip(*obstacles):
+                if width <= 0 or height <= 0:
+                    continue
+                first = bisect_right(self.level_y, oy + EPS) - 1
+                # 下边界在行内时该行也被覆盖
+                if first < 0 or oy >= self.level_y[first] + self.level_height[first] - EPS:
+                    first += 1
+                last = bisect_left(self.level_y, oy + height - EPS)
+                for level in range(max(first, 0), last):
+                    blockers[level].append((ox, ox + width))
+
+        self.seg_lo = []
+        self.seg_hi = []
+        self.seg_origin = []
+        self.seg_site = []
+        self._prefix = []
+        self._blocked = []
+        for level, segments in enumerate(subrows):
+            free = _subtract(sorted(segments), _merge(sorted(blockers[level])))
+            self.seg_lo.append([lo for lo, _, _, _ in free])
+            self.seg_hi.append([hi for _, hi, _, _ in free])
+            self.seg_origin.append([origin for _, _, origin, _ in free])
+            self.seg_site.append([site for _, _, _, site in free])
+            prefix = [0.0]
+            for lo, hi, _, _ in free:
+                prefix.append(prefix[-1] + hi - lo)
+            self._prefix.append(prefix)
+            self._blocked.append(sum(hi - lo for lo, hi, _, _ in segments) - prefix[-1])
+
+    def _free_segments(self, level):
+        """一行的空闲区间，格式与_build的子行相同"""
+        return list(zip(self.seg_lo[level], self.seg_hi[level], self.seg_origin[level], self.seg_site[level]))
+
+    def band(self, first, last):
+        """
+        第first行到第last行（不含）组成的索引，供按行带分别合法化
+
+        参数:
+            first, last (int): 行下标范围
+
+        返回值:
+            RowSegments: 只包含这些行的索引（列表为切片，不与本索引共用）
+        """
+        band = RowSegments.__new__(RowSegments)
+        band.level_y = self.level_y[first:last]
+        band.level_height = self.level_height[first:last]
+        band.seg_lo = self.seg_lo[first:last]
+        band.seg_hi = self.seg_hi[first:last]
+        band.seg_origin = self.seg_origin[first:last]
+        band.seg_site = self.seg_site[first:last]
+        band._prefix = self._prefix[first:last]
+        band._blocked = self._blocked[first:last]
+        return band
+
+    def without(self, obstacles):
+        """
+        再扣除一组障碍（例如已放置的单元）后的索引
+
+        参数:
+            obstacles (tuple): 障碍的 (x, y, width, height) 四个序列
+
+        返回值:
+            RowSegments: 新的索引，本索引不变
+        """
+        result = RowSegments.__new__(RowSegments)
+        result.level_y = list(self.level_y)
+        result.level_height = list(self.level_height)
+        result._build([self._free_segments(level) for level in range(len(self.level_y))], obstacles)
+        result._blocked = [old + new for old, new in zip(self._blocked, result._blocked)]
+        return result
+
+    @property
+    def blocked_length(self):
+        """被障碍占据的行长度之和"""
+        return sum(self._blocked)
+
+    @property
+    def level_count(self):
+        """行数"""
+        return len(self.level_y)
+
+    @property
+    def segment_count(self):
+        """空闲区间总数"""
+        return sum(len(lo) for lo in self.seg_lo)
+
+    @property
+    def free_total(self):
+        """所有行的空闲长度之和"""
+        return sum(prefix[-1] for prefix in self._prefix)
+
+    def nearest_level(self, y):
+        """
+        离y最近的行
+
+        参数:
+            y (float): y坐标
+
+        返回值:
+            int: 行下标，没有行时为-1
+        """
+        count = len(self.level_y)
+        if count == 0:
+            return -1
+        level = bisect_left(self.level_y, y)
+        if level == count or (level > 0 and y - self.level_y[level - 1] < self.level_y[level] - y):
+            level -= 1
+        return level
+
+    def find_segment(self, level, x):
+        """
+        x所在的空闲区间
+
+        参数:
+            level (int): 行下标
+            x (float): x坐标
+
+        返回值:
+            int: 区间下标，x不在任何空闲区间内时为-1
+        """
+        k = bisect_right(self.seg_lo[level], x + EPS) - 1
+        if k >= 0 and x < self.seg_hi[level][k] - EPS:
+            return k
+        return -1
+
+    def _covered(self, level, x):
+        """一行中x左侧的空闲长度"""
+        lo = self.seg_lo[level]
+        k = bisect_right(lo, x) - 1
+        if k < 0:
+            return 0.0
+        return self._prefix[level][k] + min(max(x - lo[k], 0.0), self.seg_hi[level][k] - lo[k])
+
+    def free_length(self, level, x0, x1):
+        """
+        一行中[x0, x1)内的空闲长度
+
+        参数:
+            level (int): 行下标
+            x0, x1 (float): x区间
+
+        返回值:
+            float: 空闲长度
+        """
+        if x1 <= x0:
+            return 0.0
+        return self._covered(level, x1) - self._covered(level, x0)
+
+    def free_area(self, x0, y0, x1, y1):
+        """
+        矩形[x0, x1) × [y0, y1)内的空闲面积
+
+        参数:
+            x0, y0, x1, y1 (float): 矩形范围
+
+        返回值:
+            float: 空闲面积
+        """
+        area = 0.0
+        first = max(bisect_right(self.level_y, y0) - 1, 0)
+        for level in range(first, bisect_left(self.level_y, y1)):
+            bottom = self.level_y[level]
+            overlap = min(bottom + self.level_height[level], y1) - max(bottom, y0)
+            if overlap > 0:
+                area += overlap * self.free_length(level, x0, x1)
+        return area
+
+
+def _merge(intervals):
+    """
+    合并按起点排序的区间
+
+    参数:
+        intervals (list): (起点, 终点) 列表
+
+    返回值:
+        list: 互不相交的 (起点, 终点) 列表
+    """
+    merged = []
+    for lo, hi in intervals:
+        if merged and lo <= merged[-1][1]:
+            if hi > merged[-1][1]:
+                merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def _subtract(segments, blockers):
+    """
+    从子行中扣除障碍区间，端点向内对齐到站点，去掉不足一个站点的区间
+
+    参数:
+        segments (list): 按起点排序的 (起点, 终点, 站点起点, 站点宽度) 列表
+        blockers (list): 合并后的 (起点, 终点) 列表
+
+    返回值:
+        list: 空闲的 (起点, 终点, 站点起点, 站点宽度) 列表
+    """
+    free = []
+    for lo, hi, origin, site in segments:
+        start = bisect_right(blockers, (lo, math.inf)) - 1
+        start = max(start, 0)
+        cursor = lo
+        for block_lo, block_hi in blockers[start:]:
+            if block_lo >= hi:
+                break
+            if block_hi <= cursor:
+                continue
+            if block_lo > cursor:
+                free.append((cursor, block_lo, origin, site))
+            cursor = max(cursor, block_hi)
+        if cursor < hi:
+            free.append((cursor, hi, origin, site))
+
+    aligned = []
+    for lo, hi, origin, site in free:
+        lo = origin + math.ceil((lo - origin) / site - EPS) * site
+        hi = origin + math.floor((hi - origin) / site + EPS) * site
+        if hi - lo >= site - EPS:
+            aligned.append((lo, hi, origin, site))
+    return aligned
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+"""测试共用的设置和检查函数：把Program目录加入模块搜索路径，测试中的模块与程序一样直接按名称导入"""
+
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from row_segments import EPS  # noqa: E402
+
+
+def assert_legal(segments, x, y, width, height, unplaced=()):
+    """
+    检查合法化结果：每个已放置的单元位于行上、对齐到站点、完全落在空闲区间内，且单元之间互不重叠
+
+    参数:
+        segments (RowSegments): 合法化使用的行区间索引
+        x, y (sequence): 合法化后的坐标
+        width, height (sequence): 单元尺寸
+        unplaced (sequence): 无法放置的单元下标，不参与检查
+    """
+    skip = set(unplaced)
+    occupied = [[] for _ in segments.level_y]
+    for i in range(len(x)):
+        if i in skip:
+            continue
+        level = segments.level_y.index(y[i])
+        levels = max(1, math.ceil(height[i] / segments.level_height[level] - EPS))
+        for m in range(level, level + levels):
+            k = segments.find_segment(m, x[i])
+            assert k >= 0, f"cell {i} is not inside a free segment of row {m}"
+            origin, site = segments.seg_origin[m][k], segments.seg_site[m][k]
+            offset = (x[i] - origin) / site
+            assert abs(offset - round(offset)) < EPS, f"cell {i} is not on a site"
+            assert x[i] + width[i] <= segments.seg_hi[m][k] + EPS, f"cell {i} leaves its segment"
+            occupied[m].append((x[i], x[i] + width[i], i))
+    for row in occupied:
+        row.sort()
+        for (_, right, i), (left, _, j) in zip(row, row[1:]):
+            assert right <= left + EPS, f"cells {i} and {j} overlap"
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""parallel_legalizer的测试：行带划分、合法性、确定性，以及行带内放不下的单元的处理"""
+
+import numpy as np
+
+import parallel_legalizer
+from conftest import assert_legal
+from parallel_legalizer import BOUNDARY_SHARE, ParallelLegalizer, band_bounds
+from row_segments import RowSegments
+from test_row_legalizer import ROW_HEIGHT, clustered_cells, make_segments
+
+
+def test_band_bounds_uses_nearest_row():
+    segments = RowSegments([0.0] * 8, [ROW_HEIGHT * r for r in range(8)], [ROW_HEIGHT] * 8, [1.0] * 8, [100] * 8)
+    # 所有单元都在第3行附近，行按空闲面积均分，行带放得下时单元都留在第3行所在的行带
+    y = np.array([30.0, 31.0, 29.0, 30.5, 32.0, 28.0, 30.2, 29.5])
+    band, bounds = band_bounds(segments, y, np.full(8, 10.0), 4)
+    assert bounds.tolist() == [0, 2, 4, 6, 8]
+    assert band.tolist() == [1] * 8
+
+
+def test_band_bounds_moves_excess_to_neighbours():
+    segments = RowSegments([0.0] * 8, [ROW_HEIGHT * r for r in range(8)], [ROW_HEIGHT] * 8, [1.0] * 8, [100] * 8)
+    # 行带容量为BAND_FILL * 2000 = 1800，超出的1400平分到上下两个行带，移动的是y坐标最小和最大的单元
+    y = np.array([30.0, 31.0, 29.0, 30.5, 32.0, 28.0, 30.2, 29.5])
+    band, bounds = band_bounds(segments, y, np.full(8, 400.0), 4)
+    assert bounds.tolist() == [0, 2, 4, 6, 8]
+    assert band.tolist() == [1, 2, 0, 1, 2, 0, 1, 1]
+
+
+def test_band_bounds_skips_empty_rows():
+    # 中间两行被固定单元完全占据，没有空闲面积
+    segments = RowSegments([0.0] * 4, [ROW_HEIGHT * r for r in range(4)], [ROW_HEIGHT] * 4, [1.0] * 4, [100] * 4,
+                           ([0.0], [ROW_HEIGHT], [100.0], [2 * ROW_HEIGHT]))
+    band, bounds = band_bounds(segments, np.array([0.0, 35.0]), np.array([10.0, 10.0]), 2)
+    assert bounds.tolist() == [0, 1, 4]
+    assert band.tolist() == [0, 1]
+
+
+def test_clustered_input_needs_no_boundary_pass():
+    segments = make_segments()
+    x, y, width, height = clustered_cells(2800, seed=1)
+    legalizer = ParallelLegalizer(segments, 4)
+    new_x, new_y = legalizer.legalize(x, y, width, height)
+    assert legalizer.stats["failed"] == 0
+    assert legalizer.stats["bands"] == 4
+    assert legalizer.stats["boundary"] == 0
+    assert_legal(segments, new_x.tolist(), new_y.tolist(), width, height)
+
+
+def test_result_is_deterministic():
+    segments = make_segments()
+    x, y, width, height = clustered_cells(2400, seed=2, multi_row=True)
+    first = ParallelLegalizer(segments, 3).legalize(x, y, width, height)
+    second = ParallelLegalizer(segments, 3).legalize(x, y, width, height)
+    assert np.array_equal(first[0], second[0])
+    assert np.array_equal(first[1], second[1])
+
+
+def test_multi_row_cells_are_placed_before_banding():
+    # 4个行带各2行，3行高的单元放不进任何一个行带，先在所有行上放置后再划分行带
+    rows = 8
+    segments = RowSegments([0.0] * rows, [ROW_HEIGHT * r for r in range(rows)], [ROW_HEIGHT] * rows, [1.0] * rows,
+                           [200] * rows)
+    rng = np.random.default_rng(4)
+    count = 200
+    width = rng.integers(2, 6, count).astype(float)
+    height = np.full(count, ROW_HEIGHT)
+    height[:20] = 3 * ROW_HEIGHT
+    x = rng.uniform(0.0, 190.0, count)
+    y = rng.uniform(0.0, (rows - 1) * ROW_HEIGHT, count)
+    legalizer = ParallelLegalizer(segments, 4)
+    new_x, new_y = legalizer.legalize(x, y, width, height)
+    assert legalizer.stats["failed"] == 0
+    assert legalizer.stats["boundary"] == 0
+    assert_legal(segments, new_x.tolist(), new_y.tolist(), width, height)
+
+
+def test_overfull_bands_are_rebanded(monkeypatch):
+    # 第一次划分把所有单元放进最下面的行带，行带内放不下的单元重新划分行带后并行合法化
+    original = parallel_legalizer.band_bounds
+    calls = []
+
+    def overfull(segments, y, area, bands):
+        band, bounds = original(segments, y, area, bands)
+        calls.append(len(y))
+        return (np.zeros_like(band) if len(calls) == 1 else band), bounds
+
+    monkeypatch.setattr(parallel_legalizer, "band_bounds", overfull)
+    segments = make_segments()
+    x, y, width, height = clustered_cells(2800, seed=1)
+    legalizer = ParallelLegalizer(segments, 4)
+    new_x, new_y = legalizer.legalize(x, y, width, height)
+    assert len(calls) == 2
+    assert legalizer.stats["rebanded"] > BOUNDARY_SHARE * len(x)
+    assert legalizer.stats["failed"] == 0
+    assert_legal(segments, new_x.tolist(), new_y.tolist(), width, height)
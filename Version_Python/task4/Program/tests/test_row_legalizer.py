@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""row_legalizer的测试：合法性、中央聚集的输入，以及PAVA与SciPy保序回归的一致性"""
+
+import random
+
+import numpy as np
+import pytest
+
+import row_legalizer
+from conftest import assert_legal
+from row_legalizer import RowLegalizer, _pava
+from row_segments import RowSegments
+
+ROWS = 40
+SITES = 400
+ROW_HEIGHT = 10.0
+
+
+def make_segments():
+    """40行、每行400个站点，中间有两个固定宏单元"""
+    return RowSegments([0.0] * ROWS, [ROW_HEIGHT * r for r in range(ROWS)], [ROW_HEIGHT] * ROWS, [1.0] * ROWS,
+                       [SITES] * ROWS, ([120.0, 260.0], [50.0, 200.0], [40.0, 30.0], [60.0, 45.0]))
+
+
+def clustered_cells(count, seed, multi_row=False):
+    """期望位置集中在核心区域中央（与未经全局布局的二次规划解类似）的单元"""
+    rng = np.random.default_rng(seed)
+    width = rng.integers(2, 9, count).astype(float)
+    height = np.full(count, ROW_HEIGHT)
+    if multi_row:
+        tall = rng.random(count) < 0.02
+        height[tall] = 2 * ROW_HEIGHT
+    x = rng.normal(SITES / 2, 8.0, count)
+    y = rng.normal(ROWS * ROW_HEIGHT / 2, 15.0, count)
+    return x, y, width, height
+
+
+@pytest.mark.parametrize("abacus", [True, False])
+def test_clustered_input_places_every_cell(abacus):
+    segments = make_segments()
+    x, y, width, height = clustered_cells(2800, seed=1)
+    utilization = float((width * height).sum()) / (segments.free_total * ROW_HEIGHT)
+    assert utilization > 0.65
+
+    legalizer = RowLegalizer(segments)
+    new_x, new_y = legalizer.legalize(x, y, width, height, abacus)
+    assert legalizer.stats["failed"] == 0
+    assert legalizer.unplaced == []
+    assert_legal(segments, new_x, new_y, width, height)
+
+
+def test_multi_row_cells_are_legal():
+    segments = make_segments()
+    x, y, width, height = clustered_cells(2400, seed=2, multi_row=True)
+    legalizer = RowLegalizer(segments)
+    new_x, new_y = legalizer.legalize(x, y, width, height)
+    assert legalizer.stats["failed"] == 0
+    assert_legal(segments, new_x, new_y, width, height)
+
+
+def test_cells_that_do_not_fit_are_reported():
+    segments = RowSegments([0.0], [0.0], [ROW_HEIGHT], [1.0], [20])
+    legalizer = RowLegalizer(segments)
+    new_x, new_y = legalizer.legalize([0.0, 5.0, 10.0], [0.0] * 3, [8.0] * 3, [ROW_HEIGHT] * 3)
+    assert legalizer.stats["failed"] == 1
+    assert len(legalizer.unplaced) == 1
+    assert_legal(segments, new_x, new_y, [8.0] * 3, [ROW_HEIGHT] * 3, legalizer.unplaced)
+
+
+def test_non_finite_targets_are_placed():
+    segments = make_segments()
+    legalizer = RowLegalizer(segments)
+    new_x, new_y = legalizer.legalize([float("nan"), 10.0], [5.0, float("inf")], [4.0, 4.0], [ROW_HEIGHT] * 2)
+    assert legalizer.stats["failed"] == 0
+    assert_legal(segments, new_x, new_y, [4.0, 4.0], [ROW_HEIGHT] * 2)
+
+
+def test_target_inside_macro_uses_nearest_side():
+    # 期望位置在固定单元内且靠近其右端，应放在固定单元右侧而不是左侧
+    segments = RowSegments([0.0], [0.0], [ROW_HEIGHT], [1.0], [300], ([100.0], [0.0], [100.0], [ROW_HEIGHT]))
+    legalizer = RowLegalizer(segments)
+    new_x, new_y = legalizer.legalize([190.0], [0.0], [4.0], [ROW_HEIGHT])
+    assert new_x == [200.0]
+
+
+def test_pava_matches_scipy():
+    if row_legalizer.isotonic_regression is None:
+        pytest.skip("SciPy 1.12 or later is required")
+    rng = random.Random(3)
+    for _ in range(50):
+        size = rng.randint(1, 30)
+        targets = [rng.uniform(-20, 20) for _ in range(size)]
+        weights = [rng.randint(1, 8) for _ in range(size)]
+        expected = row_legalizer.isotonic_regression(targets, weights=weights).x
+        assert np.allclose(_pava(targets, weights), expected)
+
+
+def test_pure_python_path_matches_scipy_path(monkeypatch):
+    if row_legalizer.isotonic_regression is None:
+        pytest.skip("SciPy 1.12 or later is required")
+    segments = make_segments()
+    x, y, width, height = clustered_cells(2000, seed=4, multi_row=True)
+    expected = RowLegalizer(segments).legalize(x, y, width, height)
+    monkeypatch.setattr(row_legalizer, "isotonic_regression", None)
+    monkeypatch.setattr(row_legalizer, "np", None)
+    assert RowLegalizer(segments).legalize(x, y, width, height) == expected
+
+
+def test_pure_python_path_matches_numpy_path_off_grid(monkeypatch):
+    # 站点宽度不是整数时，NumPy的窗口查找逐区间取整，结果仍与逐行查找相同
+    segments = RowSegments([0.25] * ROWS, [ROW_HEIGHT * r for r in range(ROWS)], [ROW_HEIGHT] * ROWS, [1.5] * ROWS,
+                           [SITES] * ROWS, ([180.0, 390.0], [50.0, 200.0], [61.0, 45.0], [60.0, 45.0]))
+    x, y, width, height = clustered_cells(2000, seed=5)
+    x = x * 1.5
+    expected = RowLegalizer(segments).legalize(x, y, width, height, abacus=False)
+    monkeypatch.setattr(row_legalizer, "np", None)
+    assert RowLegalizer(segments).legalize(x, y, width, height, abacus=False) == expected
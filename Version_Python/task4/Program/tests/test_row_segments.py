@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"""row_segments的测试：扣除固定单元后的空闲区间和查询"""
+
+import pytest
+
+from row_segments import RowSegments, _merge, _subtract
+
+
+def make_segments():
+    """4行，每行由[0, 90)和[100, 200)两个子行组成，一个固定单元覆盖第1、2行的[30.5, 50)"""
+    rows = 4
+    return RowSegments([0.0] * rows + [100.0] * rows, [10.0 * r for r in range(rows)] * 2, [10.0] * (2 * rows),
+                       [1.0] * (2 * rows), [90] * rows + [100] * rows, ([30.5], [10.0], [19.5], [20.0]))
+
+
+def test_merge_and_subtract():
+    assert _merge([(0, 5), (3, 8), (10, 12)]) == [(0, 8), (10, 12)]
+    # 端点向内对齐到站点，不足一个站点的区间被去掉
+    free = _subtract([(0.0, 20.0, 0.0, 2.0)], [(3.0, 5.0), (6.5, 7.0)])
+    assert free == [(0.0, 2.0, 0.0, 2.0), (8.0, 20.0, 0.0, 2.0)]
+
+
+def test_fixed_nodes_are_carved_out():
+    segments = make_segments()
+    assert segments.level_count == 4
+    assert segments.seg_lo[0] == [0.0, 100.0]
+    assert segments.seg_lo[1] == [0.0, 50.0, 100.0]
+    assert segments.seg_hi[1] == [30.0, 90.0, 200.0]
+    assert segments.blocked_length == pytest.approx(2 * 20.0)
+    assert segments.free_total == pytest.approx(4 * 190.0 - 40.0)
+
+
+def test_queries():
+    segments = make_segments()
+    assert segments.find_segment(1, 40.0) == -1
+    assert segments.find_segment(1, 60.0) == 1
+    assert segments.find_segment(0, 95.0) == -1
+    assert segments.nearest_level(14.0) == 1
+    assert segments.nearest_level(-5.0) == 0
+    assert segments.free_length(1, 20.0, 120.0) == pytest.approx(10.0 + 40.0 + 20.0)
+    assert segments.free_area(0.0, 5.0, 200.0, 25.0) == pytest.approx(5 * 190.0 + 10 * 170.0 + 5 * 170.0)
+
+
+def test_band_and_without():
+    segments = make_segments()
+    band = segments.band(1, 3)
+    assert band.level_y == [10.0, 20.0]
+    assert band.seg_lo == segments.seg_lo[1:3]
+
+    remaining = segments.without(([0.0, 120.0], [0.0, 20.0], [10.0, 30.0], [10.0, 20.0]))
+    assert remaining.seg_lo[0] == [10.0, 100.0]
+    assert remaining.seg_lo[2] == [0.0, 50.0, 100.0, 150.0]
+    assert remaining.blocked_length == pytest.approx(40.0 + 10.0 + 2 * 30.0)